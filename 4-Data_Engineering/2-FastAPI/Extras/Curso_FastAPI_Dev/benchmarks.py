@@ -0,0 +1,728 @@
+"""
+benchmarks.py
+
+Comprobaciones de rendimiento de la aplicación de main_completo.py.
+
+Cada comprobación crea su propia base de datos SQLite temporal, la rellena
+con datos de prueba y sustituye la dependencia get_db de la aplicación, así
+que no toca app_database.db.
+
+Uso:
+    python benchmarks.py queries        # consultas SQL por petición de listado
+    python benchmarks.py concurrency    # handlers sync (pool de hilos) vs async
+    python benchmarks.py readwrite      # lecturas con escrituras a la vez, por perfil SQLite
+    python benchmarks.py signup         # altas y cambios de usuario: sentencias y altas/s
+    python benchmarks.py search         # búsqueda de texto (FTS5) sobre un millón de items
+    python benchmarks.py export         # exportación en streaming vs paginar GET /items/
+    python benchmarks.py delete         # borrar usuarios con muchos items: cascade ORM vs DELETE en conjunto
+    python benchmarks.py cache          # GET /users/{id} sin caché, con caché y con If-None-Match
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, insert, text
+from sqlalchemy.orm import sessionmaker
+
+import cache
+import crud
+import export
+import jobs
+import models
+from database import get_db
+from main_completo import app
+from search import create_search_index
+
+# ============================================
+# UTILIDADES
+# ============================================
+
+def make_database(path: str):
+    """Crea un engine y una factory de sesiones sobre un fichero SQLite nuevo."""
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    models.Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        create_search_index(connection)
+    # Mismas opciones que database.SessionLocal
+    return engine, sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+def use_database(session_factory):
+    """Hace que la aplicación use `session_factory` en lugar de database.SessionLocal."""
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+
+def seed(engine, n_users: int, items_per_user: int, tags_per_item: int, n_tags: int = 20):
+    """Inserta usuarios, items y tags con inserts multi-fila."""
+    with engine.begin() as conn:
+        conn.execute(insert(models.Tag), [{"name": f"tag{t}"} for t in range(n_tags)])
+        conn.execute(insert(models.User), [
+            {"email": f"user{u}@example.com", "username": f"user{u}", "hashed_password": "x"}
+            for u in range(n_users)
+        ])
+        conn.execute(insert(models.Item), [
+            {"name": f"item{u}_{i}", "price": 1.0, "owner_id": u + 1}
+            for u in range(n_users) for i in range(items_per_user)
+        ])
+        n_items = n_users * items_per_user
+        conn.execute(insert(models.item_tags), [
+            {"item_id": item + 1, "tag_id": (item + t) % n_tags + 1}
+            for item in range(n_items) for t in range(tags_per_item)
+        ])
+
+class StatementCounter:
+    """Cuenta las sentencias SQL que se ejecutan en un engine."""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+# ============================================
+# CONSULTAS POR PETICIÓN (N+1)
+# ============================================
+
+def bench_queries(args) -> bool:
+    """
+    Número de sentencias SQL por petición de GET /users/ y GET /items/ con
+    cada estrategia de carga y distintos tamaños de página.
+
+    Con "selectin" y "joined" el número tiene que ser el mismo para cualquier
+    tamaño de página; con "lazy" crece con la página (N+1).
+    """
+    page_sizes = (1, 10, 50, 100)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, session_factory = make_database(os.path.join(tmp, "bench.db"))
+        seed(engine, n_users=120, items_per_user=3, tags_per_item=2)
+        use_database(session_factory)
+        counter = StatementCounter(engine)
+        client = TestClient(app)
+
+        ok = True
+        print(f"{'endpoint':<10}{'load':<10}" + "".join(f"{f'limit={n}':>12}" for n in page_sizes))
+        for endpoint in ("/users/", "/items/"):
+            for load in ("selectin", "joined", "lazy"):
+                counts = []
+                for limit in page_sizes:
+                    counter.count = 0
+                    response = client.get(endpoint, params={"limit": limit, "load": load})
+                    assert response.status_code == 200 and len(response.json()) == limit
+                    counts.append(counter.count)
+
+                constant = len(set(counts)) == 1
+                if load != "lazy" and not constant:
+                    ok = False
+                print(f"{endpoint:<10}{load:<10}" + "".join(f"{c:>12}" for c in counts)
+                      + ("" if constant or load == "lazy" else "   <- NO CONSTANTE"))
+
+        app.dependency_overrides.clear()
+        engine.dispose()
+
+    print("OK: consultas constantes con carga anticipada" if ok else "ERROR: hay consultas N+1")
+    return ok
+
+# ============================================
+# CONCURRENCIA: SYNC VS ASYNC
+# ============================================
+
+async def drive_load(client, n_users: int, concurrency: int, requests: int, max_seconds: float = 60) -> dict:
+    """
+    Lanza `requests` lecturas con `concurrency` clientes a la vez.
+
+    Si no terminan en `max_seconds` se cancela el resto y se marca
+    `timed_out` (p. ej. si el pool de conexiones se queda bloqueado).
+    """
+    latencies = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker(seed: int):
+        nonlocal errors
+        rng = random.Random(seed)
+        for _ in remaining:
+            if rng.random() < 0.5:
+                url, params = f"/users/{rng.randint(1, n_users)}", None
+            else:
+                url, params = "/items/", {"limit": 20, "owner_id": rng.randint(1, n_users)}
+            start = time.perf_counter()
+            response = await client.get(url, params=params)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    timed_out = False
+    try:
+        await asyncio.wait_for(asyncio.gather(*(worker(i) for i in range(concurrency))), max_seconds)
+    except asyncio.TimeoutError:
+        timed_out = True
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "completed": len(latencies),
+        "req_s": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2) if latencies else None,
+        "p99_ms": round(latencies[max(0, int(len(latencies) * 0.99) - 1)] * 1000, 2) if latencies else None,
+        "errors": errors + (requests - len(latencies) if timed_out else 0),
+        "timed_out": timed_out,
+        "seconds": elapsed
+    }
+
+async def write_load(client, n_users: int, stop: asyncio.Event, seed: int) -> list:
+    """Crea items hasta que se activa `stop`; devuelve [escrituras, errores]."""
+    rng = random.Random(seed)
+    writes = errors = 0
+    while not stop.is_set():
+        response = await client.post(
+            f"/users/{rng.randint(1, n_users)}/items/",
+            json={"name": "bench", "price": 1.0, "tag_names": [f"tag{rng.randrange(20)}"]}
+        )
+        if response.status_code == 201:
+            writes += 1
+        else:
+            errors += 1
+    return [writes, errors]
+
+async def concurrency_worker(args) -> list:
+    """Proceso hijo: mide la app en el DB_MODE con el que se ha arrancado."""
+    import httpx
+
+    # Los errores del servidor (p. ej. el pool de conexiones agotado) se
+    # cuentan como respuestas 500 en vez de interrumpir la prueba
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await drive_load(client, args.users, 10, 200)     # Calentamiento
+        results = []
+        for concurrency in args.levels:
+            # Escritores en paralelo mientras dura el nivel (--writers)
+            stop = asyncio.Event()
+            writers = [asyncio.create_task(write_load(client, args.users, stop, i))
+                       for i in range(args.writers)]
+            row = await drive_load(client, args.users, concurrency, args.requests)
+            stop.set()
+            written = [sum(column) for column in zip(*await asyncio.gather(*writers))] or [0, 0]
+            row["writes_s"] = round(written[0] / row["seconds"], 1)
+            row["write_errors"] = written[1]
+            results.append(row)
+        return results
+
+def run_worker(path: str, args, **env) -> list:
+    """Ejecuta concurrency_worker en un proceso hijo con esas variables de entorno."""
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{path}", **env)
+    command = [sys.executable, __file__, "concurrency", "--worker",
+               "--users", str(args.users), "--requests", str(args.requests),
+               "--writers", str(args.writers), "--levels", *map(str, args.levels)]
+    output = subprocess.run(command, env=env, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+def bench_concurrency(args) -> bool:
+    """
+    Lecturas (GET /users/{id} y GET /items/) con concurrencia creciente,
+    con los handlers síncronos (pool de hilos de FastAPI) y los asíncronos.
+
+    Cada modo se ejecuta en un proceso aparte porque DB_MODE se lee al
+    importar la aplicación.
+    """
+    if args.worker:
+        print(json.dumps(asyncio.run(concurrency_worker(args))), flush=True)
+        # Si algún nivel se ha quedado bloqueado puede haber hilos esperando
+        # una conexión: salimos sin esperarlos
+        os._exit(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        engine, _ = make_database(path)
+        seed(engine, n_users=args.users, items_per_user=5, tags_per_item=2)
+        engine.dispose()
+
+        results = {mode: run_worker(path, args, DB_MODE=mode) for mode in ("sync", "async")}
+
+    columns = ("req/s", "p50 ms", "p99 ms", "errores")
+    print(f"{'concurrencia':>12}" + "".join(f"{mode + ' ' + col:>15}" for mode in results for col in columns))
+    for sync_row, async_row in zip(results["sync"], results["async"]):
+        print(f"{sync_row['concurrency']:>12}" + "".join(
+            f"{row['req_s']:>15}{str(row['p50_ms']):>15}{str(row['p99_ms']):>15}"
+            f"{str(row['errors']) + (' (bloq.)' if row['timed_out'] else ''):>15}"
+            for row in (sync_row, async_row)
+        ))
+    return True
+
+# ============================================
+# LECTURAS CON ESCRITURAS CONCURRENTES
+# ============================================
+
+def bench_readwrite(args) -> bool:
+    """
+    Las mismas lecturas que `concurrency` mientras --writers clientes crean
+    items sin parar, con el perfil SQLite por defecto (journal rollback) y
+    con el perfil "tuned" (WAL, ver database.py).
+
+    Cada perfil usa su propia base de datos: el modo WAL queda guardado en
+    el fichero y no se puede comparar sobre el mismo.
+    """
+    args.writers = args.writers or 4
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for profile in ("default", "tuned"):
+            path = os.path.join(tmp, f"{profile}.db")
+            engine, _ = make_database(path)
+            seed(engine, n_users=args.users, items_per_user=5, tags_per_item=2)
+            engine.dispose()
+            results[profile] = run_worker(path, args, DB_MODE="sync", DB_PROFILE=profile)
+
+    columns = ("lect/s", "p99 ms", "escr/s", "errores")
+    print(f"{'concurrencia':>12}" + "".join(f"{profile + ' ' + col:>16}" for profile in results for col in columns))
+    for default_row, tuned_row in zip(results["default"], results["tuned"]):
+        print(f"{default_row['concurrency']:>12}" + "".join(
+            f"{row['req_s']:>16}{str(row['p99_ms']):>16}{row['writes_s']:>16}"
+            f"{str(row['errors'] + row['write_errors']) + (' (bloq.)' if row['timed_out'] else ''):>16}"
+            for row in (default_row, tuned_row)
+        ))
+    return True
+
+# ============================================
+# ALTAS DE USUARIOS
+# ============================================
+
+async def signup_load(client, concurrency: int, requests: int, prefix: str) -> dict:
+    """Lanza `requests` altas de usuarios nuevos con `concurrency` clientes a la vez."""
+    latencies = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for n in remaining:
+            start = time.perf_counter()
+            response = await client.post("/users/", json={
+                "email": f"{prefix}{n}@example.com", "username": f"{prefix}{n}", "password": "Password123"
+            })
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 201:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "req_s": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p99_ms": round(latencies[max(0, int(len(latencies) * 0.99) - 1)] * 1000, 2),
+        "errors": errors
+    }
+
+def bench_signup(args) -> bool:
+    """
+    Sentencias SQL por alta (POST /users/) y por actualización (PATCH
+    /users/{id}) de usuario, y altas por segundo con concurrencia creciente.
+
+    El email y el username repetidos los detectan las restricciones UNIQUE,
+    así que un alta tiene que ser un solo INSERT (también si es repetida) y
+    una actualización un UPDATE ... RETURNING más la carga de items y tags.
+    """
+    import httpx
+
+    expected = {"alta": 1, "alta repetida": 1, "actualización": 3, "actualización repetida": 1}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, session_factory = make_database(os.path.join(tmp, "bench.db"))
+        seed(engine, n_users=100, items_per_user=3, tags_per_item=2)
+        use_database(session_factory)
+        counter = StatementCounter(engine)
+        client = TestClient(app)
+
+        requests = {
+            "alta": lambda: client.post("/users/", json={
+                "email": "nuevo@example.com", "username": "nuevo", "password": "Password123"}),
+            "alta repetida": lambda: client.post("/users/", json={
+                "email": "user1@example.com", "username": "otro", "password": "Password123"}),
+            "actualización": lambda: client.patch("/users/1", json={"username": "cambiado"}),
+            "actualización repetida": lambda: client.patch("/users/1", json={"email": "user2@example.com"}),
+        }
+
+        ok = True
+        print(f"{'petición':<24}{'estado':>8}{'sentencias':>12}{'esperadas':>12}")
+        for name, request in requests.items():
+            counter.count = 0
+            response = request()
+            if counter.count != expected[name]:
+                ok = False
+            print(f"{name:<24}{response.status_code:>8}{counter.count:>12}{expected[name]:>12}"
+                  + ("" if counter.count == expected[name] else "   <- DISTINTO"))
+
+        async def run_levels():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as async_client:
+                return [
+                    await signup_load(async_client, concurrency, args.requests, prefix=f"c{concurrency}_")
+                    for concurrency in args.levels
+                ]
+
+        print()
+        print(f"{'concurrencia':>12}{'altas/s':>12}{'p50 ms':>12}{'p99 ms':>12}{'errores':>12}")
+        for row in asyncio.run(run_levels()):
+            print(f"{row['concurrency']:>12}{row['req_s']:>12}{row['p50_ms']:>12}{row['p99_ms']:>12}{row['errors']:>12}")
+            ok = ok and row["errors"] == 0
+
+        app.dependency_overrides.clear()
+        engine.dispose()
+
+    print("OK: altas y actualizaciones en una sola escritura" if ok else "ERROR: hay consultas de más o errores")
+    return ok
+
+# ============================================
+# BÚSQUEDA DE TEXTO
+# ============================================
+
+NOUNS = ["laptop", "ratón", "teclado", "monitor", "cable", "silla", "mesa", "lámpara",
+         "auriculares", "altavoz", "cámara", "micrófono", "router", "disco", "memoria", "cargador"]
+ADJECTIVES = ["gamer", "inalámbrico", "ergonómico", "portátil", "compacto", "profesional",
+              "mecánico", "plegable", "silencioso", "reforzado"]
+
+def seed_catalog(engine, n_items: int, n_users: int = 1000, chunk: int = 50_000):
+    """
+    Inserta `n_items` items con nombres y descripciones realistas: palabras
+    muy frecuentes (los sustantivos), frecuentes (los adjetivos) y casi
+    únicas (el modelo, p. ej. "zx4821").
+    """
+    rng = random.Random(0)
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [
+            {"email": f"user{u}@example.com", "username": f"user{u}", "hashed_password": "x"}
+            for u in range(n_users)
+        ])
+        for start in range(0, n_items, chunk):
+            conn.execute(insert(models.Item), [
+                {
+                    "name": f"{rng.choice(NOUNS)} {rng.choice(ADJECTIVES)} zx{rng.randrange(100_000)}",
+                    "description": f"{rng.choice(ADJECTIVES)} para {rng.choice(NOUNS)}",
+                    "price": 1.0,
+                    "owner_id": rng.randint(1, n_users)
+                }
+                for _ in range(start, min(start + chunk, n_items))
+            ])
+
+def bench_search(args) -> bool:
+    """
+    Latencia de GET /items/search sobre un catálogo de --items items
+    (un millón por defecto) con búsquedas más o menos selectivas, por
+    prefijo y paginando con el cursor.
+
+    Como referencia se mide también lo que tarda en encontrar todas las
+    coincidencias de la primera palabra con LIKE '%...%', que tiene que
+    leer la tabla entera (ordenar por relevancia necesita todas).
+    """
+    searches = [
+        ("modelo exacto", {"q": "zx4821"}),
+        ("dos palabras", {"q": "laptop gamer"}),
+        ("tres palabras", {"q": "silla ergonomico zx1*"}),
+        ("prefijo", {"q": "zx482*"}),
+        ("palabra frecuente", {"q": "monitor"}),
+        ("prefijo corto", {"q": "la*"}),
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, session_factory = make_database(os.path.join(tmp, "bench.db"))
+        start = time.perf_counter()
+        seed_catalog(engine, args.items)
+        print(f"{args.items} items insertados e indexados en {time.perf_counter() - start:.1f} s\n")
+        use_database(session_factory)
+        client = TestClient(app)
+
+        ok = True
+        print(f"{'búsqueda':<20}{'q':<24}{'p50 ms':>10}{'5 págs ms':>10}{'LIKE ms':>10}")
+        for name, params in searches:
+            latencies = []
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                response = client.get("/items/search", params=params)
+                latencies.append(time.perf_counter() - t0)
+                ok = ok and response.status_code == 200 and len(response.json()) > 0
+
+            # Quinta página siguiendo el cursor
+            t0 = time.perf_counter()
+            cursor = None
+            for _ in range(5):
+                page = client.get("/items/search", params=dict(params, cursor=cursor) if cursor else params)
+                cursor = page.headers.get("X-Next-Cursor")
+                if not cursor:
+                    break
+            page_ms = (time.perf_counter() - t0) * 1000 / 5
+
+            # Referencia sin índice: la primera palabra con LIKE
+            word = params["q"].split()[0].rstrip("*")
+            t0 = time.perf_counter()
+            with engine.connect() as conn:
+                conn.execute(text("SELECT count(*) FROM items WHERE name LIKE :p OR description LIKE :p"),
+                             {"p": f"%{word}%"}).scalar()
+            like_ms = (time.perf_counter() - t0) * 1000
+
+            print(f"{name:<20}{params['q']:<24}{statistics.median(latencies) * 1000:>10.2f}"
+                  f"{page_ms:>10.2f}{like_ms:>10.2f}")
+
+        app.dependency_overrides.clear()
+        engine.dispose()
+
+    print("OK: todas las búsquedas devuelven resultados" if ok else "ERROR: alguna búsqueda ha fallado")
+    return ok
+
+# ============================================
+# EXPORTACIÓN
+# ============================================
+
+def bench_export(args) -> bool:
+    """
+    Exportar todos los items: GET /export/items (NDJSON y CSV) frente a
+    recorrer GET /items/ página a página con el cursor.
+
+    También mide el pico de memoria de la exportación (tracemalloc) con la
+    cuarta parte de los items y con todos: tiene que ser casi el mismo.
+    """
+    n_users = max(1, args.items // 10)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, session_factory = make_database(os.path.join(tmp, "bench.db"))
+        seed(engine, n_users=n_users, items_per_user=10, tags_per_item=2)
+        use_database(session_factory)
+        app.dependency_overrides[export.get_export_engine] = lambda: engine
+        client = TestClient(app)
+        n_items = n_users * 10
+
+        print(f"{'método':<28}{'filas':>10}{'segundos':>10}{'filas/s':>12}")
+
+        def report(name: str, rows: int, seconds: float):
+            print(f"{name:<28}{rows:>10}{seconds:>10.2f}{rows / seconds:>12.0f}")
+
+        ok = True
+        for fmt in ("ndjson", "csv"):
+            start = time.perf_counter()
+            with client.stream("GET", "/export/items", params={"format": fmt}) as response:
+                lines = sum(chunk.count("\n") for chunk in response.iter_text())
+            rows = lines - (1 if fmt == "csv" else 0)
+            ok = ok and rows == n_items
+            report(f"GET /export/items ({fmt})", rows, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        rows, cursor = 0, None
+        while True:
+            response = client.get("/items/", params={"limit": 100, **({"cursor": cursor} if cursor else {})})
+            rows += len(response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        report("GET /items/ (100 por página)", rows, time.perf_counter() - start)
+
+        print(f"\n{'memoria (ndjson)':<28}{'filas':>10}{'pico MB':>10}")
+        peaks = []
+        for limit in (n_items // 4, n_items):
+            query = export.items_query().limit(limit)
+            tracemalloc.start()
+            for _ in export.stream_export(engine, query, "ndjson"):
+                pass
+            peaks.append(tracemalloc.get_traced_memory()[1] / 1e6)
+            tracemalloc.stop()
+            print(f"{'':<28}{limit:>10}{peaks[-1]:>10.2f}")
+        # Memoria constante: con 4 veces más filas el pico apenas cambia
+        ok = ok and peaks[1] < peaks[0] * 1.5
+
+        app.dependency_overrides.clear()
+        engine.dispose()
+
+    print("OK: exportación completa con memoria constante" if ok else "ERROR: faltan filas o la memoria crece")
+    return ok
+
+# ============================================
+# BORRADO DE USUARIOS CON MUCHOS ITEMS
+# ============================================
+
+# El cascade del ORM tarda ~0.3 ms por item: por encima no se mide
+ORM_DELETE_MAX_ITEMS = 10_000
+
+class TransactionTimer:
+    """Duración de la transacción más larga de un engine (bloqueo de escritura)."""
+
+    def __init__(self, engine):
+        self.longest = 0.0
+        self._start = None
+        event.listen(engine, "begin", self._on_begin)
+        event.listen(engine, "commit", self._on_end)
+        event.listen(engine, "rollback", self._on_end)
+
+    def _on_begin(self, conn):
+        self._start = time.perf_counter()
+
+    def _on_end(self, conn):
+        if self._start is not None:
+            self.longest = max(self.longest, time.perf_counter() - self._start)
+            self._start = None
+
+def orm_cascade_delete(db, user_id: int) -> bool:
+    """Borrado anterior: cargar el usuario y dejar que el cascade borre los items uno a uno."""
+    db_user = db.get(models.User, user_id)
+    db.delete(db_user)
+    db.commit()
+    return True
+
+def bench_delete(args) -> bool:
+    """
+    Borrar un usuario con N items (N en --sizes), cada uno con 2 tags:
+    cascade del ORM frente a crud.delete_user (DELETE en conjunto) y
+    frente al trabajo por bloques de jobs.py.
+
+    Para cada método: sentencias SQL, segundos y la transacción más larga
+    (el tiempo que el resto de escrituras tendría que esperar). Comprueba
+    que no quedan items, tags huérfanos ni entradas en el índice de
+    búsqueda, y que los items de otro usuario siguen ahí.
+    """
+    methods = {
+        "cascade ORM": orm_cascade_delete,
+        "crud.delete_user": crud.delete_user,
+        "trabajo por bloques": lambda db, user_id: jobs.delete_user_in_batches(
+            lambda: db, user_id, pause=0
+        ),
+    }
+
+    print(f"{'items':>8}  {'método':<22}{'sentencias':>11}{'segundos':>10}{'transacción máx (s)':>21}")
+    ok = True
+    for size in args.sizes:
+        for name, delete_user in methods.items():
+            if name == "cascade ORM" and size > ORM_DELETE_MAX_ITEMS:
+                continue
+            with tempfile.TemporaryDirectory() as tmp:
+                engine, session_factory = make_database(os.path.join(tmp, "bench.db"))
+                # Usuario 1 con `size` items y usuario 2 con 10 que no se deben tocar
+                seed(engine, n_users=1, items_per_user=size, tags_per_item=2)
+                with engine.begin() as conn:
+                    conn.execute(insert(models.User), [{"email": "other@example.com", "username": "other", "hashed_password": "x"}])
+                    conn.execute(insert(models.Item), [{"name": f"other{i}", "price": 1.0, "owner_id": 2} for i in range(10)])
+
+                counter = StatementCounter(engine)
+                timer = TransactionTimer(engine)
+                start = time.perf_counter()
+                with session_factory() as db:
+                    delete_user(db, 1)
+                seconds = time.perf_counter() - start
+                statements = counter.count
+
+                with engine.connect() as conn:
+                    left = conn.execute(text(
+                        "SELECT (SELECT count(*) FROM users),"
+                        " (SELECT count(*) FROM items WHERE owner_id = 1),"
+                        " (SELECT count(*) FROM items WHERE owner_id = 2),"
+                        " (SELECT count(*) FROM item_tags WHERE item_id NOT IN (SELECT id FROM items)),"
+                        " (SELECT count(*) FROM items_fts WHERE items_fts MATCH 'item0*')"
+                    )).one()
+                ok = ok and tuple(left) == (1, 0, 10, 0, 0)
+                engine.dispose()
+
+            print(f"{size:>8}  {name:<22}{statements:>11}{seconds:>10.3f}{timer.longest:>21.3f}")
+
+    print("OK: usuarios borrados sin dejar filas huérfanas" if ok else "ERROR: quedan filas del usuario borrado")
+    return ok
+
+# ============================================
+# CACHÉ DE RESPUESTAS Y ETAG
+# ============================================
+
+def bench_cache(args) -> bool:
+    """
+    GET /users/{id} (cada usuario con 10 items y 2 tags por item) sin caché,
+    con caché y con caché + If-None-Match: peticiones/s y sentencias SQL
+    por petición. Comprueba que tras un PATCH la respuesta cambia.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, session_factory = make_database(os.path.join(tmp, "bench.db"))
+        seed(engine, n_users=args.users, items_per_user=10, tags_per_item=2)
+        use_database(session_factory)
+        counter = StatementCounter(engine)
+        client = TestClient(app)
+        ids = [random.randint(1, args.users) for _ in range(args.requests)]
+        backend = cache.response_cache.backend
+
+        print(f"{'modo':<26}{'peticiones/s':>14}{'sentencias/petición':>21}")
+        for name in ("sin caché", "caché", "caché + If-None-Match"):
+            cache.response_cache.backend = None if name == "sin caché" else backend
+            cache.response_cache.clear()
+            etags = {}
+            if name == "caché + If-None-Match":
+                # El cliente ya tiene todas las respuestas
+                etags = {user_id: client.get(f"/users/{user_id}").headers["etag"] for user_id in set(ids)}
+            elif name == "caché":
+                for user_id in set(ids):
+                    client.get(f"/users/{user_id}")
+
+            counter.count = 0
+            start = time.perf_counter()
+            for user_id in ids:
+                headers = {"If-None-Match": etags[user_id]} if etags else {}
+                client.get(f"/users/{user_id}", headers=headers)
+            seconds = time.perf_counter() - start
+            print(f"{name:<26}{len(ids) / seconds:>14.0f}{counter.count / len(ids):>21.2f}")
+
+        # Invalidación: el PATCH tiene que cambiar la respuesta y su ETag
+        before = client.get("/users/1")
+        client.patch("/users/1", json={"username": "renamed"})
+        after = client.get("/users/1", headers={"If-None-Match": before.headers["etag"]})
+        ok = after.status_code == 200 and after.json()["username"] == "renamed"
+
+        app.dependency_overrides.clear()
+        engine.dispose()
+
+    print("OK: la caché se invalida al modificar el usuario" if ok else "ERROR: la caché devuelve datos antiguos")
+    return ok
+
+# ============================================
+# PUNTO DE ENTRADA
+# ============================================
+
+BENCHMARKS = {
+    "queries": bench_queries,
+    "concurrency": bench_concurrency,
+    "readwrite": bench_readwrite,
+    "signup": bench_signup,
+    "search": bench_search,
+    "export": bench_export,
+    "delete": bench_delete,
+    "cache": bench_cache,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks de main_completo.py")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--users", type=int, default=1000, help="Usuarios de prueba (concurrency, readwrite, cache)")
+    parser.add_argument("--requests", type=int, default=1000, help="Peticiones por nivel (concurrency, readwrite, signup, cache)")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 10, 50, 200],
+                        help="Niveles de concurrencia (concurrency, readwrite, signup)")
+    parser.add_argument("--writers", type=int, default=0,
+                        help="Clientes escribiendo a la vez (readwrite: 4 por defecto)")
+    parser.add_argument("--items", type=int, default=1_000_000, help="Items del catálogo (search, export)")
+    parser.add_argument("--repeat", type=int, default=20, help="Repeticiones de cada búsqueda (search)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10_000, 100_000],
+                        help="Items del usuario que se borra (delete)")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    sys.exit(0 if BENCHMARKS[args.benchmark](args) else 1)
@@ -0,0 +1,58 @@
+"""
+bulk.py
+
+Utilidades de los endpoints de creación masiva (POST /users/bulk y
+POST /users/{user_id}/items/bulk), compartidas por la versión síncrona y la
+asíncrona de la API.
+"""
+
+from typing import Any, Dict, List
+
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+
+import schemas
+
+# Máximo de filas por petición de creación masiva
+BULK_MAX_ROWS = 50000
+
+def validate_rows(rows: List[Dict[str, Any]], schema):
+    """
+    Valida cada fila por separado con `schema`.
+
+    Así una fila inválida no rechaza todo el lote (como haría un 422),
+    sino que se informa con su posición.
+
+    Returns:
+        (lista de (posición, objeto validado), lista de schemas.BulkError)
+    """
+    if len(rows) > BULK_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Máximo {BULK_MAX_ROWS} filas por petición"
+        )
+
+    valid, errors = [], []
+    for index, row in enumerate(rows):
+        try:
+            valid.append((index, schema.parse_obj(row)))
+        except ValidationError as e:
+            detail = "; ".join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+                for error in e.errors()
+            )
+            errors.append(schemas.BulkError(index=index, detail=detail))
+    return valid, errors
+
+def bulk_result(valid: list, ids: List[int], errors: list, db_errors: Dict[int, str]) -> dict:
+    """Junta los errores de validación y los de la base de datos en la respuesta."""
+    # Las posiciones de db_errors son relativas a la lista de filas válidas
+    errors = errors + [
+        schemas.BulkError(index=valid[position][0], detail=detail)
+        for position, detail in db_errors.items()
+    ]
+    return {
+        "created": len(ids),
+        "ids": ids,
+        "errors": sorted(errors, key=lambda error: error.index)
+    }
@@ -0,0 +1,292 @@
+"""
+cache.py
+
+Caché de respuestas de GET /users/{user_id}, GET /items/{item_id} y
+GET /tags/, con ETag y peticiones condicionales (If-None-Match).
+
+Cada entrada guarda el JSON ya serializado de la respuesta y su ETag (un
+hash del JSON). Con la entrada en caché:
+- Si el cliente envía `If-None-Match` con el mismo ETag se responde 304
+  sin cuerpo, sin tocar la base de datos.
+- Si no, se envían los bytes guardados: ni consulta ni serialización.
+
+Los endpoints que modifican datos invalidan las entradas afectadas
+(`invalidate`): el usuario incluye sus items y sus tags, así que crear,
+modificar o borrar un item invalida también la entrada de su propietario,
+y crear items puede crear tags nuevos.
+
+Para que una lectura lenta no guarde datos anteriores a una invalidación
+que ha ocurrido mientras tanto, cada recurso tiene una generación que
+cambia al invalidarlo: una entrada solo vale si se guardó con la
+generación actual. Cada invalidación genera un valor nuevo (uuid), nunca
+uno que ya se haya usado: con un contador, al caducar volvería a empezar
+y una entrada antigua podría parecer vigente otra vez. Por lo mismo, si
+un recurso no tiene generación (nunca se ha invalidado, ha caducado o el
+backend local la ha descartado) la consulta le crea una nueva.
+
+Backends (variable de entorno CACHE_BACKEND):
+- "local" (por defecto): en la memoria del proceso. Con varios procesos
+  (uvicorn --workers N) cada uno tiene su caché y solo se entera de sus
+  propias invalidaciones: CACHE_TTL limita cuánto puede durar un dato
+  desactualizado.
+- "redis": compartida entre procesos (pip install redis, CACHE_URL).
+- "none": sin caché.
+"""
+
+import hashlib
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
+
+from fastapi import Request, Response, status
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+# ============================================
+# CONFIGURACIÓN
+# ============================================
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "local")
+CACHE_URL = os.getenv("CACHE_URL", "redis://localhost:6379/0")
+# Segundos que dura una entrada aunque nadie la invalide
+CACHE_TTL = int(os.getenv("CACHE_TTL", "300"))
+# Entradas como máximo en el backend local (se descartan las menos usadas)
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+
+# ============================================
+# BACKENDS
+# ============================================
+
+class LocalBackend:
+    """
+    Almacén clave -> bytes en la memoria del proceso, con caducidad y LRU.
+
+    Tiene las mismas operaciones que RedisBackend, así sirve de sustituto
+    cuando no hay Redis (desarrollo, un solo proceso).
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._values: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        # Las generaciones van aparte para que el LRU no las descarte antes
+        # que las entradas que dependen de ellas. También tienen límite:
+        # descartar una es seguro, sus entradas pasan a ser fallos (ver
+        # ResponseCache.lookup)
+        self._generations: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        now = time.monotonic()
+        values = []
+        with self._lock:
+            for key in keys:
+                store = self._generations if key in self._generations else self._values
+                stored = store.get(key)
+                if stored is None or stored[0] < now:
+                    values.append(None)
+                    continue
+                store.move_to_end(key)
+                values.append(stored[1])
+        return values
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        with self._lock:
+            self._values[key] = (time.monotonic() + ttl, value)
+            self._values.move_to_end(key)
+            while len(self._values) > self.max_entries:
+                self._values.popitem(last=False)
+
+    def set_generation(self, key: str, value: bytes, ttl: Optional[int]) -> None:
+        """Guarda una generación; con ttl=None no caduca."""
+        with self._lock:
+            self._generations[key] = (time.monotonic() + ttl if ttl is not None else float("inf"), value)
+            self._generations.move_to_end(key)
+            while len(self._generations) > self.max_entries:
+                self._generations.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._values.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+            self._generations.clear()
+
+class RedisBackend:
+    """Mismas operaciones que LocalBackend sobre Redis, compartido entre procesos."""
+
+    def __init__(self, url: str = CACHE_URL):
+        # Import aquí para que el backend local no necesite tener redis instalado
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+
+    def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        return self.client.mget(keys)
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        self.client.set(key, value, ex=ttl)
+
+    def set_generation(self, key: str, value: bytes, ttl: Optional[int]) -> None:
+        self.client.set(key, value, ex=ttl)
+
+    def delete(self, key: str) -> None:
+        self.client.delete(key)
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter("resp:*")) + list(self.client.scan_iter("gen:*"))
+        if keys:
+            self.client.delete(*keys)
+
+def make_backend(name: str = CACHE_BACKEND):
+    if name == "none":
+        return None
+    if name == "redis":
+        return RedisBackend()
+    return LocalBackend()
+
+# ============================================
+# RESPUESTAS EN CACHÉ
+# ============================================
+
+@lru_cache(maxsize=None)
+def _adapter(response_type) -> TypeAdapter:
+    return TypeAdapter(response_type)
+
+def render(schema, obj) -> bytes:
+    """
+    JSON de `obj` (un objeto o una lista) con el schema de respuesta: los
+    mismos bytes que devolvería FastAPI con response_model=schema.
+    """
+    # Igual que FastAPI: se valida leyendo los atributos del objeto del ORM
+    adapter = _adapter(List[schema] if isinstance(obj, list) else schema)
+    content = adapter.dump_python(adapter.validate_python(obj, from_attributes=True), mode="json")
+    return JSONResponse(content).body
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Si la cabecera If-None-Match (lista de ETags o *) incluye `etag`."""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    # Comparación débil: W/"x" y "x" son el mismo ETag
+    return "*" in candidates or etag in (candidate.removeprefix("W/") for candidate in candidates)
+
+class CachedResponse:
+    def __init__(self, etag: str, body: bytes, hit: bool):
+        self.etag = etag
+        self.body = body
+        self.hit = hit
+
+    def to_response(self, request: Request) -> Response:
+        """304 si el cliente ya tiene esta versión; si no, 200 con el JSON."""
+        # no-cache: el cliente puede guardarla, pero tiene que revalidarla
+        # con If-None-Match antes de usarla
+        headers = {"ETag": self.etag, "Cache-Control": "no-cache", "X-Cache": "HIT" if self.hit else "MISS"}
+        if _etag_matches(request.headers.get("if-none-match"), self.etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(content=self.body, media_type="application/json", headers=headers)
+
+def _new_generation() -> bytes:
+    # Sin puntos ni espacios: la versión de una entrada es "recurso.tipo"
+    return uuid.uuid4().hex.encode()
+
+class ResponseCache:
+    """
+    Respuestas serializadas por recurso ("user:1", "item:7", "tags:0:100").
+
+    Uso en un endpoint:
+
+        cached, version = response_cache.lookup("user", user_id)
+        if cached:
+            return cached.to_response(request)
+        ... leer de la base de datos ...
+        return response_cache.store("user", user_id, version, body).to_response(request)
+    """
+
+    def __init__(self, backend, ttl: int = CACHE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+
+    @staticmethod
+    def _keys(kind: str, key) -> Tuple[str, str, str]:
+        # Entrada, generación del recurso y generación de todo el tipo
+        return f"resp:{kind}:{key}", f"gen:{kind}:{key}", f"gen:{kind}"
+
+    def lookup(self, kind: str, key) -> Tuple[Optional[CachedResponse], bytes]:
+        """
+        Entrada vigente de un recurso, o None, y la versión actual del
+        recurso (hay que pasarla a store).
+        """
+        if self.backend is None:
+            return None, b""
+        entry_key, resource_gen, kind_gen = self._keys(kind, key)
+        entry, resource_version, kind_version = self.backend.get_many([entry_key, resource_gen, kind_gen])
+        # Sin generación se crea una nueva (con la misma duración que en
+        # invalidate): una entrada guardada con una generación que ya no
+        # existe nunca vuelve a parecer vigente
+        if resource_version is None:
+            resource_version = _new_generation()
+            self.backend.set_generation(resource_gen, resource_version, 2 * self.ttl)
+        if kind_version is None:
+            kind_version = _new_generation()
+            self.backend.set_generation(kind_gen, kind_version, None)
+        version = resource_version + b"." + kind_version
+        if entry is not None:
+            entry_version, etag, body = entry.split(b" ", 2)
+            if entry_version == version:
+                return CachedResponse(etag.decode(), body, hit=True), version
+        return None, version
+
+    def store(self, kind: str, key, version: bytes, body: bytes) -> CachedResponse:
+        """Guarda `body` con la versión leída en lookup y calcula su ETag."""
+        etag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+        if self.backend is not None:
+            entry_key = self._keys(kind, key)[0]
+            self.backend.set(entry_key, version + b" " + etag.encode() + b" " + body, self.ttl)
+        return CachedResponse(etag, body, hit=False)
+
+    def invalidate(self, kind: str, keys: Optional[Iterable] = None) -> None:
+        """
+        Invalida los recursos `keys` de un tipo, o todos los del tipo si no
+        se indican.
+        """
+        if self.backend is None:
+            return
+        # La generación de todo un tipo ("item", "tags") no caduca: son
+        # pocas claves, y al invalidarla no se borra ninguna entrada
+        if keys is None:
+            self.backend.set_generation(self._keys(kind, None)[2], _new_generation(), None)
+            return
+        # La de un recurso caduca, pero dura más que las entradas que se
+        # guardaron con la anterior (y su entrada se borra)
+        for key in keys:
+            entry_key, resource_gen, _ = self._keys(kind, key)
+            self.backend.set_generation(resource_gen, _new_generation(), 2 * self.ttl)
+            self.backend.delete(entry_key)
+
+    def clear(self) -> None:
+        if self.backend is not None:
+            self.backend.clear()
+
+response_cache = ResponseCache(make_backend())
+
+# ============================================
+# INVALIDACIONES
+# ============================================
+
+def item_changed(item_id: int, owner_id: int, tags: bool = False) -> None:
+    """Un item creado, modificado o borrado: su entrada y la de su propietario."""
+    response_cache.invalidate("item", [item_id])
+    response_cache.invalidate("user", [owner_id])
+    if tags:
+        response_cache.invalidate("tags")
+
+def user_deleted(user_id: int) -> None:
+    """Un usuario borrado: su entrada y las de todos los items (no se sabe cuáles eran suyos)."""
+    response_cache.invalidate("user", [user_id])
+    response_cache.invalidate("item")
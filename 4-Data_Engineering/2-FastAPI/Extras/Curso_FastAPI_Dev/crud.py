@@ -0,0 +1,756 @@
+"""  
+crud.py
+
+Funciones CRUD (Create, Read, Update, Delete) para interactuar con la base de datos.
+
+Estas funciones encapsulan toda la lógica de acceso a datos,
+separándola de los endpoints de la API.
+"""
+
+from contextlib import contextmanager
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload, selectinload
+from typing import Dict, Iterable, List, Literal, Optional, Tuple
+import models
+import schemas
+import search
+
+# ============================================
+# ESTRATEGIAS DE CARGA DE RELACIONES
+# ============================================
+
+# Al serializar un User se leen sus items y los tags de cada item. Si las
+# relaciones se cargan de forma perezosa ("lazy", lo que hace SQLAlchemy por
+# defecto) cada acceso lanza una consulta: en una lista de 100 usuarios son
+# cientos de consultas (el problema N+1). Cargándolas de antemano el número
+# de consultas no depende del tamaño de la página:
+# - "selectin": una consulta extra por relación con WHERE id IN (...)
+# - "joined": todo en una sola consulta con LEFT OUTER JOIN (más filas
+#   repetidas, conviene cuando cada fila tiene pocos hijos)
+# - "lazy": sin carga anticipada
+LOAD_STRATEGIES = ("selectin", "joined", "lazy")
+LoadStrategy = Literal["selectin", "joined", "lazy"]    # Tipo para los parámetros de los endpoints
+
+def _user_load_options(load: Optional[str]) -> list:
+    """Opciones para cargar User.items y sus tags según la estrategia."""
+    if load == "selectin":
+        return [selectinload(models.User.items).selectinload(models.Item.tags)]
+    if load == "joined":
+        return [joinedload(models.User.items).joinedload(models.Item.tags)]
+    return []
+
+def _item_load_options(load: Optional[str]) -> list:
+    """Opciones para cargar Item.tags según la estrategia."""
+    if load == "selectin":
+        return [selectinload(models.Item.tags)]
+    if load == "joined":
+        return [joinedload(models.Item.tags)]
+    return []
+
+# Máximo de valores por cláusula IN (SQLite limita los parámetros por sentencia)
+IN_CHUNK_SIZE = 500
+
+def _chunks(values: list, size: int = IN_CHUNK_SIZE):
+    """Divide `values` en trozos de como mucho `size` elementos."""
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+# ============================================
+# CRUD PARA USER
+# ============================================
+
+class DuplicateUserError(Exception):
+    """
+    El email o el username ya pertenecen a otro usuario.
+
+    En vez de comprobarlo con una consulta antes de escribir (una ida y
+    vuelta más a la base de datos, y otra petición podría colarse entre la
+    comprobación y el INSERT), se deja que lo detecten las restricciones
+    UNIQUE de la tabla users.
+
+    Attributes:
+        field: Columna repetida ("email" o "username")
+    """
+
+    def __init__(self, field: str):
+        super().__init__(f"{field} duplicado")
+        self.field = field
+
+# Motivo de cada columna repetida en las creaciones masivas
+DUPLICATE_USER_DETAIL = {
+    "email": "El email ya está registrado",
+    "username": "El username ya está en uso"
+}
+
+def _duplicate_user_field(error: IntegrityError) -> Optional[str]:
+    """Columna UNIQUE de users que ha fallado, según el mensaje de la base de datos."""
+    # SQLite: "UNIQUE constraint failed: users.email"
+    # PostgreSQL: 'duplicate key value violates unique constraint "ix_users_email"'
+    message = str(error.orig)
+    for field in ("email", "username"):
+        if field in message:
+            return field
+    return None
+
+@contextmanager
+def _unique_user_fields(db: Session):
+    """Convierte una violación de UNIQUE en users en DuplicateUserError."""
+    try:
+        yield
+    except IntegrityError as error:
+        db.rollback()
+        field = _duplicate_user_field(error)
+        if field is None:
+            raise
+        raise DuplicateUserError(field) from error
+
+def get_user(db: Session, user_id: int, load: Optional[str] = None) -> Optional[models.User]:
+    """
+    Obtiene un usuario por su ID.
+    
+    Args:
+        db: Sesión de base de datos
+        user_id: ID del usuario
+        load: Estrategia de carga de items y tags (ver LOAD_STRATEGIES)
+    
+    Returns:
+        User o None si no existe
+    """
+    # .query() inicia una consulta
+    # .options() indica cómo cargar las relaciones
+    # .filter() añade una condición WHERE
+    # .first() retorna el primer resultado o None
+    return (
+        db.query(models.User)
+        .options(*_user_load_options(load))
+        .filter(models.User.id == user_id)
+        .first()
+    )
+
+def get_user_by_email(db: Session, email: str) -> Optional[models.User]:
+    """
+    Obtiene un usuario por su email.
+    
+    Útil para verificar si un email ya está registrado.
+    """
+    return db.query(models.User).filter(models.User.email == email).first()
+
+def get_user_by_username(db: Session, username: str) -> Optional[models.User]:
+    """Obtiene un usuario por su username."""
+    return db.query(models.User).filter(models.User.username == username).first()
+
+def get_users(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    is_active: Optional[bool] = None,
+    after_id: Optional[int] = None,
+    load: Optional[str] = "selectin"
+) -> List[models.User]:
+    """
+    Obtiene una lista de usuarios con paginación y filtrado opcional.
+    
+    Args:
+        db: Sesión de base de datos
+        skip: Número de registros a saltar
+        limit: Número máximo de registros a retornar
+        is_active: Filtrar por usuarios activos/inactivos (None = todos)
+        after_id: Paginación por cursor: solo usuarios con id mayor que este
+        load: Estrategia de carga de items y tags (ver LOAD_STRATEGIES)
+    
+    Returns:
+        Lista de usuarios ordenada por id
+    """
+    query = db.query(models.User).options(*_user_load_options(load))
+    
+    # Si se especifica is_active, filtramos
+    if is_active is not None:
+        query = query.filter(models.User.is_active == is_active)
+    
+    # Paginación por cursor: en vez de saltar filas, empezamos justo
+    # después del último id de la página anterior (usa el índice del id)
+    if after_id is not None:
+        query = query.filter(models.User.id > after_id)
+    
+    # Ordenamos por id para que las páginas sean estables
+    # .offset() salta los primeros N registros (para paginación)
+    # .limit() limita el número de resultados
+    # .all() retorna todos los resultados como lista
+    return query.order_by(models.User.id).offset(skip).limit(limit).all()
+
+def create_user(db: Session, user: schemas.UserCreate) -> models.User:
+    """
+    Crea un nuevo usuario en la base de datos.
+    
+    Args:
+        db: Sesión de base de datos
+        user: Schema con los datos del usuario
+    
+    Returns:
+        Usuario creado
+    
+    Raises:
+        DuplicateUserError: Si el email o el username ya existen
+    """
+    # En una aplicación real, deberías hashear la contraseña
+    # Por ejemplo, usando bcrypt o passlib
+    # Por ahora, la "hasheamos" añadiendo un prefijo (NO HACER EN PRODUCCIÓN)
+    fake_hashed_password = "hashed_" + user.password
+    
+    # Creamos una instancia del modelo SQLAlchemy
+    # items=[]: un usuario nuevo no tiene items, así no hace falta
+    # consultarlos al devolver la respuesta
+    db_user = models.User(
+        email=user.email,
+        username=user.username,
+        hashed_password=fake_hashed_password,
+        items=[]
+    )
+    
+    # Añadimos el usuario a la sesión
+    db.add(db_user)
+    
+    # Hacemos commit para guardar en la BD. Es una sola sentencia:
+    # INSERT ... RETURNING id, created_at trae los datos generados por la BD,
+    # y como la sesión no expira los objetos al hacer commit
+    # (expire_on_commit=False) no hace falta refrescarlo
+    with _unique_user_fields(db):
+        db.commit()
+    
+    return db_user
+
+def update_user(
+    db: Session,
+    user_id: int,
+    user_update: schemas.UserUpdate
+) -> Optional[models.User]:
+    """
+    Actualiza un usuario existente.
+    
+    Args:
+        db: Sesión de base de datos
+        user_id: ID del usuario a actualizar
+        user_update: Datos a actualizar
+    
+    Returns:
+        Usuario actualizado (con sus items y tags) o None si no existe
+    
+    Raises:
+        DuplicateUserError: Si el nuevo email o username ya son de otro usuario
+    """
+    # Obtenemos solo los campos que fueron proporcionados
+    update_data = user_update.dict(exclude_unset=True)
+    
+    # Si se actualizó la contraseña, la hasheamos
+    if "password" in update_data:
+        update_data["hashed_password"] = "hashed_" + update_data.pop("password")
+    
+    if not update_data:
+        return get_user(db, user_id, load="selectin")
+    
+    # UPDATE ... RETURNING actualiza y devuelve el usuario en una sola
+    # sentencia (sin leerlo antes); si no existe no devuelve ninguna fila.
+    # Las opciones de carga traen sus items y tags para la respuesta
+    query = (
+        update(models.User)
+        .where(models.User.id == user_id)
+        .values(**update_data)
+        .returning(models.User)
+        .options(*_user_load_options("selectin"))
+        .execution_options(populate_existing=True)
+    )
+    with _unique_user_fields(db):
+        db_user = db.scalars(query).one_or_none()
+        if db_user is None:
+            return None
+        db.commit()
+    
+    return db_user
+
+def count_user_items(db: Session, user_id: int) -> Optional[int]:
+    """
+    Número de items de un usuario, con una sola consulta.
+
+    Returns:
+        El número de items, o None si el usuario no existe
+    """
+    items = (
+        select(func.count())
+        .select_from(models.Item)
+        .where(models.Item.owner_id == user_id)
+        .scalar_subquery()
+    )
+    row = db.execute(select(items).where(models.User.id == user_id)).first()
+    return None if row is None else row[0]
+
+def _delete_owned_items(db: Session, user_id: int, limit: Optional[int] = None) -> int:
+    """
+    Borra los items de un usuario (como mucho `limit`) y sus filas de
+    item_tags, con un DELETE para cada tabla. No hace commit.
+
+    Returns:
+        Número de items borrados
+    """
+    item_ids = select(models.Item.id).where(models.Item.owner_id == user_id)
+    if limit is not None:
+        item_ids = item_ids.order_by(models.Item.id).limit(limit)
+
+    # Primero la tabla de asociación (usa el índice de item_tags.item_id)
+    db.execute(delete(models.item_tags).where(models.item_tags.c.item_id.in_(item_ids)))
+    # synchronize_session=False: no se buscan los objetos borrados en la sesión
+    result = db.execute(
+        delete(models.Item)
+        .where(models.Item.id.in_(item_ids))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+def delete_user(db: Session, user_id: int) -> bool:
+    """
+    Elimina un usuario con todos sus items, en una sola transacción.
+    
+    En vez de cargar los items en la sesión y borrarlos uno a uno (lo que
+    hace el cascade de la relación User.items: un SELECT y un DELETE por
+    item y por cada tag), se borran en conjunto con tres sentencias:
+    
+        DELETE FROM item_tags WHERE item_id IN (SELECT id FROM items WHERE owner_id = ?)
+        DELETE FROM items WHERE id IN (SELECT id FROM items WHERE owner_id = ?)
+        DELETE FROM users WHERE id = ?
+    
+    Mientras dura la transacción SQLite no admite otras escrituras: para
+    usuarios con muchos items se puede usar delete_user_items_batch
+    (ver jobs.py).
+    
+    Args:
+        db: Sesión de base de datos
+        user_id: ID del usuario a eliminar
+    
+    Returns:
+        True si se eliminó, False si no existía
+    """
+    _delete_owned_items(db, user_id)
+    result = db.execute(
+        delete(models.User)
+        .where(models.User.id == user_id)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    
+    return result.rowcount > 0
+
+def delete_user_items_batch(db: Session, user_id: int, batch_size: int) -> int:
+    """
+    Borra como mucho `batch_size` items de un usuario (con sus tags) y hace
+    commit, así el bloqueo de escritura se libera entre un bloque y otro.
+    
+    Returns:
+        Número de items borrados (0 cuando ya no le quedan)
+    """
+    deleted = _delete_owned_items(db, user_id, limit=batch_size)
+    db.commit()
+    return deleted
+
+# ============================================
+# CRUD PARA TAG
+# ============================================
+
+def get_tag_by_name(db: Session, name: str) -> Optional[models.Tag]:
+    """Obtiene un tag por su nombre."""
+    return db.query(models.Tag).filter(models.Tag.name == name).first()
+
+def get_or_create_tag(db: Session, name: str) -> models.Tag:
+    """
+    Obtiene un tag existente o lo crea si no existe.
+    
+    Patrón útil para evitar duplicados.
+    """
+    tag = get_tag_by_name(db, name)
+    if tag:
+        return tag
+    
+    # Si no existe, lo creamos
+    tag = models.Tag(name=name)
+    db.add(tag)
+    db.commit()
+    db.refresh(tag)
+    return tag
+
+def get_tags(db: Session, skip: int = 0, limit: int = 100) -> List[models.Tag]:
+    """Obtiene una lista de tags."""
+    return db.query(models.Tag).offset(skip).limit(limit).all()
+
+# insert() de cada dialecto que admite ON CONFLICT DO NOTHING
+_UPSERT_INSERTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+def get_or_create_tags(db: Session, names: Iterable[str]) -> Dict[str, int]:
+    """
+    Resuelve muchos nombres de tag de una vez: una consulta para los que ya
+    existen y un INSERT multi-fila para los que faltan.
+    
+    No hace commit: los tags nuevos se guardan con el resto de la transacción.
+    
+    Returns:
+        Diccionario nombre -> id de tag
+    """
+    names = set(names)
+    tag_ids = {}
+    for chunk in _chunks(sorted(names)):
+        rows = db.execute(
+            select(models.Tag.name, models.Tag.id).where(models.Tag.name.in_(chunk))
+        )
+        tag_ids.update(rows.all())
+    
+    missing = [{"name": name} for name in sorted(names - tag_ids.keys())]
+    if missing:
+        # Otra petición puede crear el mismo tag entre la consulta y el
+        # INSERT: con ON CONFLICT DO NOTHING ese nombre no falla por la
+        # restricción UNIQUE, simplemente no vuelve en el RETURNING
+        dialect_insert = _UPSERT_INSERTS.get(db.get_bind().dialect.name)
+        if dialect_insert is not None:
+            statement = dialect_insert(models.Tag).on_conflict_do_nothing(index_elements=[models.Tag.name])
+        else:
+            statement = insert(models.Tag)
+        # RETURNING nos da los ids nuevos sin volver a consultar
+        rows = db.execute(statement.returning(models.Tag.name, models.Tag.id), missing)
+        tag_ids.update(rows.all())
+        
+        # Los que ha creado otra petición a la vez: los buscamos de nuevo
+        raced = sorted(names - tag_ids.keys())
+        for chunk in _chunks(raced):
+            rows = db.execute(
+                select(models.Tag.name, models.Tag.id).where(models.Tag.name.in_(chunk))
+            )
+            tag_ids.update(rows.all())
+    
+    return tag_ids
+
+# ============================================
+# CRUD PARA ITEM
+# ============================================
+
+def get_item(db: Session, item_id: int, load: Optional[str] = None) -> Optional[models.Item]:
+    """Obtiene un item por su ID (load: estrategia de carga de sus tags)."""
+    return (
+        db.query(models.Item)
+        .options(*_item_load_options(load))
+        .filter(models.Item.id == item_id)
+        .first()
+    )
+
+def get_items(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    owner_id: Optional[int] = None,
+    tag_name: Optional[str] = None,
+    after_id: Optional[int] = None,
+    load: Optional[str] = "selectin"
+) -> List[models.Item]:
+    """
+    Obtiene una lista de items con filtros opcionales, ordenada por id.
+    
+    Args:
+        db: Sesión de base de datos
+        skip: Paginación - items a saltar
+        limit: Paginación - límite de items
+        owner_id: Filtrar por propietario
+        tag_name: Filtrar por tag
+        after_id: Paginación por cursor - solo items con id mayor que este
+        load: Estrategia de carga de los tags (ver LOAD_STRATEGIES)
+    """
+    query = db.query(models.Item).options(*_item_load_options(load))
+    
+    # Filtrar por propietario si se especifica
+    if owner_id is not None:
+        query = query.filter(models.Item.owner_id == owner_id)
+    
+    # Filtrar por tag si se especifica
+    if tag_name:
+        # .join() hace un JOIN con la tabla de tags
+        query = query.join(models.Item.tags).filter(models.Tag.name == tag_name)
+    
+    # Paginación por cursor (ver get_users)
+    if after_id is not None:
+        query = query.filter(models.Item.id > after_id)
+    
+    return query.order_by(models.Item.id).offset(skip).limit(limit).all()
+
+def search_items(
+    db: Session,
+    q: str,
+    limit: int = 20,
+    after: Optional[search.SearchPosition] = None
+) -> Tuple[List[Tuple[models.Item, Optional[float]]], int]:
+    """
+    Busca items por nombre y descripción con el índice FTS5 (ver search.py).
+    
+    Primero van las coincidencias puntuadas, por relevancia, y si hay más
+    de search.MAX_RANKED_MATCHES, las anteriores por id (con puntuación
+    None): la página se completa con ellas.
+    
+    Args:
+        db: Sesión de base de datos
+        q: Texto a buscar (palabras, `prefijo*`)
+        limit: Número máximo de resultados
+        after: Paginación por cursor: posición de la última fila anterior
+    
+    Returns:
+        Lista de (item, puntuación) y el suelo de las coincidencias puntuadas
+        (para el cursor de la página siguiente)
+    
+    Raises:
+        ValueError: Si la búsqueda no contiene ninguna palabra
+    """
+    match = search.build_match_query(q)
+    floor = after[2] if after is not None else db.execute(search.ranked_floor_statement(match)).scalar_one()
+
+    rows = []
+    if after is None or after[0] is not None:
+        query = search.search_statement(match, limit=limit, floor=floor, after=after)
+        rows = db.execute(query.options(*_item_load_options("selectin"))).tuples().all()
+
+    before = search.older_matches_before(floor, after)
+    if len(rows) < limit and before > 0:
+        query = search.older_matches_statement(match, limit=limit - len(rows), before=before)
+        rows += [(item, None) for item in db.scalars(query.options(*_item_load_options("selectin")))]
+    return rows, floor
+
+def create_item(
+    db: Session,
+    item: schemas.ItemCreate,
+    owner_id: int
+) -> models.Item:
+    """
+    Crea un nuevo item.
+    
+    Args:
+        db: Sesión de base de datos
+        item: Datos del item
+        owner_id: ID del propietario
+    """
+    # Creamos el item sin los tags primero
+    db_item = models.Item(
+        name=item.name,
+        description=item.description,
+        price=item.price,
+        tax=item.tax,
+        owner_id=owner_id
+    )
+    
+    # Procesamos los tags
+    for tag_name in item.tag_names:
+        # Obtenemos o creamos cada tag
+        tag = get_or_create_tag(db, tag_name)
+        # Añadimos el tag al item
+        db_item.tags.append(tag)
+    
+    db.add(db_item)
+    db.commit()
+    db.refresh(db_item)
+    
+    return db_item
+
+def update_item(
+    db: Session,
+    item_id: int,
+    item_update: schemas.ItemUpdate
+) -> Optional[models.Item]:
+    """Actualiza un item existente."""
+    db_item = get_item(db, item_id)
+    if not db_item:
+        return None
+    
+    update_data = item_update.dict(exclude_unset=True)
+    
+    # Manejamos los tags por separado
+    tag_names = update_data.pop("tag_names", None)
+    
+    # Actualizamos campos básicos
+    for field, value in update_data.items():
+        setattr(db_item, field, value)
+    
+    # Actualizamos tags si se proporcionaron
+    if tag_names is not None:
+        # Cambiar solo los tags no modifica la fila de items: marcamos el
+        # item como modificado para la exportación incremental
+        db_item.updated_at = func.now()
+        # Limpiamos los tags actuales
+        db_item.tags = []
+        # Añadimos los nuevos tags
+        for tag_name in tag_names:
+            tag = get_or_create_tag(db, tag_name)
+            db_item.tags.append(tag)
+    
+    db.commit()
+    db.refresh(db_item)
+    
+    return db_item
+
+def delete_item(db: Session, item_id: int) -> Optional[models.Item]:
+    """Elimina un item y lo devuelve (None si no existía)."""
+    db_item = get_item(db, item_id)
+    if not db_item:
+        return None
+    
+    db.delete(db_item)
+    db.commit()
+    
+    return db_item
+
+# ============================================
+# CREACIÓN MASIVA
+# ============================================
+
+def create_users_bulk(
+    db: Session,
+    users: List[schemas.UserCreate]
+) -> Tuple[List[int], Dict[int, str]]:
+    """
+    Crea muchos usuarios en una sola transacción.
+    
+    Los emails/usernames repetidos (dentro de la lista o ya registrados) se
+    detectan con una consulta por trozo de la lista, no una por usuario.
+    
+    Si otra petición registra alguno entre la comprobación y el INSERT, la
+    restricción UNIQUE hace fallar el INSERT de todo el lote: entonces se
+    repite fila a fila (con un SAVEPOINT por fila) y las que chocan se
+    devuelven como errores, igual que en el alta de un usuario.
+    
+    Returns:
+        (ids creados en el orden de `users`, errores {posición: motivo})
+    """
+    errors = {}
+    
+    # Emails y usernames que ya existen en la base de datos
+    emails = sorted({u.email for u in users})
+    usernames = sorted({u.username for u in users})
+    taken_emails, taken_usernames = set(), set()
+    for chunk in _chunks(emails):
+        taken_emails.update(db.scalars(select(models.User.email).where(models.User.email.in_(chunk))))
+    for chunk in _chunks(usernames):
+        taken_usernames.update(db.scalars(select(models.User.username).where(models.User.username.in_(chunk))))
+    
+    rows, positions = [], []
+    for position, user in enumerate(users):
+        if user.email in taken_emails:
+            errors[position] = DUPLICATE_USER_DETAIL["email"]
+        elif user.username in taken_usernames:
+            errors[position] = DUPLICATE_USER_DETAIL["username"]
+        else:
+            # Los siguientes con el mismo email/username serán duplicados
+            taken_emails.add(user.email)
+            taken_usernames.add(user.username)
+            positions.append(position)
+            rows.append({
+                "email": user.email,
+                "username": user.username,
+                "hashed_password": "hashed_" + user.password  # Igual que create_user (NO HACER EN PRODUCCIÓN)
+            })
+    
+    if not rows:
+        return [], errors
+    
+    try:
+        ids = list(db.scalars(
+            insert(models.User).returning(models.User.id, sort_by_parameter_order=True),
+            rows
+        ))
+        db.commit()
+        return ids, errors
+    except IntegrityError as error:
+        db.rollback()
+        if _duplicate_user_field(error) is None:
+            raise
+    
+    ids = []
+    for position, row in zip(positions, rows):
+        try:
+            with db.begin_nested():
+                ids.append(db.execute(insert(models.User).returning(models.User.id), row).scalar_one())
+        except IntegrityError as error:
+            field = _duplicate_user_field(error)
+            if field is None:
+                raise
+            errors[position] = DUPLICATE_USER_DETAIL[field]
+    db.commit()
+    
+    return ids, errors
+
+def _item_row(item: schemas.ItemCreate, owner_id: int) -> dict:
+    """Valores de la fila de items para un ItemCreate."""
+    return {
+        "name": item.name,
+        "description": item.description,
+        "price": item.price,
+        "tax": item.tax,
+        "owner_id": owner_id
+    }
+
+def _item_tag_rows(ids: List[int], items: List[schemas.ItemCreate], tag_ids: Dict[str, int]) -> List[dict]:
+    """Filas de item_tags para los items creados con esos ids."""
+    # dict.fromkeys quita tags repetidos en un mismo item manteniendo el orden
+    return [
+        {"item_id": item_id, "tag_id": tag_ids[name]}
+        for item_id, item in zip(ids, items)
+        for name in dict.fromkeys(item.tag_names)
+    ]
+
+def create_items_bulk(
+    db: Session,
+    items: List[schemas.ItemCreate],
+    owner_id: int
+) -> Tuple[List[int], Dict[int, str]]:
+    """
+    Crea muchos items de un usuario en una sola transacción.
+    
+    Todos los nombres de tag distintos del lote se resuelven juntos con
+    get_or_create_tags, y las filas de item_tags se insertan en un único
+    INSERT multi-fila.
+    
+    Si la base de datos rechaza el lote (por ejemplo, el usuario se ha
+    borrado a la vez y falla la clave ajena owner_id), se repite fila a fila
+    con un SAVEPOINT por item y las que fallan se devuelven como errores,
+    igual que en create_users_bulk.
+    
+    Returns:
+        (ids creados en el orden de `items`, errores {posición: motivo})
+    """
+    if not items:
+        return [], {}
+    
+    names = [name for item in items for name in item.tag_names]
+    try:
+        tag_ids = get_or_create_tags(db, names)
+        ids = list(db.scalars(
+            insert(models.Item).returning(models.Item.id, sort_by_parameter_order=True),
+            [_item_row(item, owner_id) for item in items]
+        ))
+        associations = _item_tag_rows(ids, items, tag_ids)
+        if associations:
+            db.execute(insert(models.item_tags), associations)
+        db.commit()
+        return ids, {}
+    except IntegrityError:
+        db.rollback()
+    
+    tag_ids = get_or_create_tags(db, names)
+    ids, errors = [], {}
+    for position, item in enumerate(items):
+        try:
+            with db.begin_nested():
+                item_id = db.execute(insert(models.Item).returning(models.Item.id), _item_row(item, owner_id)).scalar_one()
+                associations = _item_tag_rows([item_id], [item], tag_ids)
+                if associations:
+                    db.execute(insert(models.item_tags), associations)
+            ids.append(item_id)
+        except IntegrityError as error:
+            errors[position] = f"Error de integridad en la base de datos: {error.orig}"
+    db.commit()
+    
+    return ids, errors
@@ -0,0 +1,295 @@
+"""
+crud_async.py
+
+Versión asíncrona de las funciones de crud.py, para AsyncSession.
+
+Mientras una consulta espera a la base de datos el event loop puede atender
+otras peticiones, sin ocupar un hilo del pool de FastAPI por petición.
+
+Diferencias con crud.py:
+- Las relaciones se cargan siempre de antemano ("selectin" o "joined"). En
+  async no se pueden cargar de forma perezosa al serializar la respuesta,
+  así que la estrategia "lazy" se trata como "selectin".
+- Las operaciones masivas reutilizan las de crud.py con AsyncSession.run_sync,
+  que ejecuta código de Session síncrona sobre la conexión asíncrona.
+"""
+
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Optional, Tuple
+import crud
+import models
+import schemas
+import search
+
+def _eager(load: Optional[str]) -> str:
+    """En async no existe la carga perezosa: "lazy" pasa a "selectin"."""
+    return load if load in ("selectin", "joined") else "selectin"
+
+# ============================================
+# CRUD PARA USER
+# ============================================
+
+async def _duplicate_user_error(db: AsyncSession, error: IntegrityError) -> Exception:
+    """Deshace la transacción y devuelve la excepción a lanzar (ver crud._unique_user_fields)."""
+    await db.rollback()
+    field = crud._duplicate_user_field(error)
+    return crud.DuplicateUserError(field) if field else error
+
+async def get_user(db: AsyncSession, user_id: int, load: Optional[str] = "selectin") -> Optional[models.User]:
+    """Obtiene un usuario por su ID, con sus items y tags."""
+    query = (
+        select(models.User)
+        .options(*crud._user_load_options(_eager(load)))
+        .where(models.User.id == user_id)
+        # Si el usuario ya estaba en la sesión, refrescamos sus datos
+        .execution_options(populate_existing=True)
+    )
+    return (await db.scalars(query)).unique().first()
+
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[models.User]:
+    """Obtiene un usuario por su email."""
+    return await db.scalar(select(models.User).where(models.User.email == email))
+
+async def get_user_by_username(db: AsyncSession, username: str) -> Optional[models.User]:
+    """Obtiene un usuario por su username."""
+    return await db.scalar(select(models.User).where(models.User.username == username))
+
+async def get_users(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    is_active: Optional[bool] = None,
+    after_id: Optional[int] = None,
+    load: Optional[str] = "selectin"
+) -> List[models.User]:
+    """Lista de usuarios ordenada por id (mismos filtros que crud.get_users)."""
+    query = select(models.User).options(*crud._user_load_options(_eager(load)))
+
+    if is_active is not None:
+        query = query.where(models.User.is_active == is_active)
+
+    if after_id is not None:
+        query = query.where(models.User.id > after_id)
+
+    query = query.order_by(models.User.id).offset(skip).limit(limit)
+    # .unique() es obligatorio con joinedload de colecciones
+    return list((await db.scalars(query)).unique())
+
+async def create_user(db: AsyncSession, user: schemas.UserCreate) -> models.User:
+    """
+    Crea un nuevo usuario con un solo INSERT ... RETURNING (ver crud.create_user).
+
+    Raises:
+        crud.DuplicateUserError: Si el email o el username ya existen
+    """
+    db_user = models.User(
+        email=user.email,
+        username=user.username,
+        hashed_password="hashed_" + user.password,
+        items=[]
+    )
+    db.add(db_user)
+    try:
+        await db.commit()
+    except IntegrityError as error:
+        raise await _duplicate_user_error(db, error) from error
+
+    return db_user
+
+async def update_user(
+    db: AsyncSession,
+    user_id: int,
+    user_update: schemas.UserUpdate
+) -> Optional[models.User]:
+    """
+    Actualiza un usuario con un solo UPDATE ... RETURNING (ver crud.update_user).
+
+    Raises:
+        crud.DuplicateUserError: Si el nuevo email o username ya son de otro usuario
+    """
+    update_data = user_update.dict(exclude_unset=True)
+
+    if "password" in update_data:
+        update_data["hashed_password"] = "hashed_" + update_data.pop("password")
+
+    if not update_data:
+        return await get_user(db, user_id)
+
+    query = (
+        update(models.User)
+        .where(models.User.id == user_id)
+        .values(**update_data)
+        .returning(models.User)
+        .options(*crud._user_load_options("selectin"))
+        .execution_options(populate_existing=True)
+    )
+    try:
+        db_user = (await db.scalars(query)).one_or_none()
+        if db_user is None:
+            return None
+        await db.commit()
+    except IntegrityError as error:
+        raise await _duplicate_user_error(db, error) from error
+
+    return db_user
+
+async def count_user_items(db: AsyncSession, user_id: int) -> Optional[int]:
+    """Igual que crud.count_user_items."""
+    return await db.run_sync(crud.count_user_items, user_id)
+
+async def delete_user(db: AsyncSession, user_id: int) -> bool:
+    """Elimina un usuario y sus items con DELETE en conjunto (ver crud.delete_user)."""
+    return await db.run_sync(crud.delete_user, user_id)
+
+# ============================================
+# CRUD PARA TAG
+# ============================================
+
+async def get_tags(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[models.Tag]:
+    """Obtiene una lista de tags."""
+    return list(await db.scalars(select(models.Tag).offset(skip).limit(limit)))
+
+async def _tags_by_name(db: AsyncSession, names: List[str]) -> List[models.Tag]:
+    """Tags con esos nombres, creando los que falten (sin commit)."""
+    if not names:
+        return []
+    tag_ids = await db.run_sync(crud.get_or_create_tags, names)
+    tags = {tag.name: tag for tag in await db.scalars(
+        select(models.Tag).where(models.Tag.id.in_(tag_ids.values()))
+    )}
+    # dict.fromkeys quita repetidos manteniendo el orden
+    return [tags[name] for name in dict.fromkeys(names)]
+
+# ============================================
+# CRUD PARA ITEM
+# ============================================
+
+async def get_item(db: AsyncSession, item_id: int, load: Optional[str] = "selectin") -> Optional[models.Item]:
+    """Obtiene un item por su ID, con sus tags."""
+    query = (
+        select(models.Item)
+        .options(*crud._item_load_options(_eager(load)))
+        .where(models.Item.id == item_id)
+        .execution_options(populate_existing=True)
+    )
+    return (await db.scalars(query)).unique().first()
+
+async def get_items(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    owner_id: Optional[int] = None,
+    tag_name: Optional[str] = None,
+    after_id: Optional[int] = None,
+    load: Optional[str] = "selectin"
+) -> List[models.Item]:
+    """Lista de items ordenada por id (mismos filtros que crud.get_items)."""
+    query = select(models.Item).options(*crud._item_load_options(_eager(load)))
+
+    if owner_id is not None:
+        query = query.where(models.Item.owner_id == owner_id)
+
+    if tag_name:
+        query = query.join(models.Item.tags).where(models.Tag.name == tag_name)
+
+    if after_id is not None:
+        query = query.where(models.Item.id > after_id)
+
+    query = query.order_by(models.Item.id).offset(skip).limit(limit)
+    return list((await db.scalars(query)).unique())
+
+async def search_items(
+    db: AsyncSession,
+    q: str,
+    limit: int = 20,
+    after: Optional[search.SearchPosition] = None
+) -> Tuple[List[Tuple[models.Item, Optional[float]]], int]:
+    """Busca items con el índice FTS5 (igual que crud.search_items)."""
+    match = search.build_match_query(q)
+    floor = after[2] if after is not None else (await db.execute(search.ranked_floor_statement(match))).scalar_one()
+
+    rows = []
+    if after is None or after[0] is not None:
+        query = search.search_statement(match, limit=limit, floor=floor, after=after)
+        rows = (await db.execute(query.options(*crud._item_load_options("selectin")))).tuples().all()
+
+    before = search.older_matches_before(floor, after)
+    if len(rows) < limit and before > 0:
+        query = search.older_matches_statement(match, limit=limit - len(rows), before=before)
+        rows += [(item, None) for item in await db.scalars(query.options(*crud._item_load_options("selectin")))]
+    return rows, floor
+
+async def create_item(
+    db: AsyncSession,
+    item: schemas.ItemCreate,
+    owner_id: int
+) -> models.Item:
+    """Crea un nuevo item; todos sus tags se resuelven en una consulta."""
+    db_item = models.Item(
+        name=item.name,
+        description=item.description,
+        price=item.price,
+        tax=item.tax,
+        owner_id=owner_id,
+        tags=await _tags_by_name(db, item.tag_names)
+    )
+    db.add(db_item)
+    await db.commit()
+
+    return await get_item(db, db_item.id)
+
+async def update_item(
+    db: AsyncSession,
+    item_id: int,
+    item_update: schemas.ItemUpdate
+) -> Optional[models.Item]:
+    """Actualiza un item existente."""
+    db_item = await get_item(db, item_id)
+    if not db_item:
+        return None
+
+    update_data = item_update.dict(exclude_unset=True)
+    tag_names = update_data.pop("tag_names", None)
+
+    for field, value in update_data.items():
+        setattr(db_item, field, value)
+
+    if tag_names is not None:
+        # Cambiar solo los tags no modifica la fila de items (ver crud.update_item)
+        db_item.updated_at = func.now()
+        db_item.tags = await _tags_by_name(db, tag_names)
+
+    await db.commit()
+    return db_item
+
+async def delete_item(db: AsyncSession, item_id: int) -> Optional[models.Item]:
+    """Elimina un item y lo devuelve (None si no existía)."""
+    db_item = await get_item(db, item_id)
+    if not db_item:
+        return None
+
+    await db.delete(db_item)
+    await db.commit()
+
+    return db_item
+
+# ============================================
+# CREACIÓN MASIVA
+# ============================================
+
+async def create_users_bulk(
+    db: AsyncSession,
+    users: List[schemas.UserCreate]
+) -> Tuple[List[int], Dict[int, str]]:
+    """Igual que crud.create_users_bulk."""
+    return await db.run_sync(crud.create_users_bulk, users)
+
+async def create_items_bulk(
+    db: AsyncSession,
+    items: List[schemas.ItemCreate],
+    owner_id: int
+) -> Tuple[List[int], Dict[int, str]]:
+    """Igual que crud.create_items_bulk."""
+    return await db.run_sync(crud.create_items_bulk, items, owner_id)
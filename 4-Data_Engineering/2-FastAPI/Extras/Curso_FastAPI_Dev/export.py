@@ -0,0 +1,207 @@
+"""
+export.py
+
+Exportación completa de items y usuarios en NDJSON o CSV, para cargarlos
+en otros sistemas (p. ej. la sincronización nocturna del data warehouse).
+
+A diferencia de GET /items/ y GET /users/:
+- No hay que paginar: la respuesta se envía en streaming, bloque a bloque,
+  mientras se leen las filas. La memoria usada no depende del número de
+  filas.
+- Las filas se leen con SQLAlchemy Core, sin crear objetos del ORM ni
+  validarlas con Pydantic.
+- Toda la exportación se lee en una sola transacción (engine de solo
+  lectura): con WAL es una foto consistente de la base de datos y no
+  bloquea las escrituras.
+
+Con `updated_since` solo se exportan las filas creadas o modificadas desde
+esa fecha (exportación incremental). Los borrados no se exportan.
+"""
+
+import csv
+import io
+import json
+import os
+from datetime import datetime, timezone
+from typing import Iterator, List, Literal, Optional
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import String, func, select, type_coerce
+from sqlalchemy.engine import Engine
+
+import database
+import models
+
+# Filas que se leen de la base de datos y se envían en cada bloque
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+
+ExportFormat = Literal["ndjson", "csv"]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+# Separador de los nombres de tags en aggregate_strings (group_concat en
+# SQLite/MySQL, string_agg en PostgreSQL): un carácter de control que no
+# aparece en los nombres
+TAG_SEPARATOR = "\x1f"
+# Separador de los tags en la columna "tags" del CSV
+CSV_TAG_SEPARATOR = "|"
+
+# ============================================
+# CONSULTAS
+# ============================================
+
+def _since(column, updated_since: datetime, dialect: str):
+    """
+    Condición `column >= updated_since` que usa el índice de updated_at.
+
+    Una fecha sin zona horaria se toma como UTC.
+
+    SQLite guarda CURRENT_TIMESTAMP como texto UTC "AAAA-MM-DD HH:MM:SS",
+    así que ahí se compara como texto con el mismo formato. El resto de
+    bases de datos tienen un tipo fecha de verdad (TIMESTAMP WITH TIME ZONE)
+    y se comparan fechas.
+    """
+    if updated_since.tzinfo is None:
+        updated_since = updated_since.replace(tzinfo=timezone.utc)
+    if dialect == "sqlite":
+        updated_since = updated_since.astimezone(timezone.utc)
+        return type_coerce(column, String) >= updated_since.strftime("%Y-%m-%d %H:%M:%S")
+    return column >= updated_since
+
+def _ordered(query, table, updated_since: Optional[datetime], dialect: str):
+    # Con updated_since se recorre el índice de updated_at (que en SQLite
+    # incluye el id), así las filas salen ordenadas sin ordenarlas en memoria
+    if updated_since is None:
+        return query.order_by(table.c.id)
+    return query.where(_since(table.c.updated_at, updated_since, dialect)).order_by(table.c.updated_at, table.c.id)
+
+def users_query(updated_since: Optional[datetime] = None, dialect: str = "sqlite"):
+    """
+    Columnas públicas de users (sin hashed_password).
+
+    `dialect` es el de la base de datos en la que se ejecutará (ver _since).
+    """
+    users = models.User.__table__
+    query = select(
+        users.c.id, users.c.email, users.c.username, users.c.is_active,
+        users.c.created_at, users.c.updated_at
+    )
+    return _ordered(query, users, updated_since, dialect)
+
+def items_query(updated_since: Optional[datetime] = None, dialect: str = "sqlite"):
+    """Columnas de items y sus tags (una subconsulta por item con el índice de item_tags)."""
+    items = models.Item.__table__
+    tags = models.Tag.__table__
+    tag_names = (
+        select(func.aggregate_strings(tags.c.name, TAG_SEPARATOR))
+        .select_from(models.item_tags.join(tags, tags.c.id == models.item_tags.c.tag_id))
+        .where(models.item_tags.c.item_id == items.c.id)
+        .scalar_subquery()
+        .label("tags")
+    )
+    query = select(
+        items.c.id, items.c.name, items.c.description, items.c.price, items.c.tax,
+        items.c.owner_id, items.c.created_at, items.c.updated_at, tag_names
+    )
+    return _ordered(query, items, updated_since, dialect)
+
+# ============================================
+# FORMATOS
+# ============================================
+
+def _value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def _tags(value: Optional[str]) -> List[str]:
+    return value.split(TAG_SEPARATOR) if value else []
+
+def _ndjson(fields: List[str], rows) -> str:
+    lines = []
+    for row in rows:
+        record = {field: _value(value) for field, value in zip(fields, row)}
+        if "tags" in record:
+            record["tags"] = _tags(record["tags"])
+        lines.append(json.dumps(record, ensure_ascii=False))
+    return "\n".join(lines) + "\n"
+
+def _csv(fields: List[str], rows) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    tags_at = fields.index("tags") if "tags" in fields else None
+    for row in rows:
+        values = [_value(value) for value in row]
+        if tags_at is not None:
+            values[tags_at] = CSV_TAG_SEPARATOR.join(_tags(values[tags_at]))
+        writer.writerow(values)
+    return buffer.getvalue()
+
+def stream_export(engine: Engine, query, fmt: ExportFormat, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Ejecuta `query` y va devolviendo las filas formateadas en bloques de
+    `chunk_size`.
+
+    stream_results hace que el driver vaya leyendo las filas según se piden
+    en vez de cargarlas todas al ejecutar la consulta.
+    """
+    with engine.connect() as connection:
+        result = connection.execution_options(stream_results=True, yield_per=chunk_size).execute(query)
+        fields = list(result.keys())
+        if fmt == "csv":
+            yield _csv(fields, [fields])
+        encode = _csv if fmt == "csv" else _ndjson
+        for rows in result.partitions():
+            yield encode(fields, rows)
+
+# ============================================
+# ENDPOINTS DE EXPORTACIÓN
+# ============================================
+
+def get_export_engine() -> Engine:
+    """Engine de las exportaciones: el de solo lectura (ver database.py)."""
+    return database.read_engine
+
+router = APIRouter(prefix="/export", tags=["Export"])
+
+def _response(engine: Engine, query, fmt: ExportFormat, name: str) -> StreamingResponse:
+    return StreamingResponse(
+        stream_export(engine, query, fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'}
+    )
+
+@router.get("/items", summary="Exportar todos los items")
+def export_items(
+    format: ExportFormat = Query("ndjson", description="ndjson (un objeto JSON por línea) o csv"),
+    updated_since: Optional[datetime] = Query(None, description="Solo items creados o modificados desde esta fecha (ISO 8601)"),
+    engine: Engine = Depends(get_export_engine)
+):
+    """
+    Exporta todos los items con sus tags, en streaming.
+
+    En CSV los tags van en una columna separados por "|". Las filas van
+    ordenadas por id, o por (updated_at, id) si se indica `updated_since`.
+    El filtro es inclusivo: para una exportación incremental se puede pasar
+    el `updated_at` más alto de la exportación anterior y descartar los ids
+    repetidos.
+
+    Ejemplo:
+        GET /export/items?format=csv&updated_since=2024-01-01T00:00:00Z
+    """
+    return _response(engine, items_query(updated_since, engine.dialect.name), format, "items")
+
+@router.get("/users", summary="Exportar todos los usuarios")
+def export_users(
+    format: ExportFormat = Query("ndjson", description="ndjson (un objeto JSON por línea) o csv"),
+    updated_since: Optional[datetime] = Query(None, description="Solo usuarios creados o modificados desde esta fecha (ISO 8601)"),
+    engine: Engine = Depends(get_export_engine)
+):
+    """
+    Exporta todos los usuarios (sin la contraseña), en streaming.
+
+    Mismos parámetros y orden que GET /export/items.
+    """
+    return _response(engine, users_query(updated_since, engine.dialect.name), format, "users")
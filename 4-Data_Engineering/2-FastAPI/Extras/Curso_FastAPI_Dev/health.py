@@ -0,0 +1,211 @@
+"""
+health.py
+
+Comprobaciones de salud de la aplicación para el balanceador de carga y
+el orquestador (Kubernetes, ECS...):
+
+- Liveness (/health/live): el proceso responde. Si falla, hay que
+  reiniciarlo. No toca la base de datos: una base de datos lenta no se
+  arregla reiniciando la aplicación.
+- Readiness (/health/ready): la instancia puede atender tráfico. Si falla,
+  el balanceador deja de enviarle peticiones hasta que se recupere.
+
+La readiness combina:
+- Una consulta de prueba a la base de datos (SELECT 1 por cada pool) con
+  tiempo límite. El resultado se guarda HEALTH_PROBE_TTL segundos, así que
+  aunque el balanceador pregunte muchas veces por segundo la base de datos
+  recibe como mucho una prueba por TTL.
+- La ocupación de los pools de conexiones (ver database.pool_stats).
+- El p99 de la duración de las peticiones recientes (LatencyMiddleware).
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Optional
+
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
+
+import database
+
+# ============================================
+# CONFIGURACIÓN
+# ============================================
+
+# Segundos que se reutiliza el resultado de la prueba de base de datos
+HEALTH_PROBE_TTL = float(os.getenv("HEALTH_PROBE_TTL", "2"))
+# Si la prueba tarda más, la base de datos se considera no disponible
+HEALTH_PROBE_TIMEOUT = float(os.getenv("HEALTH_PROBE_TIMEOUT", "1"))
+# Límites para estar "ready"
+HEALTH_MAX_PROBE_MS = float(os.getenv("HEALTH_MAX_PROBE_MS", "250"))
+HEALTH_MAX_P99_MS = float(os.getenv("HEALTH_MAX_P99_MS", "2000"))
+# checked_out / pool_size: por encima de 1 ya se abren conexiones extra
+HEALTH_MAX_POOL_UTILIZATION = float(os.getenv("HEALTH_MAX_POOL_UTILIZATION", "2"))
+# Ventana de las peticiones recientes para el p99
+HEALTH_LATENCY_WINDOW = float(os.getenv("HEALTH_LATENCY_WINDOW", "60"))
+
+# ============================================
+# LATENCIA DE LAS PETICIONES
+# ============================================
+
+class LatencyTracker:
+    """
+    Duración de las últimas peticiones, para calcular percentiles recientes.
+
+    Guarda como mucho `max_samples` duraciones; al calcular los percentiles
+    solo cuenta las de los últimos `window` segundos.
+    """
+
+    def __init__(self, window: float = HEALTH_LATENCY_WINDOW, max_samples: int = 4096):
+        self.window = window
+        self.samples = deque(maxlen=max_samples)     # (instante, segundos)
+
+    def record(self, seconds: float) -> None:
+        self.samples.append((time.monotonic(), seconds))
+
+    def summary(self) -> dict:
+        """Número de peticiones y p50/p99 en ms de la ventana reciente."""
+        since = time.monotonic() - self.window
+        durations = sorted(seconds for at, seconds in list(self.samples) if at >= since)
+        if not durations:
+            return {"requests": 0, "window_s": self.window, "p50_ms": None, "p99_ms": None}
+
+        def percentile(q: float) -> float:
+            return round(durations[min(len(durations) - 1, int(q * len(durations)))] * 1000, 2)
+
+        return {
+            "requests": len(durations),
+            "window_s": self.window,
+            "p50_ms": percentile(0.50),
+            "p99_ms": percentile(0.99)
+        }
+
+class LatencyMiddleware:
+    """
+    Middleware ASGI que mide la duración de cada petición HTTP.
+
+    Las peticiones a /health no se cuentan: el balanceador las hace sin
+    parar y son mucho más rápidas que las de la API.
+    """
+
+    def __init__(self, app, tracker: LatencyTracker):
+        self.app = app
+        self.tracker = tracker
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith("/health"):
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.tracker.record(time.perf_counter() - start)
+
+latency = LatencyTracker()
+
+# ============================================
+# PRUEBA DE LA BASE DE DATOS
+# ============================================
+
+def _probe_sync() -> None:
+    for db_engine in (database.engine, database.read_engine):
+        with db_engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+async def _probe_async() -> None:
+    for db_engine in (database.async_engine, database.async_read_engine):
+        async with db_engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+class DatabaseProbe:
+    """
+    Prueba de la base de datos con el resultado en caché durante `ttl` segundos.
+
+    Si llegan varias comprobaciones a la vez mientras la caché está
+    caducada, solo una lanza la consulta y el resto esperan su resultado.
+    """
+
+    def __init__(self, ttl: float = HEALTH_PROBE_TTL, timeout: float = HEALTH_PROBE_TIMEOUT):
+        self.ttl = ttl
+        self.timeout = timeout
+        self._result: Optional[dict] = None
+        self._expires = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def check(self) -> dict:
+        """Resultado de la última prueba, repitiéndola si ha caducado."""
+        if self._result is not None and time.monotonic() < self._expires:
+            return self._result
+
+        # El lock se crea dentro del event loop que lo va a usar
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._result is None or time.monotonic() >= self._expires:
+                self._result = await self._run()
+                self._expires = time.monotonic() + self.ttl
+        return self._result
+
+    async def _run(self) -> dict:
+        # En modo sync la prueba va al pool de hilos como los handlers: si
+        # todos los hilos están ocupados tarda, y eso también cuenta
+        probe = _probe_async() if database.DB_MODE == "async" else run_in_threadpool(_probe_sync)
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(probe, self.timeout)
+            error = None
+        except asyncio.TimeoutError:
+            error = f"Sin respuesta en {self.timeout} s"
+        except Exception as exc:
+            # Solo la primera línea: SQLAlchemy añade un enlace a su documentación
+            error = f"{type(exc).__name__}: {str(exc).splitlines()[0]}"
+
+        return {
+            "ok": error is None,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 2),
+            "error": error,
+            "checked_at": time.time()
+        }
+
+db_probe = DatabaseProbe()
+
+# ============================================
+# READINESS
+# ============================================
+
+async def readiness() -> dict:
+    """
+    Estado completo de la instancia y los motivos por los que no está lista.
+
+    Returns:
+        {"ready": bool, "reasons": [...], "db_probe": {...},
+         "pools": {...}, "latency": {...}}
+    """
+    probe = await db_probe.check()
+    pools = database.pool_stats()["pools"]
+    recent = latency.summary()
+
+    reasons = []
+    if not probe["ok"]:
+        reasons.append(f"Base de datos no disponible: {probe['error']}")
+    elif probe["latency_ms"] > HEALTH_MAX_PROBE_MS:
+        reasons.append(f"Base de datos lenta: {probe['latency_ms']} ms")
+
+    for name, pool in pools.items():
+        if pool["utilization"] > HEALTH_MAX_POOL_UTILIZATION:
+            reasons.append(f"Pool {name} saturado: {pool['checked_out']} conexiones en uso")
+
+    if recent["p99_ms"] is not None and recent["p99_ms"] > HEALTH_MAX_P99_MS:
+        reasons.append(f"p99 de las peticiones recientes: {recent['p99_ms']} ms")
+
+    return {
+        "ready": not reasons,
+        "reasons": reasons,
+        "db_probe": probe,
+        "pools": pools,
+        "latency": recent
+    }
@@ -0,0 +1,162 @@
+"""
+jobs.py
+
+Trabajos en segundo plano y su estado (GET /jobs/{job_id}).
+
+Ahora mismo el único trabajo es borrar un usuario con muchos items. Con
+SQLite solo puede haber una transacción de escritura a la vez: borrar
+cientos de miles de items en una sola transacción deja el resto de
+escrituras (altas, cambios...) esperando todo ese tiempo. El trabajo los
+borra en bloques de DELETE_JOB_BATCH_SIZE, con un commit por bloque, y el
+usuario al final.
+
+Los trabajos se ejecutan con las BackgroundTasks de FastAPI (después de
+enviar la respuesta) y su estado se guarda en memoria: solo lo conoce el
+proceso que lo lanzó y se pierde al reiniciarlo. Si se interrumpe un
+borrado, basta con volver a pedirlo.
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Literal, Optional
+
+from fastapi import APIRouter, HTTPException, status
+
+import crud
+import database
+from cache import user_deleted
+
+# ============================================
+# CONFIGURACIÓN
+# ============================================
+
+# DELETE /users/{id} con mode=auto usa un trabajo por encima de estos items
+DELETE_JOB_THRESHOLD = int(os.getenv("DELETE_JOB_THRESHOLD", "10000"))
+# Items que se borran en cada transacción del trabajo
+DELETE_JOB_BATCH_SIZE = int(os.getenv("DELETE_JOB_BATCH_SIZE", "2000"))
+# Pausa entre bloques (segundos) para que entren las escrituras que esperan
+DELETE_JOB_PAUSE = float(os.getenv("DELETE_JOB_PAUSE", "0.005"))
+# Trabajos que se recuerdan; se olvidan primero los más antiguos
+MAX_JOBS = int(os.getenv("MAX_JOBS", "1000"))
+
+DeleteMode = Literal["auto", "now", "job"]
+
+# ============================================
+# REGISTRO DE TRABAJOS
+# ============================================
+
+class Job:
+    """Estado de un trabajo: pending -> running -> done | failed."""
+
+    def __init__(self, kind: str, **params):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.status = "pending"
+        self.progress = {}
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    def as_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "params": self.params,
+            "progress": self.progress,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at
+        }
+
+_jobs: "OrderedDict[str, Job]" = OrderedDict()
+_jobs_lock = threading.Lock()
+
+def create_job(kind: str, **params) -> Job:
+    """Registra un trabajo nuevo (olvidando el más antiguo si hay MAX_JOBS)."""
+    job = Job(kind, **params)
+    with _jobs_lock:
+        _jobs[job.id] = job
+        while len(_jobs) > MAX_JOBS:
+            _jobs.popitem(last=False)
+    return job
+
+def get_job(job_id: str) -> Optional[Job]:
+    return _jobs.get(job_id)
+
+# ============================================
+# BORRADO DE USUARIOS POR BLOQUES
+# ============================================
+
+def delete_user_in_batches(
+    session_factory,
+    user_id: int,
+    batch_size: int = DELETE_JOB_BATCH_SIZE,
+    pause: float = DELETE_JOB_PAUSE,
+    job: Optional[Job] = None
+) -> bool:
+    """
+    Borra los items de un usuario por bloques y después el usuario.
+
+    Cada bloque es una transacción corta (crud.delete_user_items_batch), así
+    que el bloqueo de escritura de SQLite nunca se mantiene más de lo que
+    se tarda en borrar `batch_size` items.
+
+    Returns:
+        True si se eliminó el usuario, False si no existía
+    """
+    with session_factory() as db:
+        while True:
+            deleted = crud.delete_user_items_batch(db, user_id, batch_size)
+            if job is not None:
+                job.progress["items_deleted"] += deleted
+            if deleted < batch_size:
+                break
+            time.sleep(pause)
+        return crud.delete_user(db, user_id)
+
+def run_delete_user_job(job: Job, user_id: int, session_factory=None) -> None:
+    """Ejecuta el borrado de `job` y guarda el resultado en su estado."""
+    job.status = "running"
+    job.progress["items_deleted"] = 0
+    try:
+        delete_user_in_batches(session_factory or database.SessionLocal, user_id, job=job)
+        job.status = "done"
+    except Exception as exc:
+        job.status = "failed"
+        job.error = f"{type(exc).__name__}: {str(exc).splitlines()[0]}"
+    finally:
+        job.finished_at = time.time()
+        # Mientras se borraba se han podido guardar en caché datos a medias
+        user_deleted(user_id)
+
+def use_job(mode: DeleteMode, items: int) -> bool:
+    """Si un borrado de `items` items se hace con un trabajo según `mode`."""
+    return mode == "job" or (mode == "auto" and items > DELETE_JOB_THRESHOLD)
+
+# ============================================
+# ENDPOINTS DE TRABAJOS
+# ============================================
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+@router.get("/{job_id}", summary="Estado de un trabajo en segundo plano")
+def read_job(job_id: str):
+    """
+    Estado de un trabajo lanzado por otro endpoint (p. ej. DELETE
+    /users/{id} con muchos items): status, progreso y error si falló.
+
+    Raises:
+        HTTPException 404: Si el trabajo no existe (o ya se ha olvidado)
+    """
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Trabajo {job_id} no encontrado"
+        )
+    return job.as_dict()
@@ -8,24 +8,47 @@ Esta es la aplicación principal que integra todos los componentes:
 - models.py: Modelos SQLAlchemy
 - schemas.py: Schemas Pydantic
 - crud.py: Operaciones CRUD
+- crud_async.py / routes_async.py: Versión asíncrona de los endpoints
+- export.py: Exportación de items y usuarios en NDJSON/CSV
+- search.py: Búsqueda de texto de items (FTS5)
+- health.py: Comprobaciones de salud (/health, liveness, readiness)
+- cache.py: Caché de respuestas con ETag (GET de un usuario, un item y tags)
+- jobs.py: Trabajos en segundo plano (borrado de usuarios con muchos items)
 
 Para ejecutar:
     uvicorn main_completo:app --reload
 
+Con handlers asíncronos y AsyncSession (pip install "sqlalchemy[asyncio]" aiosqlite):
+    DB_MODE=async uvicorn main_completo:app --reload
+
+Con la configuración por defecto de SQLite en vez del perfil con WAL
+(ver database.py):
+    DB_PROFILE=default uvicorn main_completo:app --reload
+
 Para acceder a la documentación:
     http://127.0.0.1:8000/docs
 """
 
-from fastapi import FastAPI, Depends, HTTPException, status, Query
+from fastapi import APIRouter, BackgroundTasks, FastAPI, Body, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 import uvicorn
 
 # Importamos nuestros módulos
 import models
 import schemas
 import crud
-from database import engine, get_db
+import health
+import jobs
+from bulk import bulk_result, validate_rows
+from cache import item_changed, render, response_cache, user_deleted
+from export import router as export_router
+from jobs import router as jobs_router
+from crud import LoadStrategy
+from database import DB_MODE, engine, get_db, pool_stats
+from pagination import next_cursor, next_rank_cursor, parse_cursor, parse_rank_cursor
+from search import create_search_index, page_order
 
 # ============================================
 # CREACIÓN DE TABLAS
@@ -36,6 +59,12 @@ from database import engine, get_db
 # y crea las tablas correspondientes si no existen
 models.Base.metadata.create_all(bind=engine)
 
+with engine.begin() as connection:
+    # Columnas e índices nuevos en bases de datos ya existentes
+    models.upgrade_schema(connection)
+    # Índice de búsqueda de texto de los items (tabla FTS5 y triggers, ver search.py)
+    create_search_index(connection)
+
 # ============================================
 # INICIALIZACIÓN DE LA APLICACIÓN
 # ============================================
@@ -67,6 +96,9 @@ app = FastAPI(
     },
 )
 
+# Mide la duración de cada petición para el p99 de /health (ver health.py)
+app.add_middleware(health.LatencyMiddleware, tracker=health.latency)
+
 # ============================================
 # ENDPOINTS RAÍZ Y DE INFORMACIÓN
 # ============================================
@@ -85,28 +117,84 @@ def read_root():
         "recursos": {
             "usuarios": "/users/",
             "items": "/items/",
+            "busqueda": "/items/search?q=",
+            "exportacion": ["/export/users", "/export/items"],
+            "trabajos": "/jobs/{job_id}",
             "tags": "/tags/"
         }
     }
 
 @app.get("/health", tags=["Health"])
-def health_check():
+async def health_check():
     """
     Health check endpoint.
 
     Útil para verificar que la API está funcionando correctamente.
     Especialmente importante en entornos de producción para monitoring.
+
+    Incluye el resultado de una consulta de prueba a la base de datos (en
+    caché unos segundos), el uso de los pools de conexiones y el p50/p99 de
+    las peticiones recientes. `status` es "healthy" si la instancia está
+    lista para recibir tráfico y "degraded" si no (ver `reasons`).
     """
+    state = await health.readiness()
     return {
-        "status": "healthy",
-        "database": "connected"
+        "status": "healthy" if state["ready"] else "degraded",
+        "database": "connected" if state["db_probe"]["ok"] else "unavailable",
+        **state
     }
 
+@app.get("/health/live", tags=["Health"])
+async def liveness():
+    """
+    Liveness: el proceso está vivo y su event loop responde.
+
+    No consulta la base de datos: si esta falla, reiniciar la aplicación
+    no lo arregla.
+    """
+    return {"status": "alive"}
+
+@app.get("/health/ready", tags=["Health"])
+async def readiness():
+    """
+    Readiness: la instancia puede atender tráfico.
+
+    Responde 200 si la base de datos contesta a tiempo, los pools de
+    conexiones no están saturados y el p99 reciente está dentro del límite
+    (ver health.py). Si no, responde 503 con los motivos para que el
+    balanceador deje de enviarle peticiones.
+    """
+    state = await health.readiness()
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if state["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"status": "ready" if state["ready"] else "not_ready", "reasons": state["reasons"]}
+    )
+
+@app.get("/health/pools", tags=["Health"])
+def pool_status():
+    """
+    Uso de los pools de conexiones.
+
+    Las peticiones GET usan el pool de lectura y el resto el de escritura
+    (ver database.get_db). Si `utilization` pasa de 1 hay más peticiones en
+    curso que conexiones en el pool y se están abriendo conexiones extra.
+    """
+    return pool_stats()
+
+# ============================================
+# ROUTER DE RECURSOS
+# ============================================
+
+# Los endpoints de usuarios, items y tags se registran en un router en vez de
+# directamente en `app`: así al arrancar se elige entre esta versión síncrona
+# y la asíncrona de routes_async.py según DB_MODE (ver database.py)
+router = APIRouter()
+
 # ============================================
 # ENDPOINTS DE USUARIOS
 # ============================================
 
-@app.post(
+@router.post(
     "/users/",
     response_model=schemas.User,
     status_code=status.HTTP_201_CREATED,
@@ -139,35 +227,54 @@ def create_user(
     }
     ```
     """
-    # Verificamos si el email ya existe
-    db_user = crud.get_user_by_email(db, email=user.email)
-    if db_user:
+    # Un solo INSERT: si el email o el username ya existen lo detectan las
+    # restricciones UNIQUE de la tabla (sin consultarlos antes)
+    try:
+        return crud.create_user(db=db, user=user)
+    except crud.DuplicateUserError as error:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="El email ya está registrado"
+            detail={
+                "email": "El email ya está registrado",
+                "username": "El username ya está en uso"
+            }[error.field]
         )
 
-    # Verificamos si el username ya existe
-    db_user = crud.get_user_by_username(db, username=user.username)
-    if db_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="El username ya está en uso"
-        )
+@router.post(
+    "/users/bulk",
+    response_model=schemas.BulkCreateResult,
+    status_code=status.HTTP_201_CREATED,
+    tags=["Users"],
+    summary="Crear muchos usuarios"
+)
+def create_users_bulk(
+    users: List[Dict[str, Any]] = Body(..., description="Lista de usuarios con el formato de POST /users/"),
+    db: Session = Depends(get_db)
+):
+    """
+    Crea muchos usuarios en una sola transacción.
 
-    # Creamos el usuario
-    return crud.create_user(db=db, user=user)
+    Cada fila se valida por separado. Las filas inválidas o con email/username
+    ya registrado (o repetido en la propia lista) no se crean y se devuelven
+    en `errors` con su posición; el resto se crea igualmente.
+    """
+    valid, errors = validate_rows(users, schemas.UserCreate)
+    ids, db_errors = crud.create_users_bulk(db, [user for _, user in valid])
+    return bulk_result(valid, ids, errors, db_errors)
 
-@app.get(
+@router.get(
     "/users/",
     response_model=List[schemas.User],
     tags=["Users"],
     summary="Listar usuarios"
 )
 def read_users(
+    response: Response,
     skip: int = Query(0, ge=0, description="Número de usuarios a saltar"),
     limit: int = Query(100, ge=1, le=100, description="Límite de usuarios a retornar"),
     is_active: Optional[bool] = Query(None, description="Filtrar por usuarios activos/inactivos"),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (cabecera X-Next-Cursor)"),
+    load: LoadStrategy = Query("selectin", description="Cómo cargar items y tags de cada usuario"),
     db: Session = Depends(get_db)
 ):
     """
@@ -176,11 +283,28 @@ def read_users(
     - **skip**: Número de usuarios a saltar (para paginación)
     - **limit**: Número máximo de usuarios a retornar (máximo 100)
     - **is_active**: Filtrar solo usuarios activos (true) o inactivos (false)
+    - **cursor**: Paginación por cursor. Si la página está llena, la respuesta
+      incluye la cabecera `X-Next-Cursor` con el cursor de la siguiente;
+      para recorrer toda la tabla es más rápido que ir aumentando `skip`
+    - **load**: `selectin` (por defecto) o `joined` cargan items y tags en un
+      número fijo de consultas; `lazy` lanza una consulta por usuario e item
     """
-    users = crud.get_users(db, skip=skip, limit=limit, is_active=is_active)
+    users = crud.get_users(
+        db,
+        skip=skip,
+        limit=limit,
+        is_active=is_active,
+        after_id=parse_cursor(cursor),
+        load=load
+    )
+
+    # El cuerpo sigue siendo una lista; el cursor va en la cabecera
+    cursor_siguiente = next_cursor(users, limit)
+    if cursor_siguiente:
+        response.headers["X-Next-Cursor"] = cursor_siguiente
     return users
 
-@app.get(
+@router.get(
     "/users/{user_id}",
     response_model=schemas.User,
     tags=["Users"],
@@ -188,11 +312,16 @@ def read_users(
 )
 def read_user(
     user_id: int,
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """
     Obtiene un usuario específico por su ID.
 
+    La respuesta se guarda en caché (ver cache.py) con un ETag: con
+    `If-None-Match: <etag>` responde 304 si el usuario no ha cambiado, y
+    mientras está en caché no se consulta la base de datos.
+
     Args:
         user_id: ID del usuario
 
@@ -202,15 +331,19 @@ def read_user(
     Raises:
         HTTPException 404: Si el usuario no existe
     """
-    db_user = crud.get_user(db, user_id=user_id)
+    cached, version = response_cache.lookup("user", user_id)
+    if cached:
+        return cached.to_response(request)
+
+    db_user = crud.get_user(db, user_id=user_id, load="selectin")
     if db_user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Usuario con ID {user_id} no encontrado"
         )
-    return db_user
+    return response_cache.store("user", user_id, version, render(schemas.User, db_user)).to_response(request)
 
-@app.patch(
+@router.patch(
     "/users/{user_id}",
     response_model=schemas.User,
     tags=["Users"],
@@ -230,58 +363,75 @@ def update_user(
         HTTPException 404: Si el usuario no existe
         HTTPException 400: Si el email/username ya están en uso por otro usuario
     """
-    # Verificamos que el usuario existe
-    db_user = crud.get_user(db, user_id=user_id)
-    if not db_user:
+    # Un solo UPDATE ... RETURNING: si no devuelve nada el usuario no existe,
+    # y si el email o el username están repetidos falla su restricción UNIQUE
+    try:
+        updated_user = crud.update_user(db, user_id=user_id, user_update=user_update)
+    except crud.DuplicateUserError as error:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"El {error.field} ya está en uso por otro usuario"
+        )
+
+    if updated_user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Usuario con ID {user_id} no encontrado"
         )
-
-    # Si se actualiza el email, verificamos que no esté en uso
-    if user_update.email:
-        existing_user = crud.get_user_by_email(db, email=user_update.email)
-        if existing_user and existing_user.id != user_id:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="El email ya está en uso por otro usuario"
-            )
-
-    # Si se actualiza el username, verificamos que no esté en uso
-    if user_update.username:
-        existing_user = crud.get_user_by_username(db, username=user_update.username)
-        if existing_user and existing_user.id != user_id:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="El username ya está en uso por otro usuario"
-            )
-
-    # Actualizamos el usuario
-    updated_user = crud.update_user(db, user_id=user_id, user_update=user_update)
+    response_cache.invalidate("user", [user_id])
     return updated_user
 
-@app.delete(
+@router.delete(
     "/users/{user_id}",
     status_code=status.HTTP_204_NO_CONTENT,
     tags=["Users"],
-    summary="Eliminar un usuario"
+    summary="Eliminar un usuario",
+    responses={202: {"description": "Borrado lanzado en segundo plano (ver GET /jobs/{job_id})"}}
 )
 def delete_user(
     user_id: int,
+    background_tasks: BackgroundTasks,
+    mode: jobs.DeleteMode = Query(
+        "auto",
+        description="now: borrar ya; job: en segundo plano; auto: en segundo plano si tiene muchos items"
+    ),
     db: Session = Depends(get_db)
 ):
     """
     Elimina un usuario y todos sus items asociados.
 
+    Los items se borran con un DELETE en conjunto (ver crud.delete_user).
+    Si el usuario tiene más de DELETE_JOB_THRESHOLD items (o con mode=job)
+    el borrado se hace por bloques en segundo plano: responde 202 con el
+    trabajo y la cabecera Location para consultar su estado.
+
     Raises:
         HTTPException 404: Si el usuario no existe
     """
-    success = crud.delete_user(db, user_id=user_id)
-    if not success:
+    items = crud.count_user_items(db, user_id=user_id)
+    if items is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Usuario con ID {user_id} no encontrado"
         )
+
+    if jobs.use_job(mode, items):
+        job = jobs.create_job("delete_user", user_id=user_id, items=items)
+        background_tasks.add_task(jobs.run_delete_user_job, job, user_id)
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content=job.as_dict(),
+            headers={"Location": f"/jobs/{job.id}"}
+        )
+
+    # Otra petición (o un trabajo de borrado) puede haberlo borrado después
+    # de contar sus items
+    if not crud.delete_user(db, user_id=user_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Usuario con ID {user_id} no encontrado"
+        )
+    user_deleted(user_id)
     # Con status 204, no retornamos contenido
     return
 
@@ -289,7 +439,7 @@ def delete_user(
 # ENDPOINTS DE ITEMS
 # ============================================
 
-@app.post(
+@router.post(
     "/users/{user_id}/items/",
     response_model=schemas.Item,
     status_code=status.HTTP_201_CREATED,
@@ -331,19 +481,58 @@ def create_item_for_user(
         )
 
     # Creamos el item
-    return crud.create_item(db=db, item=item, owner_id=user_id)
+    db_item = crud.create_item(db=db, item=item, owner_id=user_id)
+    item_changed(db_item.id, user_id, tags=bool(item.tag_names))
+    return db_item
+
+@router.post(
+    "/users/{user_id}/items/bulk",
+    response_model=schemas.BulkCreateResult,
+    status_code=status.HTTP_201_CREATED,
+    tags=["Items"],
+    summary="Crear muchos items para un usuario"
+)
+def create_items_bulk_for_user(
+    user_id: int,
+    items: List[Dict[str, Any]] = Body(..., description="Lista de items con el formato de POST /users/{user_id}/items/"),
+    db: Session = Depends(get_db)
+):
+    """
+    Crea muchos items de un usuario en una sola transacción.
+
+    Todos los tags distintos del lote se buscan en una sola consulta y los
+    que no existen se crean con un único INSERT. Las filas inválidas se
+    devuelven en `errors` con su posición; el resto se crea igualmente.
+
+    Raises:
+        HTTPException 404: Si el usuario no existe
+    """
+    if not crud.get_user(db, user_id=user_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Usuario con ID {user_id} no encontrado"
+        )
 
-@app.get(
+    valid, errors = validate_rows(items, schemas.ItemCreate)
+    ids, db_errors = crud.create_items_bulk(db, [item for _, item in valid], owner_id=user_id)
+    response_cache.invalidate("user", [user_id])
+    response_cache.invalidate("tags")
+    return bulk_result(valid, ids, errors, db_errors)
+
+@router.get(
     "/items/",
     response_model=List[schemas.Item],
     tags=["Items"],
     summary="Listar items"
 )
 def read_items(
+    response: Response,
     skip: int = Query(0, ge=0, description="Número de items a saltar"),
     limit: int = Query(100, ge=1, le=100, description="Límite de items a retornar"),
     owner_id: Optional[int] = Query(None, description="Filtrar por propietario"),
     tag: Optional[str] = Query(None, description="Filtrar por tag"),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (cabecera X-Next-Cursor)"),
+    load: LoadStrategy = Query("selectin", description="Cómo cargar los tags de cada item"),
     db: Session = Depends(get_db)
 ):
     """
@@ -353,17 +542,76 @@ def read_items(
     - **limit**: Paginación - límite de items (máximo 100)
     - **owner_id**: Filtrar items de un usuario específico
     - **tag**: Filtrar items que tengan un tag específico
+    - **cursor**: Paginación por cursor (ver `GET /users/`); se combina con
+      los filtros `owner_id` y `tag`
+    - **load**: estrategia de carga de los tags (ver `GET /users/`)
     """
     items = crud.get_items(
         db,
         skip=skip,
         limit=limit,
         owner_id=owner_id,
-        tag_name=tag
+        tag_name=tag,
+        after_id=parse_cursor(cursor),
+        load=load
     )
+
+    cursor_siguiente = next_cursor(items, limit)
+    if cursor_siguiente:
+        response.headers["X-Next-Cursor"] = cursor_siguiente
     return items
 
-@app.get(
+@router.get(
+    "/items/search",
+    response_model=List[schemas.Item],
+    tags=["Items"],
+    summary="Buscar items por texto"
+)
+def search_items(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200, description="Palabras a buscar en nombre y descripción (admite prefijo*)"),
+    limit: int = Query(20, ge=1, le=100, description="Límite de items a retornar"),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (cabecera X-Next-Cursor)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Búsqueda de texto completo en el nombre y la descripción de los items.
+
+    Los resultados vienen ordenados por relevancia (una coincidencia en el
+    nombre pesa más que en la descripción). Se buscan items que contengan
+    todas las palabras, sin distinguir mayúsculas ni tildes, y `palabra*`
+    busca palabras que empiezan por `palabra`.
+
+    Ejemplos:
+    - /items/search?q=laptop
+    - /items/search?q=teclado mecan*
+
+    Si hay más resultados, la cabecera X-Next-Cursor trae el cursor de la
+    página siguiente.
+
+    Solo se ordenan por relevancia las search.MAX_RANKED_MATCHES
+    coincidencias más recientes; las anteriores vienen después, por id de
+    más reciente a más antiguo. La cabecera X-Search-Order indica el orden
+    de la página: "rank", "id" o "rank,id" si pasa de uno a otro.
+
+    Raises:
+        HTTPException 400: Si la búsqueda no tiene ninguna palabra o el cursor no es válido
+    """
+    try:
+        rows, floor = crud.search_items(db, q=q, limit=limit, after=parse_rank_cursor(cursor))
+    except ValueError as error:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(error)
+        )
+
+    response.headers["X-Search-Order"] = page_order(rows)
+    cursor_siguiente = next_rank_cursor(rows, limit, floor)
+    if cursor_siguiente:
+        response.headers["X-Next-Cursor"] = cursor_siguiente
+    return [item for item, _ in rows]
+
+@router.get(
     "/items/{item_id}",
     response_model=schemas.Item,
     tags=["Items"],
@@ -371,23 +619,30 @@ def read_items(
 )
 def read_item(
     item_id: int,
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """
     Obtiene un item específico por su ID.
 
+    Con caché y ETag como GET /users/{user_id}.
+
     Raises:
         HTTPException 404: Si el item no existe
     """
-    db_item = crud.get_item(db, item_id=item_id)
+    cached, version = response_cache.lookup("item", item_id)
+    if cached:
+        return cached.to_response(request)
+
+    db_item = crud.get_item(db, item_id=item_id, load="selectin")
     if db_item is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Item con ID {item_id} no encontrado"
         )
-    return db_item
+    return response_cache.store("item", item_id, version, render(schemas.Item, db_item)).to_response(request)
 
-@app.patch(
+@router.patch(
     "/items/{item_id}",
     response_model=schemas.Item,
     tags=["Items"],
@@ -412,9 +667,10 @@ def update_item(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Item con ID {item_id} no encontrado"
         )
+    item_changed(item_id, updated_item.owner_id, tags=item_update.tag_names is not None)
     return updated_item
 
-@app.delete(
+@router.delete(
     "/items/{item_id}",
     status_code=status.HTTP_204_NO_CONTENT,
     tags=["Items"],
@@ -430,25 +686,27 @@ def delete_item(
     Raises:
         HTTPException 404: Si el item no existe
     """
-    success = crud.delete_item(db, item_id=item_id)
-    if not success:
+    deleted_item = crud.delete_item(db, item_id=item_id)
+    if not deleted_item:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Item con ID {item_id} no encontrado"
         )
+    item_changed(item_id, deleted_item.owner_id)
     return
 
 # ============================================
 # ENDPOINTS DE TAGS
 # ============================================
 
-@app.get(
+@router.get(
     "/tags/",
     response_model=List[schemas.Tag],
     tags=["Tags"],
     summary="Listar tags"
 )
 def read_tags(
+    request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     db: Session = Depends(get_db)
@@ -457,9 +715,27 @@ def read_tags(
     Obtiene una lista de todos los tags disponibles.
 
     Los tags se crean automáticamente cuando se crean items con nuevos tags.
+    Con caché y ETag como GET /users/{user_id} (una entrada por página).
     """
+    page = f"{skip}:{limit}"
+    cached, version = response_cache.lookup("tags", page)
+    if cached:
+        return cached.to_response(request)
+
     tags = crud.get_tags(db, skip=skip, limit=limit)
-    return tags
+    return response_cache.store("tags", page, version, render(schemas.Tag, tags)).to_response(request)
+
+if DB_MODE == "async":
+    # Import aquí para que el modo sync no necesite aiosqlite
+    from routes_async import router as async_router
+    app.include_router(async_router)
+else:
+    app.include_router(router)
+
+# Exportaciones en streaming (ver export.py): leen con SQLAlchemy Core en un
+# hilo aparte en los dos modos
+app.include_router(export_router)
+app.include_router(jobs_router)
 
 # ============================================
 # PUNTO DE ENTRADA PARA EJECUCIÓN DIRECTA
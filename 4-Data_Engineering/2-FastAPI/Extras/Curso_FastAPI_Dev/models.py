@@ -0,0 +1,247 @@
+"""  
+models.py
+
+Modelos SQLAlchemy que representan las tablas de la base de datos.
+
+Estos modelos definen la estructura de las tablas y las relaciones entre ellas.
+"""
+
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Table, Index, inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from database import Base
+
+# ============================================
+# TABLA DE ASOCIACIÓN PARA RELACIÓN MANY-TO-MANY
+# ============================================
+
+# Tabla intermedia para la relación muchos-a-muchos entre Items y Tags
+# Esta tabla no es un modelo completo, solo una tabla de asociación
+item_tags = Table(
+    'item_tags',                           # Nombre de la tabla
+    Base.metadata,                         # Metadata de Base
+    Column('item_id', Integer, ForeignKey('items.id')),  # FK a items
+    Column('tag_id', Integer, ForeignKey('tags.id')),     # FK a tags
+    # Índice (tag_id, item_id): filtrar items por tag y recorrerlos en orden
+    # de id (paginación por cursor) sin leer toda la tabla
+    Index('ix_item_tags_tag_id_item_id', 'tag_id', 'item_id'),
+    # Índice (item_id, tag_id): los tags de un item (carga de Item.tags y
+    # exportación) sin leer toda la tabla
+    Index('ix_item_tags_item_id_tag_id', 'item_id', 'tag_id')
+)
+
+# ============================================
+# MODELO: USER
+# ============================================
+
+class User(Base):
+    """
+    Modelo de usuario en la base de datos.
+    
+    Attributes:
+        id: Clave primaria auto-incremental
+        email: Email único del usuario
+        username: Nombre de usuario único
+        hashed_password: Contraseña hasheada (nunca almacenar en texto plano)
+        is_active: Si el usuario está activo
+        created_at: Timestamp de creación
+        updated_at: Timestamp de la última modificación
+        items: Relación con los items del usuario (one-to-many)
+    """
+    # Nombre de la tabla en la base de datos
+    __tablename__ = "users"
+    
+    # Columnas de la tabla
+    id = Column(
+        Integer,              # Tipo de dato: entero
+        primary_key=True,     # Esta columna es la clave primaria
+        index=True            # Crear índice para búsquedas rápidas
+    )
+    
+    email = Column(
+        String,               # Tipo de dato: string
+        unique=True,          # Valor único (no puede haber dos usuarios con mismo email)
+        index=True,           # Índice para búsquedas rápidas por email
+        nullable=False        # No puede ser NULL (obligatorio)
+    )
+    
+    username = Column(
+        String,
+        unique=True,
+        index=True,
+        nullable=False
+    )
+    
+    hashed_password = Column(
+        String,
+        nullable=False
+    )
+    
+    is_active = Column(
+        Boolean,              # Tipo de dato: booleano (True/False)
+        default=True,         # Valor por defecto: True
+        index=True            # En SQLite el índice incluye el id: sirve para is_active + cursor
+    )
+    
+    created_at = Column(
+        DateTime(timezone=True),           # DateTime con zona horaria
+        server_default=func.now()          # Valor por defecto: timestamp actual del servidor
+    )
+    
+    # default (y no server_default) para que SQLAlchemy lo incluya en cada
+    # INSERT: así funciona también en las tablas a las que upgrade_schema
+    # ha añadido la columna, que no tienen valor por defecto en SQLite
+    updated_at = Column(
+        DateTime(timezone=True),
+        default=func.now(),
+        onupdate=func.now(),               # SQLAlchemy lo actualiza en cada UPDATE
+        index=True                         # Exportación incremental (updated_since)
+    )
+    
+    # Relación one-to-many con Item
+    # Un usuario puede tener múltiples items
+    items = relationship(
+        "Item",                            # Modelo relacionado
+        back_populates="owner",            # Campo correspondiente en Item
+        cascade="all, delete-orphan"       # Si se elimina el usuario, eliminar sus items
+    )
+
+# ============================================
+# MODELO: ITEM
+# ============================================
+
+class Item(Base):
+    """
+    Modelo de item en la base de datos.
+    
+    Attributes:
+        id: Clave primaria auto-incremental
+        name: Nombre del item
+        description: Descripción del item
+        price: Precio del item
+        tax: Impuesto aplicable
+        owner_id: ID del usuario propietario (foreign key)
+        created_at: Timestamp de creación
+        updated_at: Timestamp de la última modificación
+        owner: Relación con el usuario propietario
+        tags: Relación con los tags del item (many-to-many)
+    """
+    __tablename__ = "items"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    
+    name = Column(
+        String(100),          # String con longitud máxima de 100
+        nullable=False,
+        index=True
+    )
+    
+    description = Column(
+        String(500),
+        nullable=True         # Este campo es opcional (puede ser NULL)
+    )
+    
+    price = Column(
+        Float,                # Tipo de dato: número decimal
+        nullable=False
+    )
+    
+    tax = Column(
+        Float,
+        nullable=True
+    )
+    
+    # Foreign Key: referencia a la tabla users
+    owner_id = Column(
+        Integer,
+        ForeignKey("users.id"),            # Clave foránea que apunta a users.id
+        nullable=False,
+        index=True                         # Items de un usuario ordenados por id (cursor)
+    )
+    
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now()
+    )
+    
+    updated_at = Column(
+        DateTime(timezone=True),
+        default=func.now(),
+        onupdate=func.now(),
+        index=True
+    )
+    
+    # Relación many-to-one con User
+    # Múltiples items pueden pertenecer al mismo usuario
+    owner = relationship(
+        "User",
+        back_populates="items"             # Campo correspondiente en User
+    )
+    
+    # Relación many-to-many con Tag
+    # Un item puede tener múltiples tags, y un tag puede estar en múltiples items
+    tags = relationship(
+        "Tag",
+        secondary=item_tags,               # Tabla intermedia
+        back_populates="items"
+    )
+
+# ============================================
+# MODELO: TAG
+# ============================================
+
+class Tag(Base):
+    """
+    Modelo de tag/etiqueta en la base de datos.
+    
+    Los tags permiten categorizar items.
+    
+    Attributes:
+        id: Clave primaria auto-incremental
+        name: Nombre del tag (único)
+        items: Relación con los items que tienen este tag (many-to-many)
+    """
+    __tablename__ = "tags"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    
+    name = Column(
+        String(50),
+        unique=True,                       # Cada tag debe ser único
+        nullable=False,
+        index=True
+    )
+    
+    # Relación many-to-many con Item
+    items = relationship(
+        "Item",
+        secondary=item_tags,               # Tabla intermedia
+        back_populates="tags"
+    )
+
+# ============================================
+# ACTUALIZACIÓN DE BASES DE DATOS EXISTENTES
+# ============================================
+
+def upgrade_schema(connection: Connection) -> None:
+    """
+    Añade a una base de datos creada con una versión anterior de estos
+    modelos las columnas e índices nuevos.
+
+    Base.metadata.create_all() solo crea las tablas que no existen: no
+    añade columnas ni índices a las que ya estaban. En un proyecto real
+    esto se haría con migraciones de Alembic.
+    """
+    inspector = inspect(connection)
+    for table_name in ("users", "items"):
+        columns = {column["name"] for column in inspector.get_columns(table_name)}
+        if "updated_at" not in columns:
+            # SQLite no permite añadir una columna con DEFAULT CURRENT_TIMESTAMP:
+            # se añade sin valor por defecto y se rellena con created_at
+            connection.execute(text(f"ALTER TABLE {table_name} ADD COLUMN updated_at DATETIME"))
+            connection.execute(text(f"UPDATE {table_name} SET updated_at = created_at"))
+
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
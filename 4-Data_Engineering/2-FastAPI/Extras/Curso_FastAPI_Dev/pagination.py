@@ -0,0 +1,136 @@
+"""
+pagination.py
+
+Paginación por cursor (keyset pagination).
+
+Con `skip`/`limit` la base de datos tiene que recorrer y descartar las
+`skip` primeras filas en cada página, así que cuanto más profunda es la
+página más tarda. Con un cursor se guarda el `id` de la última fila
+devuelta y la siguiente página empieza con `WHERE id > :ultimo_id`, que
+usa el índice de la clave primaria y cuesta lo mismo en cualquier página.
+
+El cursor es opaco para el cliente: un JSON codificado en base64 que solo
+debe devolver tal cual en el parámetro `cursor`.
+
+En los resultados de búsqueda, ordenados por relevancia, el cursor guarda
+además la puntuación de la última fila: la siguiente página empieza con
+`WHERE (puntuacion, id) > (:ultima_puntuacion, :ultimo_id)`. También guarda
+el suelo de las coincidencias puntuadas (ver search.py), así las páginas
+siguientes no lo recalculan y lo que se inserte entre página y página no
+lo mueve. Cuando las puntuadas se acaban, la puntuación es null y se sigue
+por id: `WHERE id < :ultimo_id`.
+"""
+
+import base64
+import binascii
+import json
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+
+
+def _encode(payload: dict) -> str:
+    data = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def _decode(cursor: str) -> dict:
+    try:
+        # Recuperamos el relleno "=" que quitamos al codificar
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError, TypeError):
+        raise ValueError("Cursor inválido")
+
+    if not isinstance(payload, dict) or not isinstance(payload.get("id"), int):
+        raise ValueError("Cursor inválido")
+    return payload
+
+
+def encode_cursor(last_id: int) -> str:
+    """Codifica el id de la última fila de la página como cursor opaco."""
+    return _encode({"id": last_id})
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Decodifica un cursor generado por `encode_cursor`.
+
+    Raises:
+        ValueError: si el cursor no es válido
+    """
+    return _decode(cursor)["id"]
+
+
+def encode_rank_cursor(last_rank: Optional[float], last_id: int, floor: int) -> str:
+    """
+    Codifica la puntuación (None si ya se pagina por id) y el id de la
+    última fila de una búsqueda, y el suelo de las coincidencias puntuadas.
+    """
+    # json guarda el float con todos sus decimales: la comparación de la
+    # página siguiente usa exactamente el mismo valor
+    return _encode({"rank": last_rank, "id": last_id, "floor": floor})
+
+
+def decode_rank_cursor(cursor: str) -> Tuple[Optional[float], int, int]:
+    """
+    Decodifica un cursor generado por `encode_rank_cursor`.
+
+    Raises:
+        ValueError: si el cursor no es válido
+    """
+    payload = _decode(cursor)
+    rank = payload.get("rank")
+    floor = payload.get("floor")
+    if rank is not None and (not isinstance(rank, (int, float)) or isinstance(rank, bool)):
+        raise ValueError("Cursor inválido")
+    if not isinstance(floor, int) or isinstance(floor, bool):
+        raise ValueError("Cursor inválido")
+    return (float(rank) if rank is not None else None), payload["id"], floor
+
+
+def parse_cursor(cursor: Optional[str]) -> Optional[int]:
+    """Convierte el parámetro `cursor` en un id, o responde 400 si no es válido."""
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor inválido"
+        )
+
+
+def parse_rank_cursor(cursor: Optional[str]) -> Optional[Tuple[Optional[float], int, int]]:
+    """Como `parse_cursor`, para los cursores de búsqueda (puntuación, id)."""
+    if cursor is None:
+        return None
+    try:
+        return decode_rank_cursor(cursor)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor inválido"
+        )
+
+
+def next_cursor(rows: list, limit: int) -> Optional[str]:
+    """
+    Cursor de la página siguiente, o None si esta es la última.
+
+    Si la página no está llena no puede haber más filas.
+    """
+    if len(rows) < limit:
+        return None
+    return encode_cursor(rows[-1].id)
+
+
+def next_rank_cursor(rows: list, limit: int, floor: int) -> Optional[str]:
+    """
+    Como `next_cursor`, para filas (objeto, puntuación) de una búsqueda;
+    `floor` es el suelo de las coincidencias puntuadas.
+    """
+    if len(rows) < limit:
+        return None
+    last, rank = rows[-1]
+    return encode_rank_cursor(rank, last.id, floor)
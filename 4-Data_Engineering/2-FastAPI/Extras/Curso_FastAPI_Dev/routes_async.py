@@ -0,0 +1,383 @@
+"""
+routes_async.py
+
+Versión asíncrona de los endpoints de usuarios, items y tags de
+main_completo.py. Se usa al arrancar con DB_MODE=async:
+
+    DB_MODE=async uvicorn main_completo:app
+
+Las rutas, parámetros y respuestas son los mismos que en la versión
+síncrona (ver la documentación de cada endpoint en main_completo.py). La
+diferencia es que los handlers son `async def` y usan una AsyncSession, así
+que una petición esperando a la base de datos no ocupa un hilo del pool.
+"""
+
+from fastapi import APIRouter, BackgroundTasks, Body, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List, Optional
+
+import crud
+import crud_async
+import jobs
+import schemas
+from bulk import bulk_result, validate_rows
+from cache import item_changed, render, response_cache, user_deleted
+from crud import LoadStrategy
+from database import get_async_db
+from pagination import next_cursor, next_rank_cursor, parse_cursor, parse_rank_cursor
+from search import page_order
+
+router = APIRouter()
+
+def user_not_found(user_id: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Usuario con ID {user_id} no encontrado"
+    )
+
+def item_not_found(item_id: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Item con ID {item_id} no encontrado"
+    )
+
+# ============================================
+# ENDPOINTS DE USUARIOS
+# ============================================
+
+@router.post(
+    "/users/",
+    response_model=schemas.User,
+    status_code=status.HTTP_201_CREATED,
+    tags=["Users"],
+    summary="Crear un nuevo usuario"
+)
+async def create_user(
+    user: schemas.UserCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Crea un nuevo usuario en la base de datos."""
+    try:
+        return await crud_async.create_user(db=db, user=user)
+    except crud.DuplicateUserError as error:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "email": "El email ya está registrado",
+                "username": "El username ya está en uso"
+            }[error.field]
+        )
+
+@router.post(
+    "/users/bulk",
+    response_model=schemas.BulkCreateResult,
+    status_code=status.HTTP_201_CREATED,
+    tags=["Users"],
+    summary="Crear muchos usuarios"
+)
+async def create_users_bulk(
+    users: List[Dict[str, Any]] = Body(..., description="Lista de usuarios con el formato de POST /users/"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Crea muchos usuarios en una sola transacción (ver main_completo.py)."""
+    valid, errors = validate_rows(users, schemas.UserCreate)
+    ids, db_errors = await crud_async.create_users_bulk(db, [user for _, user in valid])
+    return bulk_result(valid, ids, errors, db_errors)
+
+@router.get(
+    "/users/",
+    response_model=List[schemas.User],
+    tags=["Users"],
+    summary="Listar usuarios"
+)
+async def read_users(
+    response: Response,
+    skip: int = Query(0, ge=0, description="Número de usuarios a saltar"),
+    limit: int = Query(100, ge=1, le=100, description="Límite de usuarios a retornar"),
+    is_active: Optional[bool] = Query(None, description="Filtrar por usuarios activos/inactivos"),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (cabecera X-Next-Cursor)"),
+    load: LoadStrategy = Query("selectin", description="Cómo cargar items y tags (lazy = selectin en async)"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Obtiene una lista de usuarios con paginación y filtrado opcional."""
+    users = await crud_async.get_users(
+        db,
+        skip=skip,
+        limit=limit,
+        is_active=is_active,
+        after_id=parse_cursor(cursor),
+        load=load
+    )
+
+    cursor_siguiente = next_cursor(users, limit)
+    if cursor_siguiente:
+        response.headers["X-Next-Cursor"] = cursor_siguiente
+    return users
+
+@router.get(
+    "/users/{user_id}",
+    response_model=schemas.User,
+    tags=["Users"],
+    summary="Obtener un usuario por ID"
+)
+async def read_user(
+    user_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Obtiene un usuario específico por su ID (con caché y ETag)."""
+    cached, version = response_cache.lookup("user", user_id)
+    if cached:
+        return cached.to_response(request)
+
+    db_user = await crud_async.get_user(db, user_id=user_id)
+    if db_user is None:
+        raise user_not_found(user_id)
+    return response_cache.store("user", user_id, version, render(schemas.User, db_user)).to_response(request)
+
+@router.patch(
+    "/users/{user_id}",
+    response_model=schemas.User,
+    tags=["Users"],
+    summary="Actualizar un usuario"
+)
+async def update_user(
+    user_id: int,
+    user_update: schemas.UserUpdate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Actualiza parcialmente un usuario."""
+    try:
+        updated_user = await crud_async.update_user(db, user_id=user_id, user_update=user_update)
+    except crud.DuplicateUserError as error:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"El {error.field} ya está en uso por otro usuario"
+        )
+
+    if updated_user is None:
+        raise user_not_found(user_id)
+    response_cache.invalidate("user", [user_id])
+    return updated_user
+
+@router.delete(
+    "/users/{user_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    tags=["Users"],
+    summary="Eliminar un usuario",
+    responses={202: {"description": "Borrado lanzado en segundo plano (ver GET /jobs/{job_id})"}}
+)
+async def delete_user(
+    user_id: int,
+    background_tasks: BackgroundTasks,
+    mode: jobs.DeleteMode = Query("auto"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Elimina un usuario y todos sus items asociados."""
+    items = await crud_async.count_user_items(db, user_id=user_id)
+    if items is None:
+        raise user_not_found(user_id)
+
+    if jobs.use_job(mode, items):
+        # El trabajo es síncrono: FastAPI lo ejecuta en su pool de hilos
+        job = jobs.create_job("delete_user", user_id=user_id, items=items)
+        background_tasks.add_task(jobs.run_delete_user_job, job, user_id)
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content=job.as_dict(),
+            headers={"Location": f"/jobs/{job.id}"}
+        )
+
+    # Puede haberlo borrado otra petición después de contar sus items
+    if not await crud_async.delete_user(db, user_id=user_id):
+        raise user_not_found(user_id)
+    user_deleted(user_id)
+    return
+
+# ============================================
+# ENDPOINTS DE ITEMS
+# ============================================
+
+@router.post(
+    "/users/{user_id}/items/",
+    response_model=schemas.Item,
+    status_code=status.HTTP_201_CREATED,
+    tags=["Items"],
+    summary="Crear un item para un usuario"
+)
+async def create_item_for_user(
+    user_id: int,
+    item: schemas.ItemCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Crea un nuevo item asociado a un usuario."""
+    if not await crud_async.get_user(db, user_id=user_id):
+        raise user_not_found(user_id)
+
+    db_item = await crud_async.create_item(db=db, item=item, owner_id=user_id)
+    item_changed(db_item.id, user_id, tags=bool(item.tag_names))
+    return db_item
+
+@router.post(
+    "/users/{user_id}/items/bulk",
+    response_model=schemas.BulkCreateResult,
+    status_code=status.HTTP_201_CREATED,
+    tags=["Items"],
+    summary="Crear muchos items para un usuario"
+)
+async def create_items_bulk_for_user(
+    user_id: int,
+    items: List[Dict[str, Any]] = Body(..., description="Lista de items con el formato de POST /users/{user_id}/items/"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Crea muchos items de un usuario en una sola transacción (ver main_completo.py)."""
+    if not await crud_async.get_user(db, user_id=user_id):
+        raise user_not_found(user_id)
+
+    valid, errors = validate_rows(items, schemas.ItemCreate)
+    ids, db_errors = await crud_async.create_items_bulk(db, [item for _, item in valid], owner_id=user_id)
+    response_cache.invalidate("user", [user_id])
+    response_cache.invalidate("tags")
+    return bulk_result(valid, ids, errors, db_errors)
+
+@router.get(
+    "/items/",
+    response_model=List[schemas.Item],
+    tags=["Items"],
+    summary="Listar items"
+)
+async def read_items(
+    response: Response,
+    skip: int = Query(0, ge=0, description="Número de items a saltar"),
+    limit: int = Query(100, ge=1, le=100, description="Límite de items a retornar"),
+    owner_id: Optional[int] = Query(None, description="Filtrar por propietario"),
+    tag: Optional[str] = Query(None, description="Filtrar por tag"),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (cabecera X-Next-Cursor)"),
+    load: LoadStrategy = Query("selectin", description="Cómo cargar los tags (lazy = selectin en async)"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Obtiene una lista de items con paginación y filtros opcionales."""
+    items = await crud_async.get_items(
+        db,
+        skip=skip,
+        limit=limit,
+        owner_id=owner_id,
+        tag_name=tag,
+        after_id=parse_cursor(cursor),
+        load=load
+    )
+
+    cursor_siguiente = next_cursor(items, limit)
+    if cursor_siguiente:
+        response.headers["X-Next-Cursor"] = cursor_siguiente
+    return items
+
+@router.get(
+    "/items/search",
+    response_model=List[schemas.Item],
+    tags=["Items"],
+    summary="Buscar items por texto"
+)
+async def search_items(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200, description="Palabras a buscar en nombre y descripción (admite prefijo*)"),
+    limit: int = Query(20, ge=1, le=100, description="Límite de items a retornar"),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (cabecera X-Next-Cursor)"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Búsqueda de texto completo en los items (ver main_completo.py)."""
+    try:
+        rows, floor = await crud_async.search_items(db, q=q, limit=limit, after=parse_rank_cursor(cursor))
+    except ValueError as error:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(error)
+        )
+
+    response.headers["X-Search-Order"] = page_order(rows)
+    cursor_siguiente = next_rank_cursor(rows, limit, floor)
+    if cursor_siguiente:
+        response.headers["X-Next-Cursor"] = cursor_siguiente
+    return [item for item, _ in rows]
+
+@router.get(
+    "/items/{item_id}",
+    response_model=schemas.Item,
+    tags=["Items"],
+    summary="Obtener un item por ID"
+)
+async def read_item(
+    item_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Obtiene un item específico por su ID."""
+    cached, version = response_cache.lookup("item", item_id)
+    if cached:
+        return cached.to_response(request)
+
+    db_item = await crud_async.get_item(db, item_id=item_id)
+    if db_item is None:
+        raise item_not_found(item_id)
+    return response_cache.store("item", item_id, version, render(schemas.Item, db_item)).to_response(request)
+
+@router.patch(
+    "/items/{item_id}",
+    response_model=schemas.Item,
+    tags=["Items"],
+    summary="Actualizar un item"
+)
+async def update_item(
+    item_id: int,
+    item_update: schemas.ItemUpdate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Actualiza parcialmente un item."""
+    updated_item = await crud_async.update_item(db, item_id=item_id, item_update=item_update)
+    if not updated_item:
+        raise item_not_found(item_id)
+    item_changed(item_id, updated_item.owner_id, tags=item_update.tag_names is not None)
+    return updated_item
+
+@router.delete(
+    "/items/{item_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    tags=["Items"],
+    summary="Eliminar un item"
+)
+async def delete_item(
+    item_id: int,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Elimina un item."""
+    deleted_item = await crud_async.delete_item(db, item_id=item_id)
+    if not deleted_item:
+        raise item_not_found(item_id)
+    item_changed(item_id, deleted_item.owner_id)
+    return
+
+# ============================================
+# ENDPOINTS DE TAGS
+# ============================================
+
+@router.get(
+    "/tags/",
+    response_model=List[schemas.Tag],
+    tags=["Tags"],
+    summary="Listar tags"
+)
+async def read_tags(
+    request: Request,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Obtiene una lista de todos los tags disponibles."""
+    page = f"{skip}:{limit}"
+    cached, version = response_cache.lookup("tags", page)
+    if cached:
+        return cached.to_response(request)
+
+    tags = await crud_async.get_tags(db, skip=skip, limit=limit)
+    return response_cache.store("tags", page, version, render(schemas.Tag, tags)).to_response(request)
@@ -0,0 +1,210 @@
+"""  
+schemas.py
+
+Schemas Pydantic para validación y serialización de datos.
+
+Estos schemas definen cómo se validan los datos de entrada y
+cómo se serializan los datos de salida en la API.
+"""
+
+from pydantic import BaseModel, Field, EmailStr, validator
+from typing import Optional, List
+from datetime import datetime
+
+# ============================================
+# SCHEMAS PARA TAG
+# ============================================
+
+class TagBase(BaseModel):
+    """Schema base para Tag."""
+    name: str = Field(
+        ...,
+        min_length=1,
+        max_length=50,
+        description="Nombre del tag"
+    )
+
+class TagCreate(TagBase):
+    """Schema para crear un Tag."""
+    pass
+
+class Tag(TagBase):
+    """
+    Schema para respuesta de Tag.
+    Incluye el ID generado por la base de datos.
+    """
+    id: int
+    
+    class Config:
+        # orm_mode permite que Pydantic trabaje con objetos SQLAlchemy
+        # Esto permite crear schemas Pydantic directamente desde modelos SQLAlchemy
+        orm_mode = True
+
+# ============================================
+# SCHEMAS PARA ITEM
+# ============================================
+
+def tag_name_length(cls, v):
+    """Valida cada nombre de tag con los mismos límites que TagBase.name."""
+    if not 1 <= len(v) <= 50:
+        raise ValueError('El nombre de tag debe tener entre 1 y 50 caracteres')
+    return v
+
+class ItemBase(BaseModel):
+    """Schema base para Item con campos comunes."""
+    name: str = Field(
+        ...,
+        min_length=1,
+        max_length=100,
+        description="Nombre del item"
+    )
+    description: Optional[str] = Field(
+        None,
+        max_length=500,
+        description="Descripción del item"
+    )
+    price: float = Field(
+        ...,
+        gt=0,
+        description="Precio del item (debe ser mayor que 0)"
+    )
+    tax: Optional[float] = Field(
+        None,
+        ge=0,
+        le=100,
+        description="Porcentaje de impuesto (0-100)"
+    )
+
+class ItemCreate(ItemBase):
+    """
+    Schema para crear un Item.
+    Incluye una lista de nombres de tags.
+    """
+    tag_names: List[str] = Field(
+        default=[],
+        description="Lista de nombres de tags para el item"
+    )
+
+    _tag_names = validator('tag_names', each_item=True, allow_reuse=True)(tag_name_length)
+
+class ItemUpdate(BaseModel):
+    """
+    Schema para actualizar un Item.
+    Todos los campos son opcionales (para PATCH).
+    """
+    name: Optional[str] = Field(None, min_length=1, max_length=100)
+    description: Optional[str] = Field(None, max_length=500)
+    price: Optional[float] = Field(None, gt=0)
+    tax: Optional[float] = Field(None, ge=0, le=100)
+    tag_names: Optional[List[str]] = None
+
+    _tag_names = validator('tag_names', each_item=True, allow_reuse=True)(tag_name_length)
+
+class Item(ItemBase):
+    """
+    Schema para respuesta de Item.
+    Incluye campos generados por la BD y relaciones.
+    """
+    id: int
+    owner_id: int
+    created_at: datetime
+    tags: List[Tag] = []                   # Lista de tags asociados
+    
+    class Config:
+        orm_mode = True
+
+# ============================================
+# SCHEMAS PARA USER
+# ============================================
+
+class UserBase(BaseModel):
+    """Schema base para User."""
+    email: EmailStr = Field(              # EmailStr valida formato de email automáticamente
+        ...,
+        description="Email del usuario"
+    )
+    username: str = Field(
+        ...,
+        min_length=3,
+        max_length=50,
+        description="Nombre de usuario"
+    )
+    
+    @validator('username')
+    def username_alphanumeric(cls, v):
+        """Valida que el username sea alfanumérico (permite guiones bajos)."""
+        if not v.replace('_', '').isalnum():
+            raise ValueError('El username solo puede contener letras, números y guiones bajos')
+        return v
+
+class UserCreate(UserBase):
+    """
+    Schema para crear un User.
+    Incluye la contraseña (que será hasheada antes de guardar).
+    """
+    password: str = Field(
+        ...,
+        min_length=8,
+        description="Contraseña (mínimo 8 caracteres)"
+    )
+    
+    @validator('password')
+    def password_strength(cls, v):
+        """Valida que la contraseña tenga al menos una mayúscula y un número."""
+        if not any(char.isupper() for char in v):
+            raise ValueError('La contraseña debe contener al menos una mayúscula')
+        if not any(char.isdigit() for char in v):
+            raise ValueError('La contraseña debe contener al menos un número')
+        return v
+
+class UserUpdate(BaseModel):
+    """Schema para actualizar un User."""
+    email: Optional[EmailStr] = None
+    username: Optional[str] = Field(None, min_length=3, max_length=50)
+    password: Optional[str] = Field(None, min_length=8)
+    is_active: Optional[bool] = None
+
+class User(UserBase):
+    """
+    Schema para respuesta de User.
+    NO incluye la contraseña (por seguridad).
+    """
+    id: int
+    is_active: bool
+    created_at: datetime
+    items: List[Item] = []                 # Lista de items del usuario
+    
+    class Config:
+        orm_mode = True
+
+# ============================================
+# SCHEMAS PARA RESPUESTAS PAGINADAS
+# ============================================
+
+class PaginatedResponse(BaseModel):
+    """
+    Schema genérico para respuestas paginadas.
+    """
+    total: int = Field(..., description="Total de items disponibles")
+    skip: int = Field(..., description="Número de items saltados")
+    limit: int = Field(..., description="Límite de items por página")
+    items: List = Field(..., description="Lista de items")
+
+# ============================================
+# SCHEMAS PARA CREACIÓN MASIVA
+# ============================================
+
+class BulkError(BaseModel):
+    """Error de una fila concreta en una creación masiva."""
+    index: int = Field(..., description="Posición de la fila en la lista enviada")
+    detail: str = Field(..., description="Motivo por el que no se creó")
+
+class BulkCreateResult(BaseModel):
+    """
+    Resultado de una creación masiva.
+    Las filas válidas se crean en una sola transacción; las que tienen
+    errores se omiten y se indican en `errors`.
+    """
+    created: int = Field(..., description="Número de filas creadas")
+    ids: List[int] = Field(..., description="IDs creados, en el orden de las filas válidas")
+    errors: List[BulkError] = Field(default=[], description="Filas no creadas")
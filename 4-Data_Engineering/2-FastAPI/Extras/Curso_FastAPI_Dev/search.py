@@ -0,0 +1,233 @@
+"""
+search.py
+
+Búsqueda de texto completo sobre el nombre y la descripción de los items
+con FTS5, el motor de búsqueda de texto de SQLite.
+
+`items_fts` es una tabla FTS5 "external content": guarda solo el índice
+invertido (palabra -> items que la contienen) y lee el texto de la tabla
+items. Unos triggers la mantienen sincronizada al crear, modificar o borrar
+items, también con los inserts masivos que no pasan por el ORM.
+
+Buscar una palabra en el índice cuesta lo mismo con mil items que con un
+millón, mientras que `WHERE name LIKE '%palabra%'` tiene que leer la tabla
+entera.
+
+Sintaxis de la búsqueda (parámetro `q`):
+- Palabras separadas por espacios: el item tiene que contenerlas todas
+- `palabra*`: palabras que empiezan por `palabra` (búsqueda por prefijo)
+- Sin distinguir mayúsculas ni tildes: "cafe" encuentra "Café"
+
+Orden de los resultados: por relevancia las MAX_RANKED_MATCHES
+coincidencias más recientes y, después de ellas, el resto por id (de más
+reciente a más antigua). Ninguna coincidencia se queda fuera: solo cambia
+el orden a partir de ese punto, y la respuesta lo indica (`page_order`).
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, case, column, func, literal_column, or_, select, table, text
+from sqlalchemy.engine import Connection
+
+import models
+
+# ============================================
+# ÍNDICE FTS5
+# ============================================
+
+SEARCH_DDL = [
+    # unicode61 remove_diacritics 2: ignora mayúsculas y tildes
+    # prefix='2 3': índices extra para que los prefijos de 2 y 3 letras
+    # no tengan que recorrer todas las palabras del índice
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+        name,
+        description,
+        content='items',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS items_fts_insert AFTER INSERT ON items BEGIN
+        INSERT INTO items_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    # En una tabla external content, para borrar una fila del índice hay
+    # que pasarle los valores que tenía (comando 'delete')
+    """
+    CREATE TRIGGER IF NOT EXISTS items_fts_delete AFTER DELETE ON items BEGIN
+        INSERT INTO items_fts(items_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS items_fts_update AFTER UPDATE OF name, description ON items BEGIN
+        INSERT INTO items_fts(items_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO items_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+]
+
+def create_search_index(connection: Connection) -> None:
+    """
+    Crea la tabla items_fts y sus triggers si no existen.
+
+    Si la tabla es nueva y ya había items (una base de datos anterior a la
+    búsqueda), los indexa todos con el comando 'rebuild'.
+    """
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'items_fts'")
+    ).first()
+
+    for ddl in SEARCH_DDL:
+        connection.execute(text(ddl))
+
+    if not exists:
+        connection.execute(text("INSERT INTO items_fts(items_fts) VALUES ('rebuild')"))
+
+# ============================================
+# CONSULTA DE BÚSQUEDA
+# ============================================
+
+# Palabras de la búsqueda, con un * opcional al final para los prefijos
+_TERM = re.compile(r"(\w+)(\*?)")
+
+# Peso de cada columna en la puntuación: una coincidencia en el nombre
+# cuenta diez veces más que en la descripción
+NAME_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+# Calcular la puntuación cuesta ~1 µs por coincidencia: una palabra muy
+# común en un millón de items ("la*") tiene cientos de miles y la búsqueda
+# tardaría cientos de ms. Solo se puntúan las MAX_RANKED_MATCHES
+# coincidencias más recientes (id más alto); las anteriores se devuelven
+# después, ordenadas por id. Con búsquedas más concretas, que tienen menos
+# coincidencias, se puntúan todas
+MAX_RANKED_MATCHES = 10_000
+
+# Posición de una búsqueda paginada (ver pagination.encode_rank_cursor):
+# (puntuación, id, suelo). `suelo` es el id más bajo de las coincidencias
+# puntuadas (0 si se puntúan todas); con puntuación None la paginación ya
+# va por id y `id` es el último devuelto
+SearchPosition = Tuple[Optional[float], int, int]
+
+def build_match_query(q: str) -> str:
+    """
+    Convierte el texto del usuario en una consulta MATCH de FTS5.
+
+    Cada palabra va entre comillas para que los caracteres especiales de
+    FTS5 (AND, OR, NEAR, ", :, ^...) se busquen como texto normal.
+
+    Raises:
+        ValueError: si la búsqueda no contiene ninguna palabra
+    """
+    terms = [f'"{word}"{star}' for word, star in _TERM.findall(q)]
+    if not terms:
+        raise ValueError("La búsqueda no contiene ninguna palabra")
+    return " ".join(terms)
+
+items_fts = table("items_fts", column("rowid"))
+
+def _matching(match: str):
+    return literal_column("items_fts").op("MATCH")(match)
+
+def ranked_floor_statement(match: str):
+    """
+    SELECT del id más bajo de las MAX_RANKED_MATCHES coincidencias más
+    recientes, o 0 si hay menos (entonces se puntúan todas).
+
+    FTS5 recorre el índice por id sin puntuar, y el filtro rowid >= suelo
+    de search_statement lo aplica el propio índice.
+    """
+    newest = (
+        select(items_fts.c.rowid)
+        .where(_matching(match))
+        .order_by(items_fts.c.rowid.desc())
+        .limit(MAX_RANKED_MATCHES)
+        .subquery()
+    )
+    return select(
+        case((func.count() >= MAX_RANKED_MATCHES, func.min(newest.c.rowid)), else_=0)
+    ).select_from(newest)
+
+def search_statement(match: str, limit: int, floor: int, after: Optional[SearchPosition] = None):
+    """
+    SELECT de (Item, puntuación) para una consulta MATCH, ordenado por
+    relevancia y después por id, entre las coincidencias con id >= floor.
+
+    bm25() da valores negativos: cuanto menor, más relevante.
+
+    Args:
+        match: Consulta generada por build_match_query
+        limit: Tamaño de la página
+        floor: Id más bajo de las coincidencias puntuadas (ranked_floor_statement)
+        after: Posición de la última fila de la página anterior
+    """
+    rank = func.bm25(literal_column("items_fts"), NAME_WEIGHT, DESCRIPTION_WEIGHT).label("rank")
+    matches = (
+        select(items_fts.c.rowid.label("id"), rank)
+        .where(_matching(match), items_fts.c.rowid >= floor)
+        .subquery()
+    )
+
+    query = (
+        select(models.Item, matches.c.rank)
+        .join(matches, models.Item.id == matches.c.id)
+    )
+
+    # Paginación por cursor sobre (puntuación, id)
+    if after is not None:
+        last_rank, last_id, _ = after
+        query = query.where(or_(
+            matches.c.rank > last_rank,
+            and_(matches.c.rank == last_rank, models.Item.id > last_id)
+        ))
+
+    return query.order_by(matches.c.rank, models.Item.id).limit(limit)
+
+def older_matches_statement(match: str, limit: int, before: int):
+    """
+    SELECT de los Item que coinciden con id < before, del más reciente al
+    más antiguo y sin puntuar: las coincidencias que quedan por debajo del
+    suelo de las puntuadas. Cada página cuesta lo mismo (keyset por id).
+    """
+    ids = (
+        select(items_fts.c.rowid)
+        .where(_matching(match), items_fts.c.rowid < before)
+        .order_by(items_fts.c.rowid.desc())
+        .limit(limit)
+        .subquery()
+    )
+    return (
+        select(models.Item)
+        .join(ids, models.Item.id == ids.c.rowid)
+        .order_by(models.Item.id.desc())
+    )
+
+def older_matches_before(floor: int, after: Optional[SearchPosition]) -> int:
+    """
+    Id por debajo del que siguen las coincidencias sin puntuar, o 0 si no
+    hay ninguna (se han puntuado todas).
+    """
+    if after is not None and after[0] is None:
+        return after[1]
+    return floor
+
+def page_order(rows: List[Tuple[object, Optional[float]]]) -> str:
+    """
+    Orden de una página (cabecera X-Search-Order): "rank" si todas sus
+    filas van por relevancia, "id" si todas van por id y "rank,id" si la
+    página pasa de un orden al otro.
+    """
+    orders = []
+    if not rows or rows[0][1] is not None:
+        orders.append("rank")
+    if rows and rows[-1][1] is None:
+        orders.append("id")
+    return ",".join(orders)
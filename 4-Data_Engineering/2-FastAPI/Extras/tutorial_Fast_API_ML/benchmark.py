@@ -0,0 +1,318 @@
+"""
+benchmark.py
+
+Prueba de carga de la API de predicción.
+
+Arranca la app en el mismo proceso (por defecto) o con uvicorn en localhost,
+lanza `--concurrencia` clientes durante `--duracion` segundos eligiendo cada
+petición según la mezcla `--mezcla` y guarda en JSON las peticiones/s y las
+latencias p50/p95/p99 de cada operación.
+
+    python benchmark.py --concurrencia 32 --duracion 20 --salida base.json
+    python benchmark.py --mezcla predecir=8,lote=1,reentrenar=1 --comparar base.json
+
+Con `--comparar` se marca como regresión cualquier operación cuyas peticiones/s
+bajen o cuyo p95/p99 suba más de `--tolerancia` respecto a la referencia, y el
+script termina con código 1.
+
+Cada `/reentrenar` guarda una versión nueva en el registro de modelos: durante
+la prueba el registro apunta a un directorio temporal (REGISTRO_DIRECTORIO) que
+se borra al terminar, así no se llena `modelos/versiones`. Con `--url` el
+servidor ya está arrancado y usa su propio registro.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import httpx
+import numpy as np
+
+
+OPERACIONES = ("predecir", "lote", "stream", "reentrenar")
+
+
+# ============================================================
+# CARGAS
+# ============================================================
+
+def casa_aleatoria(rng: random.Random) -> dict:
+    return {
+        "tamano": round(rng.uniform(40, 300), 1),
+        "habitaciones": rng.randint(1, 6),
+        "banos": rng.randint(1, 4),
+        "antiguedad": round(rng.uniform(0, 60), 1)
+    }
+
+
+async def peticion(cliente: httpx.AsyncClient, operacion: str, rng: random.Random, args) -> httpx.Response:
+    if operacion == "predecir":
+        # Una parte de las casas se repite para ejercitar la caché
+        if rng.random() < args.repetidas:
+            casa = casa_aleatoria(random.Random(rng.randint(0, 20)))
+        else:
+            casa = casa_aleatoria(rng)
+        return await cliente.post("/predecir", json=casa)
+
+    if operacion == "lote":
+        return await cliente.post("/predecir/lote", json=[casa_aleatoria(rng) for _ in range(args.tamano_lote)])
+
+    if operacion == "stream":
+        cuerpo = "\n".join(json.dumps(casa_aleatoria(rng)) for _ in range(args.tamano_lote))
+        return await cliente.post("/predecir/stream", content=cuerpo)
+
+    if operacion == "reentrenar":
+        datos = [casa_aleatoria(rng) for _ in range(100)]
+        precios = [d["tamano"] * 2500 + d["habitaciones"] * 10000 for d in datos]
+        # activar=false: el entrenamiento consume CPU pero no cambia el modelo servido
+        return await cliente.post(
+            "/reentrenar", params={"activar": "false"},
+            json={"datos": datos, "precios": precios, "epochs": args.epochs}
+        )
+
+    raise ValueError(f"Operación desconocida: {operacion}")
+
+
+# ============================================================
+# EJECUCIÓN
+# ============================================================
+
+def parsear_mezcla(texto: str) -> dict:
+    mezcla = {}
+    for parte in texto.split(","):
+        nombre, _, peso = parte.partition("=")
+        if nombre not in OPERACIONES:
+            raise SystemExit(f"Operación desconocida en --mezcla: {nombre} (opciones: {', '.join(OPERACIONES)})")
+        mezcla[nombre] = float(peso or 1)
+    return mezcla
+
+
+async def cliente_carga(cliente, mezcla: dict, fin: float, semilla: int, latencias: dict, errores: dict, args):
+    rng = random.Random(semilla)
+    nombres, pesos = list(mezcla), list(mezcla.values())
+
+    while time.perf_counter() < fin:
+        operacion = rng.choices(nombres, pesos)[0]
+        inicio = time.perf_counter()
+        try:
+            respuesta = await peticion(cliente, operacion, rng, args)
+            correcta = respuesta.status_code < 400
+        except httpx.HTTPError:
+            correcta = False
+
+        if correcta:
+            latencias[operacion].append(time.perf_counter() - inicio)
+        else:
+            errores[operacion] += 1
+
+
+async def ejecutar_carga(cliente: httpx.AsyncClient, args) -> dict:
+    mezcla = parsear_mezcla(args.mezcla)
+    latencias = {op: [] for op in mezcla}
+    errores = {op: 0 for op in mezcla}
+
+    # Calentamiento: no cuenta en los resultados
+    for _ in range(args.calentamiento):
+        await peticion(cliente, "predecir", random.Random(0), args)
+
+    inicio = time.perf_counter()
+    fin = inicio + args.duracion
+    await asyncio.gather(*(
+        cliente_carga(cliente, mezcla, fin, args.semilla + i, latencias, errores, args)
+        for i in range(args.concurrencia)
+    ))
+    duracion = time.perf_counter() - inicio
+
+    resultados = {}
+    for operacion in mezcla:
+        muestras = np.asarray(latencias[operacion]) * 1000
+        resultados[operacion] = {
+            "peticiones": len(muestras),
+            "errores": errores[operacion],
+            "peticiones_s": round(len(muestras) / duracion, 2),
+            **{
+                f"p{q}_ms": round(float(np.percentile(muestras, q)), 3) if len(muestras) else None
+                for q in (50, 95, 99)
+            },
+            "media_ms": round(float(muestras.mean()), 3) if len(muestras) else None
+        }
+
+    return {
+        "fecha": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "config": {
+            "modo": args.modo,
+            "motor": os.getenv("MOTOR_INFERENCIA", "keras"),
+            "concurrencia": args.concurrencia,
+            "duracion_s": args.duracion,
+            "mezcla": mezcla,
+            "tamano_lote": args.tamano_lote,
+            "repetidas": args.repetidas
+        },
+        "duracion_real_s": round(duracion, 3),
+        "operaciones": resultados
+    }
+
+
+async def en_proceso(args) -> dict:
+    from main import app, ciclo_vida, gestor_trabajos
+
+    # ASGITransport no ejecuta el lifespan: se abre a mano para calentar el modelo
+    async with ciclo_vida(app):
+        transporte = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://bench", timeout=None) as cliente:
+            await esperar_listo(cliente)
+            resultado = await ejecutar_carga(cliente, args)
+
+    # Los reentrenamientos en cola siguen en su hilo: se esperan para que
+    # no escriban en el registro temporal cuando ya se ha borrado
+    while gestor_trabajos.pendientes:
+        await asyncio.sleep(0.1)
+    return resultado
+
+
+def puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def esperar_listo(cliente: httpx.AsyncClient, timeout_s: float = 120):
+    limite = time.perf_counter() + timeout_s
+    while time.perf_counter() < limite:
+        try:
+            if (await cliente.get("/ready")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.2)
+    raise SystemExit("La API no ha respondido a /ready a tiempo.")
+
+
+async def con_uvicorn(args) -> dict:
+    url = args.url
+    servidor = None
+
+    if url is None:
+        puerto = puerto_libre()
+        url = f"http://127.0.0.1:{puerto}"
+        servidor = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(puerto), "--log-level", "warning"]
+        )
+
+    limites = httpx.Limits(max_connections=args.concurrencia, max_keepalive_connections=args.concurrencia)
+    try:
+        async with httpx.AsyncClient(base_url=url, timeout=None, limits=limites) as cliente:
+            await esperar_listo(cliente)
+            return await ejecutar_carga(cliente, args)
+    finally:
+        if servidor is not None:
+            servidor.terminate()
+            servidor.wait()
+
+
+# ============================================================
+# COMPARACIÓN CON LA REFERENCIA
+# ============================================================
+
+def comparar(actual: dict, referencia: dict, tolerancia: float) -> list:
+    """Lista de regresiones de `actual` respecto a `referencia`."""
+    regresiones = []
+
+    for operacion, medida in actual["operaciones"].items():
+        base = referencia.get("operaciones", {}).get(operacion)
+        if not base:
+            continue
+
+        if base["peticiones_s"] and medida["peticiones_s"] < base["peticiones_s"] * (1 - tolerancia):
+            regresiones.append(
+                f"{operacion}: peticiones/s {base['peticiones_s']} -> {medida['peticiones_s']}"
+            )
+
+        for clave in ("p95_ms", "p99_ms"):
+            if base[clave] and medida[clave] and medida[clave] > base[clave] * (1 + tolerancia):
+                regresiones.append(f"{operacion}: {clave} {base[clave]} -> {medida[clave]}")
+
+    return regresiones
+
+
+def imprimir(resultado: dict, referencia: dict = None):
+    print(f"{'operación':<12}{'pet/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errores':>9}")
+    for operacion, m in resultado["operaciones"].items():
+        print(
+            f"{operacion:<12}{m['peticiones_s']:>10}{m['p50_ms'] or '-':>10}"
+            f"{m['p95_ms'] or '-':>10}{m['p99_ms'] or '-':>10}{m['errores']:>9}"
+        )
+        base = (referencia or {}).get("operaciones", {}).get(operacion)
+        if base:
+            print(
+                f"{'  (ref)':<12}{base['peticiones_s']:>10}{base['p50_ms'] or '-':>10}"
+                f"{base['p95_ms'] or '-':>10}{base['p99_ms'] or '-':>10}{base['errores']:>9}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de la API de predicción")
+    parser.add_argument("--modo", choices=("proceso", "uvicorn"), default="proceso")
+    parser.add_argument("--url", help="En modo uvicorn, usar un servidor ya arrancado en esta URL")
+    parser.add_argument("--concurrencia", type=int, default=16)
+    parser.add_argument("--duracion", type=float, default=10, help="Segundos de carga")
+    parser.add_argument("--mezcla", default="predecir=1", help="Pesos por operación, p. ej. predecir=8,lote=1")
+    parser.add_argument("--tamano-lote", type=int, default=100, help="Filas por petición de lote/stream")
+    parser.add_argument("--repetidas", type=float, default=0.0, help="Fracción de /predecir con casas repetidas")
+    parser.add_argument("--epochs", type=int, default=5, help="Epochs de cada /reentrenar")
+    parser.add_argument("--calentamiento", type=int, default=20)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--salida", help="Fichero JSON donde guardar los resultados")
+    parser.add_argument("--comparar", help="JSON de referencia con el que comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.10, help="Empeoramiento permitido (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    # main.py lee REGISTRO_DIRECTORIO al importarse, y el servidor uvicorn
+    # hereda el entorno: los dos guardan las versiones en el temporal
+    with tempfile.TemporaryDirectory(prefix="benchmark_registro_") as registro:
+        anterior = os.environ.get("REGISTRO_DIRECTORIO")
+        os.environ["REGISTRO_DIRECTORIO"] = registro
+        try:
+            resultado = asyncio.run(en_proceso(args) if args.modo == "proceso" else con_uvicorn(args))
+        finally:
+            if anterior is None:
+                del os.environ["REGISTRO_DIRECTORIO"]
+            else:
+                os.environ["REGISTRO_DIRECTORIO"] = anterior
+
+    referencia = None
+    if args.comparar:
+        with open(args.comparar) as f:
+            referencia = json.load(f)
+
+    imprimir(resultado, referencia)
+
+    regresiones = []
+    if referencia is not None:
+        regresiones = comparar(resultado, referencia, args.tolerancia)
+        resultado["regresiones"] = regresiones
+        if regresiones:
+            print("REGRESIONES:")
+            for regresion in regresiones:
+                print(f"  - {regresion}")
+        else:
+            print(f"Sin regresiones (tolerancia {args.tolerancia:.0%}).")
+
+    if args.salida:
+        with open(args.salida, "w") as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+        print(f"Resultados guardados en {args.salida}")
+
+    sys.exit(1 if regresiones else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+cache.py
+
+Caché en memoria de predicciones individuales (LRU + TTL).
+
+El frontend envía una y otra vez las mismas configuraciones de casa, así que
+las predicciones de `/predecir` se guardan por la tupla normalizada
+(tamano, habitaciones, banos, antiguedad) junto con la versión del modelo.
+Opcionalmente `tamano` y `antiguedad` se redondean a un paso fijo para que
+entradas casi iguales compartan entrada en la caché.
+
+El valor guardado lo decide quien llama (en main.py, la predicción y el MAE
+del modelo que la calculó).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, List, Optional, Sequence
+
+
+class CachePredicciones:
+    """
+    Args:
+        max_entradas: tamaño máximo de la caché (0 = desactivada)
+        ttl_s: segundos que una predicción se considera válida
+        paso_tamano: redondeo de `tamano` (0 = sin redondeo)
+        paso_antiguedad: redondeo de `antiguedad` (0 = sin redondeo)
+    """
+
+    def __init__(
+        self,
+        max_entradas: int = 10000,
+        ttl_s: float = 300,
+        paso_tamano: float = 0,
+        paso_antiguedad: float = 0
+    ):
+        self.max_entradas = max(0, max_entradas)
+        self.ttl = ttl_s
+        self.paso_tamano = paso_tamano
+        self.paso_antiguedad = paso_antiguedad
+        self.aciertos = 0
+        self.fallos = 0
+        self._entradas = OrderedDict()
+        # invalidar() se llama desde el hilo de reentrenamiento
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _redondear(valor: float, paso: float) -> float:
+        return round(valor / paso) * paso if paso > 0 else valor
+
+    def normalizar(self, entrada: Sequence[float]) -> List[float]:
+        """Aplica el redondeo configurado. La predicción se hace sobre este valor."""
+        tamano, habitaciones, banos, antiguedad = entrada
+        return [
+            float(self._redondear(tamano, self.paso_tamano)),
+            float(habitaciones),
+            float(banos),
+            float(self._redondear(antiguedad, self.paso_antiguedad))
+        ]
+
+    def obtener(self, clave: Hashable) -> Optional[Any]:
+        if not self.max_entradas:
+            return None
+
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None and entrada[0] > time.monotonic():
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                return entrada[1]
+
+            if entrada is not None:
+                del self._entradas[clave]
+            self.fallos += 1
+            return None
+
+    def guardar(self, clave: Hashable, valor: Any):
+        if not self.max_entradas:
+            return
+
+        with self._lock:
+            self._entradas[clave] = (time.monotonic() + self.ttl, valor)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def invalidar(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def estado(self) -> dict:
+        consultas = self.aciertos + self.fallos
+        return {
+            "entradas": len(self._entradas),
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "tasa_aciertos": round(self.aciertos / consultas, 4) if consultas else None
+        }
@@ -0,0 +1,70 @@
+"""
+compilado.py
+
+Función de servicio compilada para el modelo Keras.
+
+`modelo.predict` pasa en cada llamada por toda la maquinaria genérica de
+Keras (adaptador de datos, callbacks, bucle por lotes). Aquí el modelo se
+envuelve en una `tf.function` con firma fija y las entradas se rellenan hasta
+el tamaño de "cubeta" más cercano (1, 8, 32, 128...), de modo que solo se
+ejecutan unas pocas formas distintas y todas se pueden calentar al arrancar.
+"""
+
+from typing import Sequence
+
+import numpy as np
+
+
+CUBETAS_POR_DEFECTO = (1, 8, 32, 128, 512, 2048)
+
+
+class ModeloCompilado:
+    """
+    Envoltorio de un modelo Keras con la misma interfaz `predict`.
+
+    Args:
+        modelo: modelo Keras ya cargado
+        cubetas: tamaños de lote a los que se rellenan las entradas. Las
+            entradas más grandes que la última cubeta se parten en trozos.
+    """
+
+    def __init__(self, modelo, cubetas: Sequence[int] = CUBETAS_POR_DEFECTO):
+        import tensorflow as tf
+
+        self.modelo = modelo
+        self.cubetas = sorted(set(cubetas))
+        self.n_caracteristicas = modelo.input_shape[-1]
+        self.calentado = False
+        self._servir = tf.function(
+            lambda x: modelo(x, training=False),
+            input_signature=[tf.TensorSpec([None, self.n_caracteristicas], tf.float32)]
+        )
+
+    def _cubeta(self, n: int) -> int:
+        for cubeta in self.cubetas:
+            if n <= cubeta:
+                return cubeta
+        return self.cubetas[-1]
+
+    def predict(self, X: np.ndarray, batch_size=None, verbose=0) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        maximo = self.cubetas[-1]
+        salidas = []
+
+        for inicio in range(0, len(X), maximo):
+            trozo = X[inicio:inicio + maximo]
+            relleno = np.zeros((self._cubeta(len(trozo)), self.n_caracteristicas), dtype=np.float32)
+            relleno[:len(trozo)] = trozo
+            salidas.append(self._servir(relleno).numpy()[:len(trozo)])
+
+        if not salidas:
+            return np.empty((0, 1), dtype=np.float32)
+        return np.concatenate(salidas)
+
+    def calentar(self):
+        """Ejecuta una vez cada cubeta para que la traza y los kernels estén listos."""
+        if self.calentado:
+            return
+        for cubeta in self.cubetas:
+            self._servir(np.zeros((cubeta, self.n_caracteristicas), dtype=np.float32))
+        self.calentado = True
@@ -0,0 +1,140 @@
+"""
+deriva.py
+
+Estadísticas online de deriva de datos (data drift) de las entradas.
+
+Para cada característica de `DatosCasa` se mantiene, sin guardar filas:
+- media y varianza con el algoritmo de Welford (fusión por lotes de Chan)
+- un histograma de cubetas fijas, con los bordes de la distribución de
+  entrenamiento
+- el PSI (Population Stability Index) del histograma observado frente a las
+  proporciones de entrenamiento
+
+La distribución de referencia se guarda en `metadata.json` bajo la clave
+`distribucion_entrenamiento` al reentrenar. Si no existe (p. ej. el modelo
+base), se aproxima con una normal con la media y desviación del scaler.
+"""
+
+import threading
+from statistics import NormalDist
+from typing import Optional, Sequence
+
+import numpy as np
+
+from historial import CARACTERISTICAS
+
+
+N_CUBETAS = 10
+PSI_MODERADO = 0.1
+PSI_ALERTA = 0.2
+
+
+def distribucion_referencia(X: np.ndarray) -> dict:
+    """Bordes (deciles) y proporciones de cada columna de la matriz de entrenamiento."""
+    referencia = {}
+    for i, nombre in enumerate(CARACTERISTICAS):
+        columna = X[:, i]
+        cuantiles = np.linspace(0, 1, N_CUBETAS + 1)[1:-1]
+        bordes = np.unique(np.quantile(columna, cuantiles))
+        cuentas = np.bincount(np.searchsorted(bordes, columna, side="right"), minlength=len(bordes) + 1)
+        referencia[nombre] = {
+            "bordes": bordes.tolist(),
+            "proporciones": (cuentas / len(columna)).tolist()
+        }
+    return referencia
+
+
+def distribucion_normal(medias: Sequence[float], desviaciones: Sequence[float]) -> dict:
+    """Referencia aproximada: deciles de una normal por característica."""
+    z = [NormalDist().inv_cdf(q) for q in np.linspace(0, 1, N_CUBETAS + 1)[1:-1]]
+    return {
+        nombre: {
+            "bordes": [float(media + desviacion * zi) for zi in z],
+            "proporciones": [1 / N_CUBETAS] * N_CUBETAS,
+            "origen": "aproximacion_normal"
+        }
+        for nombre, media, desviacion in zip(CARACTERISTICAS, medias, desviaciones)
+    }
+
+
+class EstadisticasDeriva:
+    """
+    Acumulador de estadísticas por característica.
+
+    `actualizar` cuesta O(1) por fila y O(n) por lote de n filas; la memoria
+    no depende del número de predicciones.
+    """
+
+    def __init__(self, referencia: Optional[dict] = None):
+        self._lock = threading.Lock()
+        self.reiniciar(referencia)
+
+    def reiniciar(self, referencia: Optional[dict]):
+        """Cambia la distribución de referencia y pone los contadores a cero."""
+        with self._lock:
+            self.referencia = referencia
+            self.n = 0
+            self.media = np.zeros(len(CARACTERISTICAS))
+            self.m2 = np.zeros(len(CARACTERISTICAS))
+
+            if referencia:
+                self.bordes = [np.asarray(referencia[c]["bordes"]) for c in CARACTERISTICAS]
+                self.esperado = [np.asarray(referencia[c]["proporciones"]) for c in CARACTERISTICAS]
+            else:
+                self.bordes = [np.empty(0) for _ in CARACTERISTICAS]
+                self.esperado = [np.ones(1) for _ in CARACTERISTICAS]
+            self.cuentas = [np.zeros(len(b) + 1, dtype=np.int64) for b in self.bordes]
+
+    def actualizar(self, X: np.ndarray):
+        X = np.asarray(X, dtype=np.float64).reshape(-1, len(CARACTERISTICAS))
+        n_lote = len(X)
+        if n_lote == 0:
+            return
+
+        media_lote = X.mean(axis=0)
+        m2_lote = ((X - media_lote) ** 2).sum(axis=0)
+
+        with self._lock:
+            # Fusión de Welford/Chan: (n, media, M2) + lote
+            n_total = self.n + n_lote
+            delta = media_lote - self.media
+            self.media = self.media + delta * n_lote / n_total
+            self.m2 = self.m2 + m2_lote + delta ** 2 * self.n * n_lote / n_total
+            self.n = n_total
+
+            for i, bordes in enumerate(self.bordes):
+                indices = np.searchsorted(bordes, X[:, i], side="right")
+                self.cuentas[i] += np.bincount(indices, minlength=len(bordes) + 1)
+
+    @staticmethod
+    def psi(observado: np.ndarray, esperado: np.ndarray, epsilon: float = 1e-4) -> float:
+        p = np.clip(observado, epsilon, None)
+        q = np.clip(esperado, epsilon, None)
+        return float(np.sum((p - q) * np.log(p / q)))
+
+    def resumen(self) -> dict:
+        with self._lock:
+            caracteristicas = {}
+            for i, nombre in enumerate(CARACTERISTICAS):
+                psi = None
+                if self.n and self.referencia:
+                    psi = self.psi(self.cuentas[i] / self.n, self.esperado[i])
+
+                caracteristicas[nombre] = {
+                    "media": float(self.media[i]) if self.n else None,
+                    "std": float(np.sqrt(self.m2[i] / (self.n - 1))) if self.n > 1 else None,
+                    "histograma": self.cuentas[i].tolist(),
+                    "psi": psi,
+                    "nivel": (
+                        None if psi is None
+                        else "alto" if psi >= PSI_ALERTA
+                        else "moderado" if psi >= PSI_MODERADO
+                        else "bajo"
+                    )
+                }
+
+            return {
+                "n": self.n,
+                "alerta": any(c["nivel"] == "alto" for c in caracteristicas.values()),
+                "caracteristicas": caracteristicas
+            }
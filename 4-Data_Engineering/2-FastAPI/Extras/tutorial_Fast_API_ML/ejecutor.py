@@ -0,0 +1,71 @@
+"""
+ejecutor.py
+
+Ejecutor dedicado para la inferencia y el entrenamiento con Keras.
+
+`predict` y `fit` son bloqueantes: si se llaman directamente dentro de un
+endpoint `async def` paran el event loop y ninguna otra conexión avanza.
+Aquí se ejecutan en un pool de hilos acotado (TensorFlow libera el GIL
+durante el cálculo) con una cola máxima: cuando se llena, las nuevas
+peticiones se rechazan en lugar de acumularse sin límite.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+
+class EjecutorSaturado(Exception):
+    """Se lanza cuando no cabe ningún trabajo más en el ejecutor."""
+
+
+class EjecutorInferencia:
+    """
+    Pool de hilos con control de contrapresión.
+
+    Args:
+        max_hilos: número de hilos que ejecutan trabajos a la vez
+        max_cola: trabajos que pueden esperar a que quede un hilo libre
+    """
+
+    def __init__(self, max_hilos: int = 2, max_cola: int = 64):
+        self.max_hilos = max(1, max_hilos)
+        self.max_cola = max(0, max_cola)
+        self.pendientes = 0
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.max_hilos,
+            thread_name_prefix="inferencia"
+        )
+
+    @property
+    def capacidad(self) -> int:
+        return self.max_hilos + self.max_cola
+
+    @property
+    def saturado(self) -> bool:
+        return self.pendientes >= self.capacidad
+
+    async def ejecutar(self, funcion: Callable[..., Any], *args) -> Any:
+        """
+        Ejecuta `funcion(*args)` en el pool y espera su resultado.
+
+        Raises:
+            EjecutorSaturado: si ya hay `capacidad` trabajos en curso o en cola
+        """
+        if self.saturado:
+            raise EjecutorSaturado("El servicio de inferencia está saturado.")
+
+        # El contador solo se toca desde el event loop, no necesita lock
+        self.pendientes += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool, funcion, *args)
+        finally:
+            self.pendientes -= 1
+
+    def estado(self) -> dict:
+        return {
+            "hilos": self.max_hilos,
+            "pendientes": self.pendientes,
+            "capacidad": self.capacidad
+        }
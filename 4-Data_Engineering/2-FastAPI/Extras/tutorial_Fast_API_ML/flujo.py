@@ -0,0 +1,112 @@
+"""
+flujo.py
+
+Lectura por bloques de cuerpos NDJSON o CSV para la predicción en streaming.
+
+El cuerpo de la petición se consume trozo a trozo: las líneas se agrupan en
+bloques de tamaño fijo y cada bloque se convierte directamente en una matriz
+NumPy (n, 4). Así la memoria usada depende del tamaño del bloque y no del
+número total de filas enviadas.
+"""
+
+import json
+from typing import AsyncIterator, List
+
+import numpy as np
+
+from historial import CARACTERISTICAS
+
+
+async def leer_bloques(stream: AsyncIterator[bytes], filas_por_bloque: int) -> AsyncIterator[List[bytes]]:
+    """Agrupa las líneas no vacías de `stream` en bloques de `filas_por_bloque`."""
+    pendiente = b""
+    lineas = []
+
+    async for trozo in stream:
+        pendiente += trozo
+        *completas, pendiente = pendiente.split(b"\n")
+        lineas.extend(linea for linea in completas if linea.strip())
+
+        while len(lineas) >= filas_por_bloque:
+            yield lineas[:filas_por_bloque]
+            del lineas[:filas_por_bloque]
+
+    if pendiente.strip():
+        lineas.append(pendiente)
+    if lineas:
+        yield lineas
+
+
+class LectorFilas:
+    """
+    Convierte bloques de líneas en matrices (n, 4).
+
+    Las líneas que no se pueden leer quedan como filas de NaN, de forma que
+    cada fila de la matriz sigue correspondiendo a su línea de entrada.
+
+    Args:
+        formato: "ndjson" o "csv". En CSV la primera línea puede ser una
+            cabecera con los nombres de las columnas; si no lo es, se asume
+            el orden tamano, habitaciones, banos, antiguedad.
+    """
+
+    def __init__(self, formato: str):
+        self.formato = formato
+        self._columnas = None
+
+    def parsear(self, lineas: List[bytes]) -> np.ndarray:
+        if self.formato == "csv":
+            return self._parsear_csv(lineas)
+        return self._parsear_ndjson(lineas)
+
+    def _parsear_ndjson(self, lineas: List[bytes]) -> np.ndarray:
+        X = np.full((len(lineas), len(CARACTERISTICAS)), np.nan)
+        for i, linea in enumerate(lineas):
+            try:
+                fila = json.loads(linea)
+                X[i] = [fila[nombre] for nombre in CARACTERISTICAS]
+            except (ValueError, TypeError, KeyError):
+                pass
+        return X
+
+    def _parsear_csv(self, lineas: List[bytes]) -> np.ndarray:
+        if self._columnas is None:
+            cabecera = [c.strip().decode() for c in lineas[0].split(b",")]
+            if set(CARACTERISTICAS) <= set(cabecera):
+                self._columnas = [cabecera.index(nombre) for nombre in CARACTERISTICAS]
+                lineas = lineas[1:]
+            else:
+                self._columnas = list(range(len(CARACTERISTICAS)))
+
+        if not lineas:
+            return np.empty((0, len(CARACTERISTICAS)))
+
+        try:
+            # Camino rápido: todo el bloque de una vez
+            X = np.loadtxt(lineas, delimiter=",", ndmin=2)
+            return X[:, self._columnas]
+        except (ValueError, IndexError):
+            pass
+
+        # Alguna línea está mal formada: se leen una a una
+        X = np.full((len(lineas), len(CARACTERISTICAS)), np.nan)
+        for i, linea in enumerate(lineas):
+            try:
+                valores = linea.split(b",")
+                X[i] = [float(valores[c]) for c in self._columnas]
+            except (ValueError, IndexError):
+                pass
+        return X
+
+
+def filas_validas(X: np.ndarray) -> np.ndarray:
+    """Máscara con las filas que cumplen las mismas restricciones que `DatosCasa`."""
+    tamano, habitaciones, banos, antiguedad = X.T
+    with np.errstate(invalid="ignore"):
+        return (
+            np.isfinite(X).all(axis=1)
+            & (tamano > 0)
+            & (habitaciones >= 1) & (habitaciones <= 10) & (habitaciones % 1 == 0)
+            & (banos >= 1) & (banos <= 5) & (banos % 1 == 0)
+            & (antiguedad >= 0) & (antiguedad <= 100)
+        )
@@ -0,0 +1,96 @@
+"""
+historial.py
+
+Historial de predicciones de tamaño fijo guardado en columnas NumPy.
+
+En lugar de una lista de diccionarios que crece sin límite, se usa un buffer
+circular: al llenarse, cada nueva predicción sobrescribe a la más antigua.
+Opcionalmente, cada registro se añade también a un archivo binario en disco
+(solo escritura al final), que se puede leer después con `leer_volcado`.
+"""
+
+from typing import Optional, Sequence
+
+import numpy as np
+
+
+CARACTERISTICAS = ("tamano", "habitaciones", "banos", "antiguedad")
+CONFIANZAS = ("baja", "media", "alta")
+
+DTYPE_REGISTRO = np.dtype(
+    [("timestamp", "f8")]
+    + [(nombre, "f8") for nombre in CARACTERISTICAS]
+    + [("prediccion", "f8"), ("confianza", "i1")]
+)
+
+
+class HistorialPredicciones:
+    """
+    Buffer circular de predicciones.
+
+    Args:
+        capacidad: número máximo de predicciones que se guardan en memoria
+        ruta_volcado: archivo donde se añade cada registro (None = desactivado)
+    """
+
+    def __init__(self, capacidad: int = 10000, ruta_volcado: Optional[str] = None):
+        self.capacidad = max(1, capacidad)
+        self.total = 0
+        self._registros = np.zeros(self.capacidad, dtype=DTYPE_REGISTRO)
+        self._volcado = open(ruta_volcado, "ab") if ruta_volcado else None
+
+    def __len__(self) -> int:
+        return min(self.total, self.capacidad)
+
+    def agregar(
+        self,
+        timestamp: float,
+        entrada: Sequence[float],
+        prediccion: float,
+        confianza: str
+    ):
+        registro = self._registros[self.total % self.capacidad]
+        registro["timestamp"] = timestamp
+        for nombre, valor in zip(CARACTERISTICAS, entrada):
+            registro[nombre] = valor
+        registro["prediccion"] = prediccion
+        registro["confianza"] = CONFIANZAS.index(confianza)
+        self.total += 1
+
+        if self._volcado is not None:
+            self._volcado.write(registro.tobytes())
+
+    def ultimos(self, n: int) -> np.ndarray:
+        """Devuelve (copiados) los últimos `n` registros, del más antiguo al más reciente."""
+        n = max(0, min(n, len(self)))
+        fin = self.total % self.capacidad
+        inicio = fin - n
+
+        if inicio >= 0:
+            return self._registros[inicio:fin].copy()
+
+        # El tramo pedido da la vuelta al final del buffer
+        return np.concatenate((self._registros[inicio:], self._registros[:fin]))
+
+    def a_columnas(self, n: int) -> dict:
+        """Últimos `n` registros en formato columnar, listo para serializar a JSON."""
+        registros = self.ultimos(n)
+        segundos = registros["timestamp"].astype("datetime64[s]")
+
+        return {
+            "n": len(registros),
+            "timestamp": np.datetime_as_string(segundos, timezone="UTC").tolist(),
+            "entrada": {nombre: registros[nombre].tolist() for nombre in CARACTERISTICAS},
+            "prediccion": registros["prediccion"].tolist(),
+            "confianza": np.array(CONFIANZAS)[registros["confianza"]].tolist()
+        }
+
+    def cerrar(self):
+        if self._volcado is not None:
+            self._volcado.close()
+            self._volcado = None
+
+
+def leer_volcado(ruta: str) -> np.ndarray:
+    """Lee un archivo de volcado como array estructurado con `DTYPE_REGISTRO`."""
+    return np.fromfile(ruta, dtype=DTYPE_REGISTRO)
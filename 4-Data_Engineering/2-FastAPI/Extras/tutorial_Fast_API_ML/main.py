@@ -1,18 +1,53 @@
 import os
 import json
-import pickle
+import asyncio
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import List
+from functools import partial
+from typing import List, Optional, Tuple
 
 import numpy as np
-import tensorflow as tf
-from tensorflow import keras
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, FileResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, Field
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
+
+from cache import CachePredicciones
+from deriva import EstadisticasDeriva, distribucion_normal, distribucion_referencia
+from ejecutor import EjecutorInferencia, EjecutorSaturado
+from flujo import LectorFilas, filas_validas, leer_bloques
+from historial import HistorialPredicciones
+from metricas import CUBETAS_LATENCIA, CUBETAS_TAMANO, Metricas, MiddlewareLatencias, marcar
+from microlotes import AgrupadorPredicciones
+from registro import VERSION_BASE, RegistroModelos
+from trabajos import GestorTrabajos, TrabajosSaturados
+
+
+# ============================================================
+# CONFIGURACIÓN
+# ============================================================
+
+# "keras" o "numpy". Con "numpy" el servicio no importa TensorFlow para
+# predecir: usa los pesos exportados con `python motor_numpy.py`
+MOTOR_INFERENCIA = os.getenv("MOTOR_INFERENCIA", "keras")
+# Tamaños de lote a los que se rellenan las entradas del modelo Keras compilado
+SERVIDOR_CUBETAS = [int(c) for c in os.getenv("SERVIDOR_CUBETAS", "1,8,32,128,512,2048").split(",")]
+
+MICROLOTE_MAX = int(os.getenv("MICROLOTE_MAX", "32"))
+MICROLOTE_ESPERA_MS = float(os.getenv("MICROLOTE_ESPERA_MS", "5"))
+INFERENCIA_HILOS = int(os.getenv("INFERENCIA_HILOS", "2"))
+INFERENCIA_COLA_MAX = int(os.getenv("INFERENCIA_COLA_MAX", "64"))
+REENTRENAMIENTO_COLA_MAX = int(os.getenv("REENTRENAMIENTO_COLA_MAX", "4"))
+HISTORIAL_CAPACIDAD = int(os.getenv("HISTORIAL_CAPACIDAD", "10000"))
+HISTORIAL_VOLCADO = os.getenv("HISTORIAL_VOLCADO") or None
+STREAM_FILAS_BLOQUE = int(os.getenv("STREAM_FILAS_BLOQUE", "4096"))
+REGISTRO_DIRECTORIO = os.getenv("REGISTRO_DIRECTORIO", "modelos/versiones")
+REGISTRO_MEMORIA_MB = float(os.getenv("REGISTRO_MEMORIA_MB", "256"))
+CACHE_MAX_ENTRADAS = int(os.getenv("CACHE_MAX_ENTRADAS", "10000"))
+CACHE_TTL_S = float(os.getenv("CACHE_TTL_S", "300"))
+CACHE_PASO_TAMANO = float(os.getenv("CACHE_PASO_TAMANO", "0"))
+CACHE_PASO_ANTIGUEDAD = float(os.getenv("CACHE_PASO_ANTIGUEDAD", "0"))
 
 
 # ============================================================
@@ -45,38 +80,52 @@ class DatosReentrenamiento(BaseModel):
 modelo_actual = None
 scaler_actual = None
 metadata_actual = {}
-historial_predicciones = []
+version_actual = None
+# Los cuatro a la vez en una tupla: activar_version la sustituye de una sola
+# asignación (desde el hilo de reentrenamiento), así quien la lee nunca ve el
+# modelo de una versión con el scaler o la metadata de otra
+activa = (None, None, None, {})
+listo = False
+registro = RegistroModelos(REGISTRO_DIRECTORIO, REGISTRO_MEMORIA_MB, MOTOR_INFERENCIA, SERVIDOR_CUBETAS)
+cache_predicciones = CachePredicciones(
+    CACHE_MAX_ENTRADAS, CACHE_TTL_S, CACHE_PASO_TAMANO, CACHE_PASO_ANTIGUEDAD
+)
+historial_predicciones = HistorialPredicciones(HISTORIAL_CAPACIDAD, HISTORIAL_VOLCADO)
+metricas = Metricas()
+deriva = EstadisticasDeriva()
 
 
 # ============================================================
 # CARGA DEL MODELO
 # ============================================================
 
-def cargar_modelo() -> bool:
-    global modelo_actual, scaler_actual, metadata_actual
-
-    try:
-        ruta_keras = "modelos/modelo_precios.keras"
-        ruta_h5 = "modelos/modelo_precios.h5"
-
-        if os.path.exists(ruta_keras):
-            modelo_actual = keras.models.load_model(ruta_keras)
-        elif os.path.exists(ruta_h5):
-            modelo_actual = keras.models.load_model(ruta_h5)
-        else:
-            raise FileNotFoundError("No existe modelo guardado.")
+def activar_version(version: str, modelo, scaler, metadata: dict):
+    global modelo_actual, scaler_actual, metadata_actual, version_actual, activa
+    modelo_actual, scaler_actual, metadata_actual, version_actual = modelo, scaler, metadata, version
+    activa = (version, modelo, scaler, metadata)
+    cache_predicciones.invalidar()
+    deriva.reiniciar(referencia_deriva(scaler, metadata))
 
-        if not os.path.exists("scaler.pkl"):
-            raise FileNotFoundError("Falta scaler.pkl")
 
-        with open("scaler.pkl", "rb") as f:
-            scaler_actual = pickle.load(f)
+def referencia_deriva(scaler, metadata: dict) -> Optional[dict]:
+    """
+    Distribución de entrenamiento guardada en la metadata o, si no hay
+    (modelo base), una normal con la media y escala del scaler.
+    """
+    if "distribucion_entrenamiento" in metadata:
+        return metadata["distribucion_entrenamiento"]
+    if hasattr(scaler, "mean_"):
+        return distribucion_normal(scaler.mean_, scaler.scale_)
+    return None
 
-        if os.path.exists("modelos/metadata.json"):
-            with open("modelos/metadata.json", "r") as f:
-                metadata_actual.update(json.load(f))
 
-        print("Modelo cargado correctamente.")
+def cargar_modelo() -> bool:
+    try:
+        # La versión activa del registro o, si no se ha activado ninguna,
+        # el modelo original ("base")
+        cargada = registro.obtener(registro.activa or VERSION_BASE)
+        activar_version(cargada.version, cargada.modelo, cargada.scaler, cargada.metadata)
+        print(f"Modelo {version_actual} cargado correctamente.")
         return True
 
     except Exception as e:
@@ -87,11 +136,139 @@ def cargar_modelo() -> bool:
 cargar_modelo()
 
 
+# ============================================================
+# EJECUTOR DE INFERENCIA Y MICRO-LOTES
+# ============================================================
+
+ejecutor = EjecutorInferencia(max_hilos=INFERENCIA_HILOS, max_cola=INFERENCIA_COLA_MAX)
+
+
+# Histogramas creados una sola vez; en cada predicción solo se incrementan
+hist_transform = metricas.histograma(
+    "latencia_etapa_segundos", "Duración de cada etapa de una predicción", CUBETAS_LATENCIA, etapa="transform"
+)
+hist_predict = metricas.histograma(
+    "latencia_etapa_segundos", "Duración de cada etapa de una predicción", CUBETAS_LATENCIA, etapa="predict"
+)
+hist_tamano_lote = metricas.histograma(
+    "tamano_lote_filas", "Filas por llamada al modelo", CUBETAS_TAMANO
+)
+hist_cola_microlotes = metricas.histograma(
+    "profundidad_cola", "Trabajos esperando al encolar uno nuevo", CUBETAS_TAMANO, cola="microlotes"
+)
+hist_cola_inferencia = metricas.histograma(
+    "profundidad_cola", "Trabajos esperando al encolar uno nuevo", CUBETAS_TAMANO, cola="inferencia"
+)
+
+
+def obtener_caliente(version: str):
+    """
+    Versión del registro con su función de servicio ya trazada, para
+    activarla sin que las primeras peticiones paguen la traza. Bloquea:
+    llamar desde el ejecutor o un hilo de trabajo.
+    """
+    cargada = registro.obtener(version)
+    if hasattr(cargada.modelo, "calentar"):
+        cargada.modelo.calentar()
+    return cargada
+
+
+def componentes(version: Optional[str] = None):
+    """
+    Modelo, scaler y metadata de `version` (None = la versión activa).
+
+    Las versiones que no son la activa pueden tener que cargarse del
+    registro: solo se llama desde el ejecutor, nunca en el event loop.
+    """
+    version_activa, modelo, scaler, metadata = activa
+    if version is None or version == version_activa:
+        return modelo, scaler, metadata
+    cargada = registro.obtener(version)
+    return cargada.modelo, cargada.scaler, cargada.metadata
+
+
+def predecir_matriz(X: np.ndarray, version: Optional[str] = None) -> Tuple[np.ndarray, dict]:
+    """Predicciones de `X` y la metadata del modelo que las ha calculado."""
+    modelo, scaler, metadata = componentes(version)
+
+    inicio = time.perf_counter()
+    X_norm = scaler.transform(X)
+    medio = time.perf_counter()
+    preds = modelo.predict(X_norm, batch_size=len(X_norm), verbose=0)[:, 0]
+
+    hist_transform.observar(medio - inicio)
+    hist_predict.observar(time.perf_counter() - medio)
+    hist_tamano_lote.observar(len(X))
+    return preds, metadata
+
+
+async def predecir_matriz_async(X: np.ndarray, version: Optional[str] = None) -> Tuple[np.ndarray, dict]:
+    hist_cola_inferencia.observar(ejecutor.pendientes)
+    return await ejecutor.ejecutar(predecir_matriz, X, version)
+
+
+# Un agrupador por versión: un micro-lote nunca mezcla modelos distintos
+agrupadores = {}
+
+
+def obtener_agrupador(version: Optional[str] = None) -> AgrupadorPredicciones:
+    if version not in agrupadores:
+        agrupadores[version] = AgrupadorPredicciones(
+            partial(predecir_matriz_async, version=version),
+            max_lote=MICROLOTE_MAX,
+            max_espera_ms=MICROLOTE_ESPERA_MS
+        )
+    return agrupadores[version]
+
+
+def version_solicitada(
+    version: Optional[str] = Query(None, description="Versión del modelo a usar"),
+    x_modelo_version: Optional[str] = Header(None)
+) -> Optional[str]:
+    """
+    Versión pedida por query param `version` o cabecera `X-Modelo-Version`.
+
+    Devuelve None para la versión activa: los lotes y el streaming usan el
+    modelo activo al ejecutar cada bloque, y /predecir fija la versión activa
+    al empezar la petición.
+    """
+    solicitada = version or x_modelo_version
+    if solicitada is None or solicitada == version_actual:
+        return None
+    if not registro.existe(solicitada):
+        raise HTTPException(status_code=404, detail=f"No existe la versión {solicitada}.")
+    return solicitada
+
+
 # ============================================================
 # INICIALIZAR APP
 # ============================================================
 
-app = FastAPI(title="API Predicción Casas")
+async def calentar_modelo():
+    global listo
+
+    # Las primeras peticiones tras un despliegue no pagan el coste de trazar
+    # la función de servicio: se ejecuta cada cubeta una vez antes de estar
+    # listos. Es el único calentamiento al arrancar (cargar_modelo, al
+    # importar, solo carga) y se hace en el ejecutor, no en el event loop
+    try:
+        if hasattr(modelo_actual, "calentar"):
+            await ejecutor.ejecutar(modelo_actual.calentar)
+        listo = modelo_actual is not None
+    except Exception as e:
+        print("Error al calentar el modelo:", e)
+
+
+@asynccontextmanager
+async def ciclo_vida(app: FastAPI):
+    calentamiento = asyncio.create_task(calentar_modelo())
+    yield
+    calentamiento.cancel()
+    historial_predicciones.cerrar()
+
+
+app = FastAPI(title="API Predicción Casas", lifespan=ciclo_vida)
+app.add_middleware(MiddlewareLatencias, metricas=metricas)
 
 # Servir carpeta /static (HTML, CSS, JS)
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
@@ -106,22 +283,47 @@ async def servir_frontend():
     return {"error": "Archivo index.html no encontrado en /app/static"}
 
 
+@app.get("/ready")
+async def ready():
+    if not listo:
+        raise HTTPException(status_code=503, detail="El modelo todavía no está listo.")
+    return {"status": "ready", "version": version_actual}
+
+
 # ============================================================
 # PREDICCIÓN
 # ============================================================
 
 @app.post("/predecir", response_model=PrediccionRespuesta)
-async def predecir_precio(datos: DatosCasa):
+async def predecir_precio(request: Request, datos: DatosCasa, version: Optional[str] = Depends(version_solicitada)):
+
+    marcar(request, "validado")
 
     if modelo_actual is None or scaler_actual is None:
         raise HTTPException(status_code=503, detail="Modelo no cargado.")
 
     try:
-        entrada = np.array([[datos.tamano, datos.habitaciones, datos.banos, datos.antiguedad]])
-        entrada_norm = scaler_actual.transform(entrada)
+        entrada = cache_predicciones.normalizar(
+            [datos.tamano, datos.habitaciones, datos.banos, datos.antiguedad]
+        )
+        # La versión se fija una sola vez: la predicción, su metadata y la
+        # clave de la caché son de la misma aunque se active otra mientras
+        # tanto (la predicción se hace con esta versión, no con la activa)
+        version_usada = version or version_actual
+        clave = (version_usada, *entrada)
+
+        guardada = cache_predicciones.obtener(clave)
+        if guardada is None:
+            agrupador = obtener_agrupador(version_usada)
+            hist_cola_microlotes.observar(agrupador.pendientes)
+            # La metadata se obtiene en el ejecutor junto con la predicción
+            pred, metadata = await agrupador.predecir(entrada)
+            mae_modelo = metadata.get("metricas", {}).get("mae", 20000)
+            cache_predicciones.guardar(clave, (pred, mae_modelo))
+        else:
+            pred, mae_modelo = guardada
 
-        pred = float(modelo_actual.predict(entrada_norm, verbose=0)[0][0])
-        mae_modelo = metadata_actual.get("metricas", {}).get("mae", 20000)
+        deriva.actualizar(entrada)
 
         if pred == 0:
             confianza = "baja"
@@ -129,21 +331,20 @@ async def predecir_precio(datos: DatosCasa):
             err = (mae_modelo / abs(pred)) * 100
             confianza = "alta" if err < 10 else "media" if err < 20 else "baja"
 
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        ahora = datetime.now()
+        timestamp = ahora.strftime("%Y-%m-%d %H:%M:%S")
 
-        historial_predicciones.append({
-            "timestamp": timestamp,
-            "entrada": datos.dict(),
-            "prediccion": pred,
-            "confianza": confianza
-        })
+        historial_predicciones.agregar(ahora.timestamp(), entrada, pred, confianza)
 
+        marcar(request, "fin_handler")
         return PrediccionRespuesta(
             precio_predicho=round(pred, 2),
             confianza=confianza,
             timestamp=timestamp
         )
 
+    except EjecutorSaturado as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -153,14 +354,16 @@ async def predecir_precio(datos: DatosCasa):
 # ============================================================
 
 @app.post("/predecir/lote")
-async def predecir_lote(lista: List[DatosCasa]):
+async def predecir_lote(request: Request, lista: List[DatosCasa], version: Optional[str] = Depends(version_solicitada)):
+    marcar(request, "validado")
+
     if modelo_actual is None:
         raise HTTPException(status_code=503, detail="Modelo no cargado.")
 
     try:
         X = np.array([[d.tamano, d.habitaciones, d.banos, d.antiguedad] for d in lista])
-        X_norm = scaler_actual.transform(X)
-        preds = modelo_actual.predict(X_norm, verbose=0)
+        preds, _ = await predecir_matriz_async(X, version)
+        deriva.actualizar(X)
 
         salida = []
 
@@ -168,19 +371,81 @@ async def predecir_lote(lista: List[DatosCasa]):
             salida.append({
                 "indice": i,
                 "entrada": d.dict(),
-                "precio_predicho": round(float(preds[i][0]), 2)
+                "precio_predicho": round(float(preds[i]), 2)
             })
 
+        marcar(request, "fin_handler")
         return {
             "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "n_predicciones": len(salida),
             "predicciones": salida
         }
 
+    except EjecutorSaturado as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ============================================================
+# PREDICCIÓN EN STREAMING
+# ============================================================
+
+class RespuestaNDJSON(StreamingResponse):
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope, receive, send):
+        # El cuerpo de la petición se sigue leyendo mientras se escribe la
+        # respuesta, así que no puede haber otra tarea esperando en receive()
+        await self.stream_response(send)
+
+
+async def generar_predicciones_stream(request: Request, formato: str, version: Optional[str]):
+    lector = LectorFilas(formato)
+    indice = 0
+
+    async for lineas in leer_bloques(request.stream(), STREAM_FILAS_BLOQUE):
+        X = lector.parsear(lineas)
+        validas = filas_validas(X)
+
+        try:
+            preds, _ = await predecir_matriz_async(X[validas], version) if validas.any() else ([], None)
+        except EjecutorSaturado as e:
+            yield json.dumps({"error": str(e)}) + "\n"
+            return
+
+        deriva.actualizar(X[validas])
+
+        iter_preds = iter(preds)
+        salida = []
+        for ok in validas:
+            if ok:
+                salida.append(f'{{"indice":{indice},"precio_predicho":{round(float(next(iter_preds)), 2)}}}\n')
+            else:
+                salida.append(f'{{"indice":{indice},"error":"Fila inválida"}}\n')
+            indice += 1
+
+        yield "".join(salida)
+
+
+@app.post("/predecir/stream")
+async def predecir_stream(request: Request, version: Optional[str] = Depends(version_solicitada)):
+    """
+    Predicción de lotes muy grandes en streaming.
+
+    Acepta un cuerpo NDJSON (una casa por línea) o CSV (`Content-Type: text/csv`)
+    y devuelve una línea NDJSON por fila con su `indice` y `precio_predicho`
+    (o `error` si la fila no es válida). No se devuelven los datos de entrada.
+    """
+    if modelo_actual is None or scaler_actual is None:
+        raise HTTPException(status_code=503, detail="Modelo no cargado.")
+
+    tipo = request.headers.get("content-type", "")
+    formato = "csv" if "csv" in tipo else "ndjson"
+
+    return RespuestaNDJSON(generar_predicciones_stream(request, formato, version))
+
+
 # ============================================================
 # MONITORIZACIÓN
 # ============================================================
@@ -191,22 +456,108 @@ async def monitorizar():
         raise HTTPException(status_code=503, detail="Modelo no cargado.")
 
     return {
+        "version": version_actual,
+        "motor": MOTOR_INFERENCIA,
         "metricas": metadata_actual.get("metricas", {}),
-        "total_predicciones": len(historial_predicciones)
+        "total_predicciones": historial_predicciones.total,
+        "inferencia": ejecutor.estado(),
+        "cache": cache_predicciones.estado(),
+        "latencias": metricas.resumen("latencia_etapa_segundos", "etapa"),
+        "tamano_lote": hist_tamano_lote.resumen(),
+        "colas": metricas.resumen("profundidad_cola", "cola"),
+        "deriva": deriva.resumen()
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(metricas.prometheus(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/monitorizar/historial")
-async def historial(n: int = 100):
-    return historial_predicciones[-n:]
+async def historial(n: int = Query(100, ge=1)):
+    return historial_predicciones.a_columnas(n)
 
 
 # ============================================================
 # REENTRENAMIENTO
 # ============================================================
 
-@app.post("/reentrenar")
-async def reentrenar(datos: DatosReentrenamiento):
+gestor_trabajos = GestorTrabajos(max_pendientes=REENTRENAMIENTO_COLA_MAX)
+
+
+def componentes_entrenamiento():
+    """Modelo Keras, scaler de sklearn y metadata de la versión activa."""
+    if MOTOR_INFERENCIA != "numpy":
+        modelo, scaler, metadata = componentes()
+        return modelo.modelo, scaler, metadata
+
+    # El motor NumPy solo sirve predicciones: para entrenar se carga
+    # desde disco el modelo Keras de la misma versión
+    modelo, scaler = registro.cargar_keras(version_actual)
+    return modelo, scaler, metadata_actual
+
+
+def entrenar_modelo(X: np.ndarray, y: np.ndarray, epochs: int, activar: bool) -> dict:
+    # TensorFlow y sklearn solo se importan al entrenar, para que el arranque
+    # con MOTOR_INFERENCIA=numpy no tenga que cargarlos
+    from tensorflow import keras
+    from sklearn.model_selection import train_test_split
+    from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
+
+    # Se entrena una copia: el modelo que sirve predicciones no se toca
+    # hasta que el nuevo está entrenado, evaluado y guardado
+    modelo_base, scaler, metadata_base = componentes_entrenamiento()
+    modelo = keras.models.clone_model(modelo_base)
+    modelo.set_weights(modelo_base.get_weights())
+    modelo.compile_from_config(modelo_base.get_compile_config())
+
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2)
+    # Referencia para la deriva: las entradas sin escalar de entrenamiento
+    distribucion = distribucion_referencia(X_train)
+
+    X_train = scaler.transform(X_train)
+    X_test = scaler.transform(X_test)
+
+    modelo.fit(
+        X_train, y_train,
+        epochs=epochs,
+        batch_size=max(1, min(32, len(X_train) // 4)),
+        validation_split=0.2,
+        verbose=0
+    )
+
+    y_pred = modelo.predict(X_test, verbose=0)
+
+    mse = mean_squared_error(y_test, y_pred)
+    mae = mean_absolute_error(y_test, y_pred)
+    r2 = r2_score(y_test, y_pred)
+
+    metadata = dict(metadata_base)
+    metadata["metricas"] = {
+        "mse": float(mse),
+        "mae": float(mae),
+        "r2": float(r2)
+    }
+    metadata["fecha_entrenamiento"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    metadata["distribucion_entrenamiento"] = distribucion
+
+    version = registro.registrar(modelo, scaler, metadata)
+
+    if activar:
+        registro.activar(version)
+        # Cambio en caliente: las siguientes predicciones ya usan el modelo nuevo
+        cargada = obtener_caliente(version)
+        activar_version(version, cargada.modelo, cargada.scaler, cargada.metadata)
+
+    return {"version": version, "activada": activar, "metricas": metadata["metricas"]}
+
+
+@app.post("/reentrenar", status_code=202)
+async def reentrenar(
+    datos: DatosReentrenamiento,
+    activar: bool = Query(True, description="Servir la nueva versión por defecto al terminar")
+):
 
     if modelo_actual is None:
         raise HTTPException(status_code=500, detail="Modelo no cargado.")
@@ -217,50 +568,51 @@ async def reentrenar(datos: DatosReentrenamiento):
     if len(datos.datos) != len(datos.precios):
         raise HTTPException(status_code=400, detail="Los datos y precios no coinciden.")
 
+    X = np.array([[d.tamano, d.habitaciones, d.banos, d.antiguedad] for d in datos.datos])
+    y = np.array(datos.precios)
+
     try:
-        X = np.array([[d.tamano, d.habitaciones, d.banos, d.antiguedad] for d in datos.datos])
-        y = np.array(datos.precios)
+        trabajo = gestor_trabajos.lanzar(entrenar_modelo, X, y, datos.epochs, activar)
+    except TrabajosSaturados as e:
+        raise HTTPException(status_code=503, detail=str(e))
 
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2)
+    return {
+        "status": "aceptado",
+        "job_id": trabajo["job_id"],
+        "mensaje": "Reentrenamiento en cola. Consulta el estado en /reentrenar/{job_id}."
+    }
 
-        X_train = scaler_actual.transform(X_train)
-        X_test = scaler_actual.transform(X_test)
 
-        modelo_actual.fit(
-            X_train, y_train,
-            epochs=datos.epochs,
-            batch_size=max(1, min(32, len(X_train) // 4)),
-            validation_split=0.2,
-            verbose=0
-        )
+@app.get("/reentrenar/{job_id}")
+async def estado_reentrenamiento(job_id: str):
+    trabajo = gestor_trabajos.obtener(job_id)
+    if trabajo is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado.")
+    return trabajo
 
-        y_pred = modelo_actual.predict(X_test, verbose=0)
 
-        mse = mean_squared_error(y_test, y_pred)
-        mae = mean_absolute_error(y_test, y_pred)
-        r2 = r2_score(y_test, y_pred)
-
-        metadata_actual["metricas"] = {
-            "mse": float(mse),
-            "mae": float(mae),
-            "r2": float(r2)
-        }
+# ============================================================
+# VERSIONES DEL MODELO
+# ============================================================
 
-        metadata_actual["fecha_entrenamiento"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+@app.get("/modelos")
+async def listar_versiones():
+    return {"version_actual": version_actual, **registro.estado()}
 
-        modelo_actual.save("modelos/modelo_precios.keras")
 
-        with open("modelos/metadata.json", "w") as f:
-            json.dump(metadata_actual, f, indent=2)
+@app.post("/modelos/{version}/activar")
+async def activar_modelo(version: str):
+    if not registro.existe(version):
+        raise HTTPException(status_code=404, detail=f"No existe la versión {version}.")
 
-        return {
-            "status": "ok",
-            "metricas": metadata_actual["metricas"],
-            "mensaje": "Reentrenamiento completado."
-        }
+    try:
+        cargada = await ejecutor.ejecutar(obtener_caliente, version)
+    except EjecutorSaturado as e:
+        raise HTTPException(status_code=503, detail=str(e))
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    registro.activar(version)
+    activar_version(cargada.version, cargada.modelo, cargada.scaler, cargada.metadata)
+    return {"status": "ok", "version_actual": version_actual}
 
 
 # ============================================================
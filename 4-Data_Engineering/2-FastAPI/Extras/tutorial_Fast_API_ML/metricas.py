@@ -0,0 +1,208 @@
+"""
+metricas.py
+
+Instrumentación ligera del servicio: histogramas de cubetas fijas.
+
+Cada histograma reserva sus contadores una sola vez; observar un valor solo
+busca la cubeta e incrementa un contador, sin crear objetos por petición.
+Los histogramas se exponen en formato de texto de Prometheus (`/metrics`) y
+se resumen con percentiles aproximados (p50/p95/p99) en `/monitorizar`.
+"""
+
+import bisect
+import threading
+import time
+from typing import Dict, Optional, Sequence, Tuple
+
+
+CUBETAS_LATENCIA = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+CUBETAS_TAMANO = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+
+
+class Histograma:
+    """
+    Histograma acumulativo al estilo Prometheus.
+
+    Args:
+        limites: límites superiores de las cubetas (se añade +Inf al final)
+    """
+
+    def __init__(self, limites: Sequence[float]):
+        self.limites = tuple(sorted(limites))
+        self.cuentas = [0] * (len(self.limites) + 1)
+        self.suma = 0.0
+        self.n = 0
+        # Se observa tanto desde el event loop como desde los hilos de inferencia
+        self._lock = threading.Lock()
+
+    def observar(self, valor: float):
+        i = bisect.bisect_left(self.limites, valor)
+        with self._lock:
+            self.cuentas[i] += 1
+            self.suma += valor
+            self.n += 1
+
+    def percentil(self, q: float) -> Optional[float]:
+        """Percentil `q` (0-1) interpolando dentro de la cubeta, como `histogram_quantile`."""
+        if self.n == 0:
+            return None
+
+        objetivo = q * self.n
+        acumulado = 0
+        for i, cuenta in enumerate(self.cuentas):
+            if acumulado + cuenta >= objetivo and cuenta > 0:
+                if i == len(self.limites):
+                    return self.limites[-1]
+                inferior = self.limites[i - 1] if i > 0 else 0.0
+                fraccion = (objetivo - acumulado) / cuenta
+                return inferior + (self.limites[i] - inferior) * fraccion
+            acumulado += cuenta
+        return self.limites[-1]
+
+    def resumen(self) -> dict:
+        return {
+            "n": self.n,
+            "media": self.suma / self.n if self.n else None,
+            "p50": self.percentil(0.50),
+            "p95": self.percentil(0.95),
+            "p99": self.percentil(0.99)
+        }
+
+
+class Metricas:
+    """Conjunto de histogramas identificados por nombre y etiquetas."""
+
+    def __init__(self):
+        self._histogramas: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Histograma] = {}
+        self._ayudas: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def histograma(self, nombre: str, ayuda: str, limites: Sequence[float], **etiquetas: str) -> Histograma:
+        """Devuelve el histograma `nombre{etiquetas}`, creándolo la primera vez."""
+        clave = (nombre, tuple(sorted(etiquetas.items())))
+        histograma = self._histogramas.get(clave)
+        if histograma is None:
+            with self._lock:
+                histograma = self._histogramas.setdefault(clave, Histograma(limites))
+                self._ayudas.setdefault(nombre, ayuda)
+        return histograma
+
+    def prometheus(self) -> str:
+        """Todos los histogramas en formato de exposición de texto de Prometheus."""
+        lineas = []
+        por_nombre = {}
+        for (nombre, etiquetas), histograma in list(self._histogramas.items()):
+            por_nombre.setdefault(nombre, []).append((etiquetas, histograma))
+
+        for nombre, series in por_nombre.items():
+            lineas.append(f"# HELP {nombre} {self._ayudas[nombre]}")
+            lineas.append(f"# TYPE {nombre} histogram")
+            for etiquetas, histograma in series:
+                base = "".join(f'{k}="{v}",' for k, v in etiquetas)
+                acumulado = 0
+                for limite, cuenta in zip(histograma.limites + ("+Inf",), histograma.cuentas):
+                    acumulado += cuenta
+                    lineas.append(f'{nombre}_bucket{{{base}le="{limite}"}} {acumulado}')
+                sufijo = "{" + base.rstrip(",") + "}" if base else ""
+                lineas.append(f"{nombre}_sum{sufijo} {histograma.suma}")
+                lineas.append(f"{nombre}_count{sufijo} {histograma.n}")
+
+        return "\n".join(lineas) + "\n"
+
+    def resumen(self, nombre: str, etiqueta: str) -> dict:
+        """Percentiles de todas las series de `nombre`, indexadas por `etiqueta`."""
+        return {
+            dict(etiquetas).get(etiqueta, ""): histograma.resumen()
+            for (n, etiquetas), histograma in list(self._histogramas.items())
+            if n == nombre
+        }
+
+
+# ============================================================
+# TIEMPOS POR PETICIÓN
+# ============================================================
+
+# Claves de los instantes en `scope["state"]`: el servidor ASGI ya crea ese
+# diccionario en cada petición (es el que usa `request.state`), así que
+# guardarlos ahí no reserva nada nuevo
+CLAVES_EVENTO = {
+    "validado": "metricas_validado",
+    "fin_handler": "metricas_fin_handler",
+}
+_CLAVE_VALIDADO = CLAVES_EVENTO["validado"]
+_CLAVE_FIN_HANDLER = CLAVES_EVENTO["fin_handler"]
+
+
+def marcar(request, evento: str):
+    """
+    Anota el instante de `evento` en la petición `request`.
+
+    Los endpoints llaman a `marcar(request, "validado")` al empezar (FastAPI
+    ya ha leído y validado el cuerpo) y a `marcar(request, "fin_handler")`
+    antes de devolver la respuesta, que FastAPI serializa después.
+    """
+    scope = request.scope
+    estado = scope.get("state")
+    if estado is None:
+        estado = scope["state"] = {}
+    estado[CLAVES_EVENTO[evento]] = time.perf_counter()
+
+
+class MiddlewareLatencias:
+    """
+    Middleware ASGI que mide cada petición y sus etapas de entrada y salida.
+
+    - `entrada`: desde que llega la petición hasta `marcar(request, "validado")`
+      (lectura del cuerpo, enrutado y validación de Pydantic)
+    - `serializacion`: desde `marcar(request, "fin_handler")` hasta que la
+      aplicación termina de entregar la respuesta al servidor (serializarla
+      y pasar cabecera y cuerpo a `send`)
+
+    No envuelve `send` ni crea objetos por petición: el inicio es una
+    variable local y los instantes de las etapas se leen de `scope["state"]`.
+    """
+
+    def __init__(self, app, metricas: Metricas):
+        self.app = app
+        self.metricas = metricas
+        self.entrada = metricas.histograma(
+            "latencia_etapa_segundos", "Duración de cada etapa de una predicción",
+            CUBETAS_LATENCIA, etapa="entrada"
+        )
+        self.serializacion = metricas.histograma(
+            "latencia_etapa_segundos", "Duración de cada etapa de una predicción",
+            CUBETAS_LATENCIA, etapa="serializacion"
+        )
+        self._por_ruta = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            fin = time.perf_counter()
+
+            estado = scope.get("state")
+            if estado:
+                validado = estado.get(_CLAVE_VALIDADO)
+                if validado is not None:
+                    self.entrada.observar(validado - inicio)
+                fin_handler = estado.get(_CLAVE_FIN_HANDLER)
+                if fin_handler is not None:
+                    self.serializacion.observar(fin - fin_handler)
+
+            ruta = getattr(scope.get("route"), "path", "desconocida")
+            histograma = self._por_ruta.get(ruta)
+            if histograma is None:
+                histograma = self._por_ruta[ruta] = self.metricas.histograma(
+                    "latencia_peticion_segundos", "Duración total de cada petición por ruta",
+                    CUBETAS_LATENCIA, ruta=ruta
+                )
+            histograma.observar(fin - inicio)
@@ -0,0 +1,114 @@
+"""
+microlotes.py
+
+Agrupador de peticiones concurrentes en micro-lotes.
+
+Cada llamada a `predict` de Keras tiene un coste fijo mucho mayor que el de
+procesar una fila de 4 características. Este módulo junta las filas que llegan
+a la vez (hasta `max_lote` filas o `max_espera_ms` milisegundos) y hace una
+sola llamada sobre la matriz apilada, devolviendo a cada petición su resultado.
+
+La función de predicción devuelve también un contexto del lote (p. ej. la
+metadata del modelo que lo ha calculado), que recibe cada fila junto con su
+predicción: así se obtiene en la misma llamada, fuera del event loop.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, List, Sequence, Tuple
+
+import numpy as np
+
+
+class AgrupadorPredicciones:
+    """
+    Cola de micro-lotes para predicciones fila a fila.
+
+    Args:
+        funcion_prediccion: corrutina que recibe una matriz (n, 4) y devuelve
+            (n predicciones, contexto del lote)
+        max_lote: número máximo de filas por llamada al modelo
+        max_espera_ms: tiempo máximo que espera la primera fila del lote
+    """
+
+    def __init__(
+        self,
+        funcion_prediccion: Callable[[np.ndarray], Awaitable[Tuple[Sequence[float], Any]]],
+        max_lote: int = 32,
+        max_espera_ms: float = 5.0,
+    ):
+        self.funcion_prediccion = funcion_prediccion
+        self.max_lote = max(1, max_lote)
+        self.max_espera = max(0.0, max_espera_ms) / 1000
+        self._loop = None
+        self._cola = None
+        self._tarea = None
+        self._en_curso = set()
+
+    def _asegurar_tarea(self):
+        # La cola y la tarea pertenecen al event loop que las crea.
+        # Si el loop cambia (p. ej. TestClient), se vuelven a crear.
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._tarea is None or self._tarea.done():
+            self._loop = loop
+            self._cola = asyncio.Queue()
+            self._tarea = loop.create_task(self._bucle())
+
+    @property
+    def pendientes(self) -> int:
+        return self._cola.qsize() if self._cola is not None else 0
+
+    async def predecir(self, fila: Sequence[float]) -> Tuple[float, Any]:
+        """Encola una fila y espera su predicción y el contexto de su lote."""
+        self._asegurar_tarea()
+        futuro = self._loop.create_future()
+        await self._cola.put((fila, futuro))
+        return await futuro
+
+    async def _recoger_lote(self) -> List[Tuple[Sequence[float], asyncio.Future]]:
+        lote = [await self._cola.get()]
+        limite = self._loop.time() + self.max_espera
+
+        while len(lote) < self.max_lote:
+            # Si ya hay filas esperando, se cogen sin esperar
+            if not self._cola.empty():
+                lote.append(self._cola.get_nowait())
+                continue
+
+            restante = limite - self._loop.time()
+            if restante <= 0:
+                break
+            try:
+                lote.append(await asyncio.wait_for(self._cola.get(), restante))
+            except asyncio.TimeoutError:
+                break
+
+        return lote
+
+    async def _bucle(self):
+        while True:
+            lote = await self._recoger_lote()
+            # Cada lote se resuelve en su propia tarea para que el siguiente
+            # se pueda ir formando mientras el modelo calcula el actual
+            tarea = self._loop.create_task(self._resolver(lote))
+            self._en_curso.add(tarea)
+            tarea.add_done_callback(self._en_curso.discard)
+
+    async def _resolver(self, lote: List[Tuple[Sequence[float], asyncio.Future]]):
+        lote = [(fila, futuro) for fila, futuro in lote if not futuro.cancelled()]
+        if not lote:
+            return
+
+        X = np.array([fila for fila, _ in lote], dtype=np.float64)
+
+        try:
+            preds, contexto = await self.funcion_prediccion(X)
+            preds = np.asarray(preds).reshape(-1)
+        except Exception as e:
+            for _, futuro in lote:
+                if not futuro.done():
+                    futuro.set_exception(e)
+            return
+
+        for (_, futuro), pred in zip(lote, preds):
+            if not futuro.done():
+                futuro.set_result((float(pred), contexto))
@@ -0,0 +1,130 @@
+"""
+motor_numpy.py
+
+Motor de inferencia en NumPy puro para la red densa de precios.
+
+El modelo es un perceptrón pequeño (4 -> 64 -> 32 -> 1), así que no hace
+falta TensorFlow para servir predicciones: basta con exportar los pesos de
+cada capa `Dense`, su activación y los parámetros del `StandardScaler` a un
+`.npz` y hacer el paso hacia delante con productos de matrices.
+
+Exportar y comprobar que coincide con Keras:
+
+    python motor_numpy.py modelos/modelo_precios.keras scaler.pkl modelos/modelo_precios.npz
+"""
+
+import sys
+
+import numpy as np
+
+
+ACTIVACIONES = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0),
+    "sigmoid": lambda x: 1 / (1 + np.exp(-x)),
+    "tanh": np.tanh,
+    "softplus": lambda x: np.logaddexp(x, 0),
+}
+
+
+def exportar(modelo, scaler, ruta_npz: str):
+    """
+    Guarda en `ruta_npz` los pesos de un modelo Keras secuencial de capas
+    `Dense` y la media/escala de su `StandardScaler`.
+
+    Raises:
+        ValueError: si el modelo tiene capas o activaciones no soportadas
+    """
+    pesos = {}
+    activaciones = []
+
+    for i, capa in enumerate(modelo.layers):
+        if type(capa).__name__ != "Dense":
+            raise ValueError(f"Capa no soportada: {capa.name} ({type(capa).__name__})")
+
+        config = capa.get_config()
+        if config["activation"] not in ACTIVACIONES:
+            raise ValueError(f"Activación no soportada: {config['activation']}")
+
+        W, *b = capa.get_weights()
+        pesos[f"W{i}"] = W.astype(np.float32)
+        pesos[f"b{i}"] = (b[0] if b else np.zeros(W.shape[1])).astype(np.float32)
+        activaciones.append(config["activation"])
+
+    np.savez(
+        ruta_npz,
+        activaciones=np.array(activaciones),
+        media=np.asarray(scaler.mean_, dtype=np.float64),
+        escala=np.asarray(scaler.scale_, dtype=np.float64),
+        **pesos
+    )
+
+
+class EscaladorNumpy:
+    """Equivalente a `StandardScaler.transform` a partir de media y escala."""
+
+    def __init__(self, media: np.ndarray, escala: np.ndarray):
+        self.mean_ = media
+        self.scale_ = escala
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        return (np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_
+
+
+class ModeloNumpy:
+    """
+    Red densa cargada desde un `.npz` de `exportar`.
+
+    `predict` tiene la misma firma que en Keras, así que se puede usar en su
+    lugar sin cambiar el código que lo llama.
+    """
+
+    def __init__(self, capas):
+        self.capas = capas
+
+    @classmethod
+    def cargar(cls, ruta_npz: str):
+        """Devuelve `(modelo, escalador)` leídos de `ruta_npz`."""
+        with np.load(ruta_npz) as datos:
+            capas = [
+                (datos[f"W{i}"], datos[f"b{i}"], ACTIVACIONES[str(nombre)])
+                for i, nombre in enumerate(datos["activaciones"])
+            ]
+            escalador = EscaladorNumpy(datos["media"], datos["escala"])
+        return cls(capas), escalador
+
+    def predict(self, X: np.ndarray, batch_size=None, verbose=0) -> np.ndarray:
+        h = np.asarray(X, dtype=np.float32)
+        for W, b, activacion in self.capas:
+            h = activacion(h @ W + b)
+        return h
+
+
+def comprobar_paridad(modelo, ruta_npz: str, n: int = 1000, semilla: int = 0) -> float:
+    """Máxima diferencia relativa entre Keras y NumPy sobre `n` filas aleatorias."""
+    modelo_np, _ = ModeloNumpy.cargar(ruta_npz)
+    X = np.random.default_rng(semilla).normal(size=(n, modelo.input_shape[-1])).astype(np.float32)
+
+    esperado = modelo.predict(X, batch_size=n, verbose=0)
+    obtenido = modelo_np.predict(X)
+    return float(np.max(np.abs(esperado - obtenido) / np.maximum(np.abs(esperado), 1.0)))
+
+
+if __name__ == "__main__":
+    import pickle
+
+    from tensorflow import keras
+
+    por_defecto = ["modelos/modelo_precios.keras", "scaler.pkl", "modelos/modelo_precios.npz"]
+    argumentos = sys.argv[1:4]
+    ruta_keras, ruta_scaler, ruta_npz = argumentos + por_defecto[len(argumentos):]
+
+    modelo = keras.models.load_model(ruta_keras)
+    with open(ruta_scaler, "rb") as f:
+        scaler = pickle.load(f)
+
+    exportar(modelo, scaler, ruta_npz)
+    diferencia = comprobar_paridad(modelo, ruta_npz)
+
+    print(f"Exportado {ruta_npz} (diferencia relativa máxima con Keras: {diferencia:.2e})")
+    sys.exit(0 if diferencia < 1e-4 else 1)
@@ -0,0 +1,236 @@
+"""
+registro.py
+
+Registro de versiones del modelo (modelo + scaler + metadata).
+
+Cada versión vive en su propia carpeta dentro de `modelos/versiones/`:
+
+    modelos/versiones/
+    ├── ACTIVA              # nombre de la versión que sirve por defecto
+    ├── v1/
+    │   ├── modelo.keras
+    │   ├── modelo.npz      # pesos para el motor NumPy
+    │   ├── scaler.pkl
+    │   └── metadata.json
+    └── v2/ ...
+
+El modelo original, entrenado en el notebook, es la versión "base". Sus
+archivos no están en `versiones/` sino donde los dejó el notebook
+(RUTAS_BASE), pero se carga, se activa y se pide igual que las demás, así
+que siempre se puede volver a él.
+
+Las versiones se cargan en memoria la primera vez que se piden y se
+descartan (la menos usada recientemente primero) cuando se supera el
+presupuesto de memoria.
+"""
+
+import json
+import os
+import pickle
+import shutil
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Sequence
+
+from compilado import CUBETAS_POR_DEFECTO, ModeloCompilado
+from motor_numpy import ModeloNumpy, exportar
+
+
+VERSION_BASE = "base"
+
+# Archivos de la versión "base". Para el modelo Keras se usa el primero que exista
+RUTAS_BASE = {
+    "keras": ("modelos/modelo_precios.keras", "modelos/modelo_precios.h5"),
+    "npz": "modelos/modelo_precios.npz",
+    "scaler": "scaler.pkl",
+    "metadata": "modelos/metadata.json",
+}
+
+
+class VersionCargada:
+    """Modelo, scaler y metadata de una versión ya cargada en memoria."""
+
+    def __init__(self, version: str, modelo, scaler, metadata: dict, tamano_bytes: int):
+        self.version = version
+        self.modelo = modelo
+        self.scaler = scaler
+        self.metadata = metadata
+        self.tamano_bytes = tamano_bytes
+
+
+class RegistroModelos:
+    """
+    Args:
+        directorio: carpeta donde se guardan las versiones
+        memoria_max_mb: presupuesto para las versiones cargadas; el tamaño de
+            cada una se estima con el tamaño de sus archivos en disco
+        motor: "keras" o "numpy", con qué se cargan los modelos
+        cubetas: tamaños de lote de la función compilada (motor "keras")
+        rutas_base: archivos de la versión "base"
+    """
+
+    def __init__(
+        self,
+        directorio: str = "modelos/versiones",
+        memoria_max_mb: float = 256,
+        motor: str = "keras",
+        cubetas: Sequence[int] = CUBETAS_POR_DEFECTO,
+        rutas_base: dict = RUTAS_BASE
+    ):
+        self.directorio = directorio
+        self.rutas_base = rutas_base
+        self.motor = motor
+        self.cubetas = cubetas
+        self.memoria_max = memoria_max_mb * 1024 * 1024
+        self._cargadas = OrderedDict()
+        self._lock = threading.Lock()
+        self._lock_escritura = threading.Lock()
+
+    def ruta(self, *partes: str) -> str:
+        return os.path.join(self.directorio, *partes)
+
+    def versiones_registradas(self) -> List[str]:
+        """Versiones guardadas en el directorio (v1, v2, ...), sin "base"."""
+        if not os.path.isdir(self.directorio):
+            return []
+        nombres = [n for n in os.listdir(self.directorio) if n.startswith("v") and n[1:].isdigit()]
+        return sorted(nombres, key=lambda n: int(n[1:]))
+
+    def versiones(self) -> List[str]:
+        base = [VERSION_BASE] if self.existe(VERSION_BASE) else []
+        return base + self.versiones_registradas()
+
+    def archivos(self, version: str) -> dict:
+        """Rutas de los archivos de una versión: keras, npz, scaler y metadata."""
+        if version == VERSION_BASE:
+            candidatos = self.rutas_base["keras"]
+            keras = next((r for r in candidatos if os.path.exists(r)), candidatos[0])
+            return {**self.rutas_base, "keras": keras}
+        return {
+            "keras": self.ruta(version, "modelo.keras"),
+            "npz": self.ruta(version, "modelo.npz"),
+            "scaler": self.ruta(version, "scaler.pkl"),
+            "metadata": self.ruta(version, "metadata.json"),
+        }
+
+    def existe(self, version: str) -> bool:
+        # Solo nombres de versión válidos: "base" o vN (nunca rutas)
+        if version != VERSION_BASE and not (version.startswith("v") and version[1:].isdigit()):
+            return False
+        archivos = self.archivos(version)
+        modelo = archivos["npz"] if self.motor == "numpy" else archivos["keras"]
+        return os.path.exists(modelo) and os.path.exists(archivos["scaler"])
+
+    @property
+    def activa(self) -> Optional[str]:
+        try:
+            with open(self.ruta("ACTIVA")) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def obtener(self, version: str) -> VersionCargada:
+        """
+        Devuelve una versión, cargándola desde disco si no está en memoria.
+
+        Raises:
+            FileNotFoundError: si la versión no existe
+        """
+        with self._lock:
+            cargada = self._cargadas.get(version)
+            if cargada is not None:
+                self._cargadas.move_to_end(version)
+                return cargada
+
+            cargada = self._cargar(version)
+            self._cargadas[version] = cargada
+            self._liberar_memoria()
+            return cargada
+
+    def _cargar(self, version: str) -> VersionCargada:
+        if not self.existe(version):
+            raise FileNotFoundError(f"No existe la versión {version}.")
+
+        archivos = self.archivos(version)
+        if self.motor == "numpy":
+            modelo, scaler = ModeloNumpy.cargar(archivos["npz"])
+        else:
+            modelo, scaler = self.cargar_keras(version)
+            # Sin calentar: main.py la calienta al arrancar o al activarla; si
+            # no, cada cubeta se traza la primera vez que se usa
+            modelo = ModeloCompilado(modelo, self.cubetas)
+
+        metadata = {}
+        if os.path.exists(archivos["metadata"]):
+            with open(archivos["metadata"]) as f:
+                metadata = json.load(f)
+
+        tamano = sum(os.path.getsize(ruta) for ruta in archivos.values() if os.path.exists(ruta))
+        return VersionCargada(version, modelo, scaler, metadata, tamano)
+
+    def cargar_keras(self, version: str):
+        """Modelo Keras y scaler de sklearn de `version`, sin pasar por la caché."""
+        from tensorflow import keras
+
+        archivos = self.archivos(version)
+        if not os.path.exists(archivos["keras"]):
+            raise FileNotFoundError(f"No existe el modelo Keras de la versión {version}.")
+        modelo = keras.models.load_model(archivos["keras"])
+        with open(archivos["scaler"], "rb") as f:
+            scaler = pickle.load(f)
+        return modelo, scaler
+
+    def _liberar_memoria(self):
+        # Siempre se conserva al menos la versión recién usada
+        while len(self._cargadas) > 1 and self.memoria_usada() > self.memoria_max:
+            self._cargadas.popitem(last=False)
+
+    def memoria_usada(self) -> int:
+        return sum(c.tamano_bytes for c in self._cargadas.values())
+
+    def registrar(self, modelo, scaler, metadata: dict) -> str:
+        """Guarda una versión nueva y devuelve su nombre (v1, v2, ...)."""
+        with self._lock_escritura:
+            existentes = self.versiones_registradas()
+            version = f"v{int(existentes[-1][1:]) + 1}" if existentes else "v1"
+
+            # Se escribe en una carpeta temporal y se renombra al final, para
+            # que nunca se vea una versión a medio guardar
+            temporal = self.ruta(f".{version}.tmp")
+            shutil.rmtree(temporal, ignore_errors=True)
+            os.makedirs(temporal)
+
+            modelo.save(os.path.join(temporal, "modelo.keras"))
+            try:
+                exportar(modelo, scaler, os.path.join(temporal, "modelo.npz"))
+            except ValueError:
+                # Arquitectura no soportada por el motor NumPy: solo es un
+                # error si es el motor que se está usando
+                if self.motor == "numpy":
+                    raise
+            with open(os.path.join(temporal, "scaler.pkl"), "wb") as f:
+                pickle.dump(scaler, f)
+            with open(os.path.join(temporal, "metadata.json"), "w") as f:
+                json.dump(metadata, f, indent=2)
+
+            os.rename(temporal, self.ruta(version))
+            return version
+
+    def activar(self, version: str):
+        """Marca `version` como la versión por defecto al arrancar."""
+        if not self.existe(version):
+            raise FileNotFoundError(f"No existe la versión {version}.")
+
+        os.makedirs(self.directorio, exist_ok=True)
+        temporal = self.ruta("ACTIVA.tmp")
+        with open(temporal, "w") as f:
+            f.write(version)
+        os.replace(temporal, self.ruta("ACTIVA"))
+
+    def estado(self) -> dict:
+        return {
+            "versiones": self.versiones(),
+            "activa": self.activa,
+            "cargadas": list(self._cargadas),
+            "memoria_mb": round(self.memoria_usada() / (1024 * 1024), 2)
+        }
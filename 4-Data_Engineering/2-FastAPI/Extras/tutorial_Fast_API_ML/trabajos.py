@@ -0,0 +1,103 @@
+"""
+trabajos.py
+
+Trabajos de reentrenamiento en segundo plano.
+
+El reentrenamiento puede durar muchos epochs, así que no se hace dentro de la
+petición: `/reentrenar` registra un trabajo, responde enseguida con su `job_id`
+y el entrenamiento se ejecuta en un hilo propio, separado del pool de
+inferencia. El estado se consulta después con `/reentrenar/{job_id}`.
+
+Cada reentrenamiento ocupa el hilo durante todos sus epochs y guarda una
+versión nueva en el registro, así que la cola está acotada: con
+`max_pendientes` trabajos sin terminar, los nuevos se rechazan
+(`TrabajosSaturados`) en lugar de acumularse sin límite.
+"""
+
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Optional
+
+
+def _ahora() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+class TrabajosSaturados(Exception):
+    """Se lanza cuando ya hay demasiados trabajos esperando o en curso."""
+
+
+class GestorTrabajos:
+    """
+    Cola de trabajos ejecutados de uno en uno.
+
+    Args:
+        max_guardados: número de trabajos cuyo estado se conserva
+        max_pendientes: trabajos sin terminar (en cola o en curso) admitidos
+    """
+
+    def __init__(self, max_guardados: int = 100, max_pendientes: int = 4):
+        self.max_guardados = max(1, max_guardados)
+        self.max_pendientes = max(1, max_pendientes)
+        self.pendientes = 0
+        self._trabajos = OrderedDict()
+        # El contador se decrementa desde el hilo del pool: necesita lock
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reentrenamiento")
+
+    def lanzar(self, funcion: Callable[..., dict], *args) -> dict:
+        """
+        Registra un trabajo y lo pone en cola.
+
+        `funcion(*args)` debe devolver un diccionario (p. ej. con las métricas
+        del modelo entrenado) que se añade al estado del trabajo; si lanza una
+        excepción el trabajo queda en "error".
+
+        Raises:
+            TrabajosSaturados: si ya hay `max_pendientes` trabajos sin terminar
+        """
+        with self._lock:
+            if self.pendientes >= self.max_pendientes:
+                raise TrabajosSaturados(
+                    "Hay demasiados reentrenamientos pendientes. Inténtalo más tarde."
+                )
+            self.pendientes += 1
+
+        trabajo = {
+            "job_id": uuid.uuid4().hex,
+            "estado": "pendiente",
+            "creado": _ahora(),
+            "iniciado": None,
+            "finalizado": None,
+            "metricas": None,
+            "error": None
+        }
+
+        self._trabajos[trabajo["job_id"]] = trabajo
+        while len(self._trabajos) > self.max_guardados:
+            self._trabajos.popitem(last=False)
+
+        self._pool.submit(self._ejecutar, trabajo, funcion, args)
+        return dict(trabajo)
+
+    def obtener(self, job_id: str) -> Optional[dict]:
+        trabajo = self._trabajos.get(job_id)
+        return dict(trabajo) if trabajo is not None else None
+
+    def _ejecutar(self, trabajo: dict, funcion: Callable[..., dict], args: tuple):
+        trabajo["estado"] = "en_curso"
+        trabajo["iniciado"] = _ahora()
+
+        try:
+            trabajo.update(funcion(*args))
+            trabajo["estado"] = "completado"
+        except Exception as e:
+            trabajo["error"] = str(e)
+            trabajo["estado"] = "error"
+        finally:
+            trabajo["finalizado"] = _ahora()
+            with self._lock:
+                self.pendientes -= 1
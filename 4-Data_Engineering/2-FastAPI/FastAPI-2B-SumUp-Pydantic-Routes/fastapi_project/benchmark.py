@@ -0,0 +1,126 @@
+# Benchmark de las altas (POST) en la base de datos en memoria.
+#
+# Mide cuántos usuarios y posts por segundo se crean a medida que las
+# tablas crecen hasta millones de filas, llamando directamente a las
+# funciones de los routers (sin HTTP, para medir solo el almacenamiento).
+# También mide lo que costaba el cálculo anterior del ID,
+# max(db.users.keys()) + 1, comprueba que varios hilos a la vez
+# nunca reciben el mismo ID y compara buscar los posts de un usuario
+# con el índice posts_by_user frente a recorrer todos los posts.
+#
+# Se ejecuta desde la carpeta que contiene fastapi_project:
+#     python -m fastapi_project.benchmark
+#     python -m fastapi_project.benchmark --sizes 0 100000 1000000 --creates 20000
+
+import argparse
+import asyncio
+import sys
+import threading
+import time
+
+from fastapi_project.db import db
+from fastapi_project.routers import posts, users
+from fastapi_project.schemas.post import Post, PostCreate
+from fastapi_project.schemas.user import User, UserCreate
+
+
+# Rellena las tablas hasta tener `size` filas en cada una.
+# Usamos model_construct (sin validación) para que sea rápido.
+def grow(size: int) -> None:
+    while len(db.users) < size:
+        new_id = db.users.next_id()
+        db.users[new_id] = User.model_construct(id=new_id, email=f"user{new_id}@example.com")
+    # Cada post es de un usuario distinto (en orden), como si cada
+    # usuario tuviera unos pocos posts
+    while len(db.posts) < size:
+        new_id = db.posts.next_id()
+        user_id = new_id % len(db.users) + 1
+        db.add_post(Post.model_construct(id=new_id, user=user_id, title=f"post {new_id}"))
+
+
+# Crea `n` usuarios y `n` posts con las funciones de los routers
+# y devuelve las altas por segundo.
+async def create_rows(n: int) -> float:
+    start = time.perf_counter()
+    for i in range(n):
+        user = await users.create(UserCreate(email=f"new{i}@example.com"))
+        await posts.create(PostCreate(user=user.id, title=f"new post {i}"))
+    return 2 * n / (time.perf_counter() - start)
+
+
+# Tiempo medio (en µs) del cálculo anterior del ID con el tamaño actual.
+def old_next_id_us(repeat: int = 5) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        max(db.users.keys() or (0,)) + 1
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+# Posts de un usuario con el índice (db.user_posts) y recorriendo todos
+# los posts como se hacía antes, y tiempo de borrarlo en cascada.
+def user_posts_ms(user_id: int) -> tuple[float, float, float]:
+    start = time.perf_counter()
+    indexed, _ = db.user_posts(user_id, limit=100)
+    index_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    scanned = [post for post in db.posts.values() if post.user == user_id][:100]
+    scan_ms = (time.perf_counter() - start) * 1000
+    assert indexed == scanned
+
+    start = time.perf_counter()
+    db.delete_user(user_id)
+    delete_ms = (time.perf_counter() - start) * 1000
+    return index_ms, scan_ms, delete_ms
+
+
+# Pide IDs desde varios hilos a la vez y comprueba que no se repite ninguno.
+def ids_are_unique(threads: int = 8, per_thread: int = 50_000) -> bool:
+    ids = []
+
+    def worker():
+        # list.extend con una lista ya creada es atómico
+        ids.extend([db.posts.next_id() for _ in range(per_thread)])
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for worker_thread in workers:
+        worker_thread.start()
+    for worker_thread in workers:
+        worker_thread.join()
+    return len(set(ids)) == threads * per_thread
+
+
+def main() -> bool:
+    parser = argparse.ArgumentParser(description="Altas por segundo según el tamaño de las tablas")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[0, 10_000, 100_000, 1_000_000, 2_000_000],
+                        help="Filas de cada tabla antes de medir")
+    parser.add_argument("--creates", type=int, default=10_000, help="Usuarios (y posts) creados en cada medida")
+    args = parser.parse_args()
+
+    print(f"{'filas':>10}{'altas/s':>12}{'max()+1 (µs/alta)':>20}")
+    rates = []
+    for size in args.sizes:
+        grow(size)
+        rows = len(db.users)
+        old_us = old_next_id_us()
+        # La mejor de 3 medidas, como timeit: así no cuentan las pausas
+        # del recolector de basura de Python, que no dependen de db.py
+        rates.append(max(asyncio.run(create_rows(args.creates)) for _ in range(3)))
+        print(f"{rows:>10}{rates[-1]:>12.0f}{old_us:>20.0f}")
+
+    index_ms, scan_ms, delete_ms = user_posts_ms(user_id=2)
+    print(f"\nPosts de un usuario con {len(db.posts)} posts en total:")
+    print(f"  índice posts_by_user: {index_ms:.3f} ms, recorriendo todos: {scan_ms:.1f} ms")
+    print(f"  borrar el usuario y sus posts: {delete_ms:.3f} ms")
+
+    # Plano: con las tablas más grandes se crea casi igual de rápido que vacías
+    flat = min(rates) > 0.7 * max(rates)
+    unique = ids_are_unique()
+    print("IDs únicos con 8 hilos:", "sí" if unique else "NO")
+    print("OK: las altas no dependen del tamaño de las tablas" if flat and unique
+          else "ERROR: las altas se frenan o se repiten IDs")
+    return flat and unique
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -1,18 +1,102 @@
+# Importamos itertools para generar IDs con un contador
+# y threading para proteger el contador con un lock.
+import itertools
+import threading
+
 # Importamos los esquemas (modelos Pydantic) de Post y User.
 # Estos modelos definen la estructura de los datos que se guardarán.
 from fastapi_project.schemas.post import Post
 from fastapi_project.schemas.user import User
 
 
+# Una "tabla" en memoria: un diccionario id -> objeto
+# que además sabe generar los IDs de sus filas nuevas.
+#
+# Antes el ID se calculaba con max(db.users.keys()) + 1:
+# - Recorre todas las claves en cada alta: con un millón de filas
+#   cada POST tarda milisegundos (coste O(n)).
+# - Dos peticiones a la vez pueden obtener el mismo ID.
+# - Si se borra la última fila, su ID se vuelve a usar.
+#
+# Con un contador por tabla, obtener el siguiente ID cuesta lo mismo
+# tenga la tabla 10 filas o 10 millones (coste O(1)).
+class Table(dict):
+    def __init__(self):
+        super().__init__()
+
+        # Contador de IDs: 1, 2, 3... Nunca retrocede,
+        # así que un ID borrado no se vuelve a usar.
+        self._ids = itertools.count(1)
+
+        # Un lock por tabla: solo se bloquea mientras se obtiene el ID,
+        # y las altas en users no esperan a las de posts.
+        self._lock = threading.Lock()
+
+    def next_id(self) -> int:
+        # Devuelve un ID nuevo, distinto aunque lo pidan varios hilos a la vez.
+        with self._lock:
+            return next(self._ids)
+
+
 # Creamos una clase que simula una base de datos en memoria.
 class DummyDatabase:
-    # Diccionario para almacenar usuarios.
-    # La clave es un entero (id del usuario) y el valor es un objeto User.
-    users: dict[int, User] = {}
+    def __init__(self):
+        # Tabla de usuarios.
+        # La clave es un entero (id del usuario) y el valor es un objeto User.
+        self.users: Table[int, User] = Table()
+
+        # Tabla de posts.
+        # La clave es un entero (id del post) y el valor es un objeto Post.
+        self.posts: Table[int, Post] = Table()
+
+        # Índice secundario: id de usuario -> ids de sus posts.
+        # Sin él, para encontrar los posts de un usuario hay que recorrer
+        # todos los posts. Cada valor es un dict con valores None que usamos
+        # como "conjunto ordenado": añadir y quitar un id cuesta O(1) y los
+        # ids quedan en orden de creación (para paginar).
+        self.posts_by_user: dict[int, dict[int, None]] = {}
+
+        # Las operaciones que tocan a la vez los posts y el índice
+        # se hacen con este lock, para que nunca queden desincronizados.
+        self._lock = threading.Lock()
+
+    def add_post(self, post: Post) -> None:
+        # Guarda el post y lo añade al índice de su usuario.
+        # Lanza KeyError si el usuario no existe.
+        with self._lock:
+            if post.user not in self.users:
+                raise KeyError(post.user)
+            self.posts[post.id] = post
+            self.posts_by_user.setdefault(post.user, {})[post.id] = None
+
+    def delete_post(self, id: int) -> Post:
+        # Elimina el post y lo quita del índice.
+        # Lanza KeyError si el post no existe.
+        with self._lock:
+            post = self.posts.pop(id)
+            user_posts = self.posts_by_user.get(post.user, {})
+            user_posts.pop(id, None)
+            if not user_posts:
+                self.posts_by_user.pop(post.user, None)
+            return post
+
+    def delete_user(self, id: int) -> User:
+        # Elimina el usuario y, en cascada, todos sus posts.
+        # Gracias al índice cuesta O(posts del usuario), sin recorrer todos.
+        # Lanza KeyError si el usuario no existe.
+        with self._lock:
+            user = self.users.pop(id)
+            for post_id in self.posts_by_user.pop(id, {}):
+                self.posts.pop(post_id, None)
+            return user
 
-    # Diccionario para almacenar posts.
-    # La clave es un entero (id del post) y el valor es un objeto Post.
-    posts: dict[int, Post] = {}
+    def user_posts(self, user_id: int, skip: int = 0, limit: int = 10) -> tuple[list[Post], int]:
+        # Devuelve una página de posts del usuario (por orden de creación)
+        # y el número total de posts que tiene.
+        with self._lock:
+            post_ids = self.posts_by_user.get(user_id, {})
+            page = itertools.islice(post_ids, skip, skip + limit)
+            return [self.posts[post_id] for post_id in page], len(post_ids)
 
 
 # Instancia única de DummyDatabase que actuará como "base de datos".
@@ -40,9 +40,19 @@ async def get(id: int) -> Post:
 # ---------------------------------
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def create(post_create: PostCreate) -> Post:
-    # Antes de crear un post, verificamos que el usuario exista.
+    # Pedimos un nuevo ID a la tabla de posts.
+    # Usa un contador (ver db.py): no recorre los posts existentes.
+    new_id = db.posts.next_id()
+
+    # Creamos el objeto Post, agregando el nuevo ID
+    # y los campos de PostCreate mediante .model_dump().
+    post = Post(id=new_id, **post_create.model_dump())
+
+    # Guardamos el post en la "base de datos" en memoria
+    # y lo añadimos al índice de posts de su usuario.
+    # add_post comprueba antes que el usuario exista.
     try:
-        db.users[post_create.user]
+        db.add_post(post)
     except KeyError:
         # Si el usuario no existe, devolvemos un error 400 (Bad Request).
         raise HTTPException(
@@ -50,17 +60,6 @@ async def create(post_create: PostCreate) -> Post:
             detail=f"User with id {post_create.user} doesn't exist.",
         )
 
-    # Generamos un nuevo ID para el post.
-    # max(...) obtiene el ID más alto; si está vacío, usamos 0.
-    new_id = max(db.posts.keys() or (0,)) + 1
-
-    # Creamos el objeto Post, agregando el nuevo ID
-    # y los campos de PostCreate mediante .model_dump().
-    post = Post(id=new_id, **post_create.model_dump())
-
-    # Guardamos el post en la "base de datos" en memoria.
-    db.posts[new_id] = post
-
     # Retornamos el post recién creado.
     return post
 
@@ -71,8 +70,8 @@ async def create(post_create: PostCreate) -> Post:
 @router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete(id: int) -> None:
     try:
-        # Eliminamos el post por ID.
-        db.posts.pop(id)
+        # Eliminamos el post por ID (y del índice de posts de su usuario).
+        db.delete_post(id)
     except KeyError:
         # Si el ID no existe, retornamos un error 404 (Not Found).
         raise HTTPException(status.HTTP_404_NOT_FOUND)
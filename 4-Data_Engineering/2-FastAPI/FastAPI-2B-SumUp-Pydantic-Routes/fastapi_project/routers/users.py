@@ -1,6 +1,8 @@
 # Importamos APIRouter para agrupar rutas relacionadas.
 # Importamos HTTPException y status para manejar errores HTTP.
-from fastapi import APIRouter, HTTPException, status
+# Importamos Query para validar los parámetros de paginación
+# y Response para añadir cabeceras a la respuesta.
+from fastapi import APIRouter, HTTPException, Query, Response, status
 
 # Importamos la base de datos en memoria (DummyDatabase).
 from fastapi_project.db import db
@@ -8,6 +10,9 @@ from fastapi_project.db import db
 # Importamos los modelos de usuario (Pydantic).
 from fastapi_project.schemas.user import User, UserCreate
 
+# Importamos el modelo de post para la ruta de posts de un usuario.
+from fastapi_project.schemas.post import Post
+
 # Creamos un router para las rutas del recurso "users".
 router = APIRouter()
 
@@ -35,15 +40,38 @@ async def get(id: int) -> User:
         raise HTTPException(status.HTTP_404_NOT_FOUND)
 
 
+# ---------------------------------------
+#      RUTA: GET /users/{id}/posts
+# ---------------------------------------
+@router.get("/{id}/posts")
+async def posts(
+    id: int,
+    response: Response,
+    # Posts a saltar y número máximo de posts de la página.
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+) -> list[Post]:
+    # Si el usuario no existe, devolvemos un 404 (Not Found).
+    if id not in db.users:
+        raise HTTPException(status.HTTP_404_NOT_FOUND)
+
+    # Usamos el índice de posts por usuario (ver db.py):
+    # no hace falta recorrer todos los posts para encontrar los suyos.
+    page, total = db.user_posts(id, skip=skip, limit=limit)
+
+    # Total de posts del usuario, para que el cliente sepa cuántas páginas hay.
+    response.headers["X-Total-Count"] = str(total)
+    return page
+
+
 # ----------------------------------------
 #      RUTA: POST /users/
 # ----------------------------------------
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def create(user_create: UserCreate) -> User:
-    # Generamos un nuevo ID secuencial:
-    # - Si hay usuarios, tomamos el ID más alto.
-    # - Si no hay usuarios, comenzamos en 1.
-    new_id = max(db.users.keys() or (0,)) + 1
+    # Pedimos un nuevo ID secuencial a la tabla de usuarios.
+    # Usa un contador (ver db.py): no recorre los usuarios existentes.
+    new_id = db.users.next_id()
 
     # Creamos un nuevo usuario con ese ID y los datos enviados por el cliente.
     user = User(id=new_id, **user_create.model_dump())
@@ -62,7 +90,8 @@ async def create(user_create: UserCreate) -> User:
 async def delete(id: int) -> None:
     try:
         # Intentamos eliminar el usuario por su ID.
-        db.users.pop(id)
+        # También se eliminan sus posts (borrado en cascada con el índice).
+        db.delete_user(id)
     except KeyError:
         # Si el usuario no existe, devolvemos un 404.
         raise HTTPException(status.HTTP_404_NOT_FOUND)